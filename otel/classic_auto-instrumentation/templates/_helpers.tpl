@@ -0,0 +1,49 @@
+{{/*
+Processors shared by otel-collector.yaml and otel-operator-collector.yaml: memory_limiter and batch
+(collectorProcessors), the span filter (traceFilter) and tail sampling (traceSampling).
+*/}}
+{{- define "otel-demo.collectorProcessors" -}}
+memory_limiter:
+  check_interval: {{ .Values.collectorProcessors.memoryLimiter.checkInterval }}
+  limit_percentage: {{ .Values.collectorProcessors.memoryLimiter.limitPercentage }}
+  spike_limit_percentage: {{ .Values.collectorProcessors.memoryLimiter.spikeLimitPercentage }}
+batch:
+  send_batch_size: {{ .Values.collectorProcessors.batch.sendBatchSize }}
+  send_batch_max_size: {{ .Values.collectorProcessors.batch.sendBatchMaxSize }}
+  timeout: {{ .Values.collectorProcessors.batch.timeout }}
+{{- if .Values.traceFilter.dropSpans }}
+filter/spans:
+  error_mode: ignore
+  traces:
+    span:
+    {{- range .Values.traceFilter.dropSpans }}
+      - {{ . | quote }}
+    {{- end }}
+{{- end }}
+{{- if .Values.traceSampling.enabled }}
+tail_sampling:
+  decision_wait: {{ .Values.traceSampling.decisionWait }}
+  num_traces: {{ .Values.traceSampling.numTraces }}
+  expected_new_traces_per_sec: {{ .Values.traceSampling.expectedNewTracesPerSec }}
+  policies:
+    - name: errors
+      type: status_code
+      status_code:
+        status_codes: [ERROR]
+    - name: slow
+      type: latency
+      latency:
+        threshold_ms: {{ .Values.traceSampling.latencyThresholdMs }}
+    - name: baseline
+      type: probabilistic
+      probabilistic:
+        sampling_percentage: {{ .Values.traceSampling.percentage }}
+{{- end }}
+{{- end }}
+
+{{/*
+Processor list of the traces pipeline; memory_limiter first, batch after the sampling decision.
+*/}}
+{{- define "otel-demo.traceProcessorNames" -}}
+[memory_limiter{{ if .Values.traceFilter.dropSpans }}, filter/spans{{ end }}{{ if .Values.traceSampling.enabled }}, tail_sampling{{ end }}, batch]
+{{- end }}
@@ -1,43 +1,45 @@
-import argparse, os, requests
-from hera.workflows import (
-    Workflow,
-    Steps,
-    Suspend,
-    Parameter,
-    WorkflowsService,
-    Script,
-    script,
-)
-from hera.workflows.models import ValueFrom
+import os, sys
+from typing import TYPE_CHECKING
 
-IMAGE = "python:3.9"
-DEFAULT_HOST = "http://localhost:2746"
+if TYPE_CHECKING:
+    from hera.workflows import WorkflowsService
 
+IMAGE = "python:3.9"
+SCENARIOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
 
 
-@script()
-def step1() -> str:
-    print("Hello from step 1!")
+def build_wf(svc: "WorkflowsService"):
+    from hera.workflows import (
+        Workflow,
+        Steps,
+        Suspend,
+        Parameter,
+        Script,
+        script,
+    )
+    from hera.workflows.models import ValueFrom
 
+    @script()
+    def step1() -> str:
+        print("Hello from step 1!")
 
-@script()
-def step2_approved(message: str):
-    print("Step 2 (APPROVED) received message:", message)
 
+    @script()
+    def step2_approved(message: str):
+        print("Step 2 (APPROVED) received message:", message)
 
-@script()
-def step2_rejected(message: str):
-    print("Step 2 (REJECTED) received message:", message)
 
+    @script()
+    def step2_rejected(message: str):
+        print("Step 2 (REJECTED) received message:", message)
 
-@script(outputs=[ Parameter(name="allow", value_from=ValueFrom(path="/tmp/allow.txt")),])
-def set_allow(approved: str):
-    allow = "true" if approved == "true" else "false"
-    print(f"set-allow: approved={approved} -> allow={allow}")
-    with open("/tmp/allow.txt", "w") as f: f.write(allow)
 
+    @script(outputs=[ Parameter(name="allow", value_from=ValueFrom(path="/tmp/allow.txt")),])
+    def set_allow(approved: str):
+        allow = "true" if approved == "true" else "false"
+        print(f"set-allow: approved={approved} -> allow={allow}")
+        with open("/tmp/allow.txt", "w") as f: f.write(allow)
 
-def build_wf(svc: WorkflowsService):
     # Build workflow and return workflow object directly
     with Workflow(
             generate_name="p1-long-running-wf-",
@@ -80,44 +82,11 @@ def build_wf(svc: WorkflowsService):
     return wf
 
 
-def make_service(server: str | None) -> WorkflowsService:
-    host = server or os.getenv("ARGO_SERVER") or DEFAULT_HOST
-    return WorkflowsService(host=host, token=None, verify_ssl=False)
-
-
 def main():
-    p = argparse.ArgumentParser()
-    p.add_argument("--print-yaml", action="store_true")
-    p.add_argument("--submit", action="store_true")
-    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
-    args = p.parse_args()
-
-    svc = make_service(args.server)
-    wf = build_wf(svc)
-
-    if args.print_yaml:
-        yaml_body = wf.to_yaml()
-        if not yaml_body.startswith("apiVersion:"):
-            yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
-        print(yaml_body)
-        return
-
-    if args.submit:
-        try:
-            wf.create()
-            print(
-                f"Submitted workflow over HTTP. Host used: {svc.host}\n\n"
-                f"{wf.name}"
-            )
-        except Exception as e:
-            print(
-                "Submission failed (HTTP mode): {}\n"
-                "Ensure argo-server started with --secure=false and is reachable.".format(
-                    e
-                )
-            )
-    else:
-        p.print_help()
+    sys.path.insert(0, SCENARIOS_DIR)
+    from runner import scenario_main
+
+    scenario_main(__file__, build_wf)
 
 
 if __name__ == "__main__":
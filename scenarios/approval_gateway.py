@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Approval gateway for human-in-the-loop workflows.
+
+Long-running replacement for calling resume_workflow.py once per workflow.
+It keeps an index of every workflow suspended on an approval node (default
+`wait-for-approval`), fed by the argo-server watch stream, and applies
+decisions for one or many workflows concurrently (set output parameter, then
+resume), reusing one pooled HTTP session.
+
+Endpoints:
+  GET  /pending[?selector=k=v,k2!=v2&prefix=p1-]    list suspended workflows
+  POST /approve  {"workflows": [...]} | {"selector": "..."} | {"prefix": "..."} | {"all": true}
+  POST /reject   same body as /approve
+  GET  /healthz
+
+Every endpoint but /healthz requires the X-Approval-Token header to match
+APPROVAL_GATEWAY_TOKEN; while that is unset the gateway refuses all of them.
+
+Example:
+  APPROVAL_GATEWAY_TOKEN=s3cret python approval_gateway.py --server http://localhost:2746 --port 8080
+  curl -XPOST -H 'X-Approval-Token: s3cret' localhost:8080/approve -d '{"prefix": "p1-long-running-wf-"}'
+"""
+import argparse
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from build_cache import DEFAULT_HOST, api_request, make_service
+
+logger = logging.getLogger("approval-gateway")
+TOKEN_HEADER = "X-Approval-Token"
+
+
+def suspended_node(wf: dict, node_name: str) -> dict | None:
+    status = wf.get("status") or {}
+    if status.get("phase") != "Running":
+        return None
+    for node in (status.get("nodes") or {}).values():
+        if node.get("type") == "Suspend" and node.get("phase") == "Running":
+            if (node.get("displayName") or node.get("name")) == node_name:
+                return node
+    return None
+
+
+def matches_selector(labels: dict, selector: str) -> bool:
+    """Equality-based label selector: `a=b,a==b,c!=d,e` (e: key exists)."""
+    for term in filter(None, (t.strip() for t in selector.split(","))):
+        if "!=" in term:
+            k, v = term.split("!=", 1)
+            if labels.get(k.strip()) == v.strip():
+                return False
+        elif "=" in term:
+            # `a==b` is the same as `a=b`
+            k, v = term.split("==", 1) if "==" in term else term.split("=", 1)
+            if labels.get(k.strip()) != v.strip():
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+class ApprovalIndex:
+    """Workflow name -> pending approval entry, maintained from list + watch events."""
+
+    def __init__(self, node_name: str):
+        self.node_name = node_name
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def update(self, wf: dict, deleted: bool = False) -> None:
+        name = wf["metadata"]["name"]
+        node = None if deleted else suspended_node(wf, self.node_name)
+        with self._lock:
+            if node is None:
+                self._pending.pop(name, None)
+            else:
+                self._pending[name] = {
+                    "workflow": name,
+                    "node": node.get("displayName") or node.get("name"),
+                    "labels": wf["metadata"].get("labels") or {},
+                    "suspended_at": node.get("startedAt"),
+                }
+
+    def reset(self, workflows: list[dict]) -> None:
+        with self._lock:
+            self._pending.clear()
+        for wf in workflows:
+            self.update(wf)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._pending.pop(name, None)
+
+    def select(self, names=None, selector: str | None = None, prefix: str | None = None) -> list[dict]:
+        with self._lock:
+            entries = list(self._pending.values())
+        if names is not None:
+            wanted = set(names)
+            entries = [e for e in entries if e["workflow"] in wanted]
+        if selector:
+            entries = [e for e in entries if matches_selector(e["labels"], selector)]
+        if prefix:
+            entries = [e for e in entries if e["workflow"].startswith(prefix)]
+        return entries
+
+
+class Gateway:
+    def __init__(self, svc, namespace: str, node_name: str, concurrency: int, parameter: str = "approved"):
+        self.svc = svc
+        self.namespace = namespace
+        self.parameter = parameter
+        self.index = ApprovalIndex(node_name)
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    # --- index maintenance ---------------------------------------------------
+
+    def resync(self) -> None:
+        wl = api_request(self.svc, "get", f"api/v1/workflows/{self.namespace}")
+        self.index.reset(wl.get("items") or [])
+        logger.info("Indexed %d pending approvals", len(self.index.select()))
+
+    def watch_forever(self, retry_delay: float = 2.0) -> None:
+        """Initial list, then the workflow-events stream; re-list on every reconnect."""
+        while True:
+            try:
+                self.resync()
+                self._watch()
+            except Exception as e:  # connection drops, server restarts
+                logger.warning("Watch interrupted (%s), reconnecting", e)
+            time.sleep(retry_delay)
+
+    def _watch(self) -> None:
+        url = urljoin(self.svc.host, f"api/v1/workflow-events/{self.namespace}")
+        headers = {"Authorization": self.svc.token} if self.svc.token else {}
+        with self.svc.session.get(
+            url, headers=headers, stream=True, verify=self.svc.verify_ssl, cert=self.svc.client_certs, timeout=(10, None)
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line).get("result") or {}
+                wf = event.get("object")
+                if wf and wf.get("metadata", {}).get("name"):
+                    self.index.update(wf, deleted=event.get("type") == "DELETED")
+
+    # --- decisions -----------------------------------------------------------
+
+    def _decide_one(self, entry: dict, value: str) -> dict:
+        name = entry["workflow"]
+        base = f"api/v1/workflows/{self.namespace}/{name}"
+        try:
+            api_request(self.svc, "put", f"{base}/set", {
+                "nodeFieldSelector": f"displayName={entry['node']}",
+                "outputParameters": json.dumps({self.parameter: value}),
+            })
+            api_request(self.svc, "put", f"{base}/resume", {})
+        except Exception as e:
+            return {"workflow": name, "ok": False, "error": str(e)}
+        self.index.remove(name)
+        return {"workflow": name, "ok": True, self.parameter: value}
+
+    def decide(self, entries: list[dict], value: str) -> list[dict]:
+        return list(self.pool.map(lambda e: self._decide_one(e, value), entries))
+
+
+def parse_selection(body) -> tuple[list[str] | None, str | None, str | None]:
+    """workflows, selector and prefix of an approve/reject body; ValueError unless it selects something explicitly.
+
+    Every given key must be meaningful: "all" must be true, "selector"/"prefix" non-empty strings and
+    "workflows" a non-empty name or list of names. An empty or false filter would otherwise match every
+    pending workflow.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("expected a JSON object")
+    if "all" in body and body["all"] is not True:
+        raise ValueError("all must be true")
+    names = body.get("workflows")
+    if "workflows" in body:
+        if isinstance(names, str):
+            names = [names]
+        if not (isinstance(names, list) and names and all(isinstance(n, str) and n for n in names)):
+            raise ValueError("workflows must be a non-empty workflow name or list of names")
+    for key in ("selector", "prefix"):
+        if key in body and not (isinstance(body[key], str) and body[key]):
+            raise ValueError(f"{key} must be a non-empty string")
+    if not any(k in body for k in ("workflows", "selector", "prefix", "all")):
+        raise ValueError("one of workflows, selector, prefix or all is required")
+    return names, body.get("selector"), body.get("prefix")
+
+
+def make_handler(gateway: Gateway, token: str | None):
+    class Handler(BaseHTTPRequestHandler):
+        def _authorized(self) -> bool:
+            # no token configured: nobody may list or decide
+            if bool(token) and hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+                return True
+            self._send(403, {"error": "forbidden"})
+            return False
+
+        def _send(self, code: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/healthz":
+                return self._send(200, {"ok": True})
+            if not self._authorized():
+                return
+            if url.path == "/pending":
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                return self._send(200, gateway.index.select(selector=q.get("selector"), prefix=q.get("prefix")))
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if not self._authorized():
+                return
+            if path not in ("/approve", "/reject"):
+                return self._send(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "invalid JSON"})
+            try:
+                names, selector, prefix = parse_selection(body)
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+
+            entries = gateway.index.select(names, selector, prefix)
+            results = gateway.decide(entries, "true" if path == "/approve" else "false")
+            missing = sorted(set(names or []) - {e["workflow"] for e in entries})
+            self._send(200, {"results": results, "not_pending": missing})
+
+        def log_message(self, fmt, *args):
+            logger.info("%s - %s", self.address_string(), fmt % args)
+
+    return Handler
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve approve/reject decisions for suspended workflows")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    p.add_argument("--namespace", default="argo")
+    p.add_argument("--node", default="wait-for-approval", help="display name of the approval Suspend node")
+    p.add_argument("--parameter", default="approved", help="output parameter set on the node")
+    p.add_argument("--concurrency", type=int, default=16, help="parallel set+resume calls")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=8080)
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    # one connection per concurrent decision plus the watch stream
+    gateway = Gateway(make_service(args.server, pool_size=args.concurrency + 2), args.namespace, args.node, args.concurrency, args.parameter)
+    threading.Thread(target=gateway.watch_forever, daemon=True).start()
+
+    token = os.getenv("APPROVAL_GATEWAY_TOKEN")
+    if not token:
+        logger.warning("APPROVAL_GATEWAY_TOKEN is not set: every request except /healthz is refused")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(gateway, token))
+    logger.info("Approval gateway listening on %s:%d", args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
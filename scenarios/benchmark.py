@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Workflow-level benchmark for the scenarios.
+
+Submits a scenario N times with a configurable concurrency, waits for every
+workflow to finish and derives from the workflow status:
+  - submit latency (client side, create call round trip)
+  - time to the first pod node (first Pod node startedAt - workflow creationTimestamp)
+  - per step node delay (node startedAt - parent node startedAt, i.e. controller
+    overhead before the node exists) and node run time (node finishedAt - startedAt)
+  - total wall time (workflow finishedAt - creationTimestamp)
+
+A Pod node's startedAt is when the controller created the node, not when its pod
+was scheduled or its containers became ready; the workflow status carries no pod
+conditions. Pod scheduling and image pulls therefore count in node_run_s, not in
+node_delay_s or first_pod_node_s.
+
+Writes a JSON report (and optionally a per-workflow CSV) with percentiles and
+compares it against a stored baseline report.
+
+Examples:
+  python benchmark.py P3/S2/run_workflow.py -n 20 --concurrency 5 --out p3s2.json
+  python benchmark.py P3/S2/run_workflow.py -n 20 --baseline p3s2.json --max-regression 10
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from build_cache import DEFAULT_HOST, BuildCache, api_request, default_template_name, load_scenario, make_service
+
+DONE_PHASES = ("Succeeded", "Failed", "Error")
+PERCENTILES = (50, 90, 95, 99)
+WORKFLOW_METRICS = ("submit_latency_s", "first_pod_node_s", "wall_s")
+TIMING_NOTE = (
+    "node times come from the workflow status: a node starts when the controller creates it, "
+    "so pod scheduling and image pulls count in node_run_s"
+)
+
+
+def parse_ts(value: str | None) -> float | None:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile, q in 0..100."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(values: list[float]) -> dict:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"count": 0}
+    stats = {
+        "count": len(values),
+        "min": min(values),
+        "mean": sum(values) / len(values),
+        "max": max(values),
+    }
+    for q in PERCENTILES:
+        stats[f"p{q}"] = percentile(values, q)
+    return stats
+
+
+def step_timings(status: dict) -> list[dict]:
+    """Delay/run durations (from node startedAt, see TIMING_NOTE) for every Pod and Suspend node of a finished workflow."""
+    nodes = status.get("nodes") or {}
+    parent_of = {}
+    for node_id, node in nodes.items():
+        for child in node.get("children") or []:
+            parent_of[child] = node_id
+
+    steps = []
+    for node_id, node in nodes.items():
+        if node.get("type") not in ("Pod", "Suspend"):
+            continue
+        started = parse_ts(node.get("startedAt"))
+        finished = parse_ts(node.get("finishedAt"))
+        parent = nodes.get(parent_of.get(node_id), {})
+        parent_started = parse_ts(parent.get("startedAt"))
+        steps.append({
+            "step": node.get("displayName") or node.get("name"),
+            "template": node.get("templateName"),
+            "phase": node.get("phase"),
+            "node_delay_s": started - parent_started if started and parent_started else None,
+            "node_run_s": finished - started if started and finished else None,
+        })
+    return steps
+
+
+def workflow_metrics(wf: dict) -> dict:
+    metadata, status = wf.get("metadata", {}), wf.get("status") or {}
+    created = parse_ts(metadata.get("creationTimestamp"))
+    finished = parse_ts(status.get("finishedAt"))
+    steps = step_timings(status)
+    pod_starts = [
+        parse_ts(n.get("startedAt"))
+        for n in (status.get("nodes") or {}).values()
+        if n.get("type") == "Pod" and n.get("startedAt")
+    ]
+    return {
+        "name": metadata.get("name"),
+        "phase": status.get("phase"),
+        "first_pod_node_s": min(pod_starts) - created if pod_starts and created else None,
+        "wall_s": finished - created if finished and created else None,
+        "node_count": len(status.get("nodes") or {}),
+        "steps": steps,
+    }
+
+
+def wait_for(svc, namespace: str, name: str, timeout: float, poll_interval: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        wf = api_request(svc, "get", f"api/v1/workflows/{namespace}/{name}")
+        phase = (wf.get("status") or {}).get("phase")
+        if phase in DONE_PHASES:
+            return wf
+        if time.monotonic() > deadline:
+            wf.setdefault("status", {})["phase"] = f"Timeout({phase})"
+            return wf
+        time.sleep(poll_interval)
+
+
+def run_one(svc, compiled, template_name, parameters, timeout, poll_interval) -> dict:
+    start = time.perf_counter()
+    if template_name:
+        name = compiled.submit_from_template(svc, template_name, parameters=parameters)
+    else:
+        name = compiled.submit(svc, parameters=parameters)
+    submit_latency = time.perf_counter() - start
+    wf = wait_for(svc, compiled.namespace, name, timeout, poll_interval)
+    metrics = workflow_metrics(wf)
+    metrics["submit_latency_s"] = submit_latency
+    return metrics
+
+
+def build_report(scenario: str, results: list[dict], args) -> dict:
+    steps = defaultdict(lambda: {"node_delay_s": [], "node_run_s": []})
+    for r in results:
+        for step in r["steps"]:
+            steps[step["step"]]["node_delay_s"].append(step["node_delay_s"])
+            steps[step["step"]]["node_run_s"].append(step["node_run_s"])
+
+    phases = defaultdict(int)
+    for r in results:
+        phases[r["phase"]] += 1
+
+    return {
+        "scenario": scenario,
+        "count": len(results),
+        "concurrency": args.concurrency,
+        "template": bool(args.template),
+        "elapsed_s": args.elapsed,
+        "timing_note": TIMING_NOTE,
+        "phases": dict(phases),
+        "summary": {metric: summarize([r[metric] for r in results]) for metric in WORKFLOW_METRICS},
+        "steps": {name: {k: summarize(v) for k, v in timings.items()} for name, timings in steps.items()},
+        "workflows": results,
+    }
+
+
+def write_csv(path: str, results: list[dict]) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "phase", "node_count", *WORKFLOW_METRICS])
+        for r in results:
+            writer.writerow([r["name"], r["phase"], r["node_count"], *(r[m] for m in WORKFLOW_METRICS)])
+
+
+def compare(report: dict, baseline: dict) -> list[tuple[str, float, float, float]]:
+    """(metric, baseline, current, change %) for every summary percentile present in both reports."""
+    rows = []
+    for metric in WORKFLOW_METRICS:
+        cur, base = report["summary"].get(metric, {}), baseline.get("summary", {}).get(metric, {})
+        for stat in ("mean", *(f"p{q}" for q in PERCENTILES)):
+            if stat in cur and base.get(stat):
+                rows.append((f"{metric}.{stat}", base[stat], cur[stat], (cur[stat] - base[stat]) / base[stat] * 100))
+    return rows
+
+
+def print_summary(report: dict) -> None:
+    print(f"\n{report['scenario']}: {report['count']} workflows in {report['elapsed_s']:.1f}s, phases={report['phases']}")
+    print(f"({TIMING_NOTE})")
+    print(f"{'metric':28s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    rows = [(m, s) for m, s in report["summary"].items()]
+    rows += [(f"{name}.{k}", s) for name, timings in report["steps"].items() for k, s in timings.items()]
+    for name, stats in rows:
+        if stats["count"]:
+            print(f"{name:28s} " + " ".join(f"{stats[k]:9.3f}" for k in ("p50", "p95", "p99", "max")))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark a scenario by submitting it N times")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("-n", "--count", type=int, default=10)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--param", action="append", default=[], metavar="NAME=VALUE")
+    p.add_argument("--template", action="store_true", help="submit via workflowTemplateRef")
+    p.add_argument("--timeout", type=float, default=900, help="per-workflow wait timeout in seconds")
+    p.add_argument("--poll-interval", type=float, default=2)
+    p.add_argument("--out", default=None, help="JSON report path")
+    p.add_argument("--csv", default=None, help="per-workflow CSV path")
+    p.add_argument("--baseline", default=None, help="JSON report to compare against")
+    p.add_argument("--max-regression", type=float, default=None, help="fail if any compared stat regresses more (%%)")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+    if args.count < 1 or args.concurrency < 1:
+        p.error("--count and --concurrency must be at least 1")
+
+    parameters = dict(kv.split("=", 1) for kv in args.param)
+    compiled = BuildCache().compile(load_scenario(args.scenario).build_wf)
+    svc = make_service(args.server, pool_size=args.concurrency)
+    template_name = None
+    if args.template:
+        template_name = compiled.register_template(svc, default_template_name(args.scenario))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_one, svc, compiled, template_name, parameters, args.timeout, args.poll_interval)
+            for _ in range(args.count)
+        ]
+        results = [f.result() for f in futures]
+    args.elapsed = time.perf_counter() - start
+
+    report = build_report(args.scenario, results, args)
+    print_summary(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(report, json.load(f))
+        print(f"\n{'vs baseline':28s} {'base':>9s} {'now':>9s} {'change':>8s}")
+        for name, base, cur, change in rows:
+            print(f"{name:28s} {base:9.3f} {cur:9.3f} {change:+7.1f}%")
+        if args.max_regression is not None and any(change > args.max_regression for *_, change in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
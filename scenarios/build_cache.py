@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Compile-once cache for the scenario workflows.
+
+Every build_wf() call rebuilds all Script/Suspend/Steps objects and every
+to_yaml()/create() serializes them again through pydantic. BuildCache compiles
+a scenario once, keeps the rendered spec as a plain dict keyed by a hash of the
+scenario source and build arguments, and for each submission only patches
+generateName/parameters into a copy of that dict, which is posted as raw JSON.
+
+Examples:
+  python build_cache.py P3/S1/run_workflow.py --submit --count 50
+  python build_cache.py P3/S1/run_workflow.py --register-template --submit --count 50
+  python build_cache.py P3/S1/run_workflow.py --cluster-template --submit --count 50
+"""
+import argparse
+import copy
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+DEFAULT_HOST = "http://localhost:2746"
+DEFAULT_NAMESPACE = "argo"
+CONTENT_HASH_LABEL = "scenarios.argoproj.io/content-hash"
+
+
+def load_scenario(path: str):
+    """Import a scenario script (e.g. P1/S1/run_workflow.py) by file path."""
+    path = os.path.abspath(path)
+    name = "scenario_" + hashlib.sha1(path.encode()).hexdigest()[:8]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def source_hash(build_fn, args: tuple = (), kwargs: dict | None = None) -> str:
+    # The whole module is hashed, not only build_fn: @script functions and
+    # constants such as IMAGE live next to it and change the rendered spec too.
+    import inspect
+
+    module = inspect.getmodule(build_fn)
+    try:
+        src = inspect.getsource(module) if module else inspect.getsource(build_fn)
+    except (OSError, TypeError):
+        src = inspect.getsource(build_fn)
+    h = hashlib.sha256(src.encode())
+    h.update(build_fn.__qualname__.encode())
+    h.update(repr((args, sorted((kwargs or {}).items()))).encode())
+    return h.hexdigest()[:16]
+
+
+def spec_hash(spec: dict) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def default_template_name(path: str) -> str:
+    """Template name derived from the scenario path, e.g. P3/S2/run_workflow.py -> p3-s2-run-workflow."""
+    parts = os.path.abspath(path)[:-len(".py")].split(os.sep)[-3:]
+    return "-".join(parts).lower().replace("_", "-")
+
+
+def submit_via_template(
+    wf, svc, scenario_path: str, template_name: str | None = None, cluster: bool = False, parameters: dict | None = None
+) -> str:
+    """Publish a built Hera workflow as a template (if changed) and submit a workflowTemplateRef to it."""
+    manifest = wf.to_dict()
+    compiled = CompiledWorkflow(spec_hash(manifest["spec"]), manifest)
+    name = compiled.register_template(svc, template_name or default_template_name(scenario_path), cluster)
+    return compiled.submit_from_template(svc, name, parameters=parameters, cluster=cluster)
+
+
+def _headers(svc) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if svc.token:
+        headers["Authorization"] = svc.token
+    return headers
+
+
+def api_request(svc, method: str, path: str, body: dict | None = None, params: dict | None = None) -> dict:
+    """Send raw JSON to argo-server over the service's pooled session (no pydantic models)."""
+    from hera.exceptions import exception_from_server_response
+
+    resp = svc.session.request(
+        method,
+        urljoin(svc.host, path),
+        data=json.dumps(body) if body is not None else None,
+        params=params,
+        headers=_headers(svc),
+        verify=svc.verify_ssl,
+        cert=svc.client_certs,
+    )
+    if not resp.ok:
+        raise exception_from_server_response(resp)
+    return resp.json()
+
+
+def _with_parameters(spec: dict, parameters: dict | None) -> None:
+    if not parameters:
+        return
+    arguments = spec.setdefault("arguments", {})
+    params = arguments.setdefault("parameters", [])
+    by_name = {p["name"]: p for p in params}
+    for name, value in parameters.items():
+        if name in by_name:
+            by_name[name]["value"] = str(value)
+        else:
+            params.append({"name": name, "value": str(value)})
+
+
+class CompiledWorkflow:
+    """A rendered workflow spec that can be instantiated and submitted many times."""
+
+    def __init__(self, key: str, manifest: dict):
+        self.key = key
+        self.manifest = manifest
+
+    @property
+    def namespace(self) -> str:
+        return self.manifest["metadata"].get("namespace") or DEFAULT_NAMESPACE
+
+    @property
+    def generate_name(self) -> str:
+        return self.manifest["metadata"].get("generateName") or self.manifest["metadata"].get("name", "wf-")
+
+    def to_yaml(self) -> str:
+        import yaml
+
+        return yaml.safe_dump(self.manifest, sort_keys=False)
+
+    def instantiate(self, generate_name: str | None = None, parameters: dict | None = None) -> dict:
+        """Return a copy of the cached manifest with generateName/parameters patched in."""
+        wf = copy.deepcopy(self.manifest)
+        if generate_name:
+            wf["metadata"].pop("name", None)
+            wf["metadata"]["generateName"] = generate_name
+        _with_parameters(wf["spec"], parameters)
+        return wf
+
+    def submit(self, svc, generate_name: str | None = None, parameters: dict | None = None) -> str:
+        wf = self.instantiate(generate_name, parameters)
+        created = api_request(svc, "post", f"api/v1/workflows/{self.namespace}", {"workflow": wf})
+        return created["metadata"]["name"]
+
+    @property
+    def content_hash(self) -> str:
+        return spec_hash(self.manifest["spec"])
+
+    def template_manifest(self, name: str | None = None, cluster: bool = False) -> dict:
+        name = name or self.generate_name.rstrip("-")
+        metadata = {"name": name, "labels": {CONTENT_HASH_LABEL: self.content_hash}}
+        if not cluster:
+            metadata["namespace"] = self.namespace
+        return {
+            "apiVersion": "argoproj.io/v1alpha1",
+            "kind": "ClusterWorkflowTemplate" if cluster else "WorkflowTemplate",
+            "metadata": metadata,
+            "spec": copy.deepcopy(self.manifest["spec"]),
+        }
+
+    def _template_base(self, cluster: bool) -> str:
+        return "api/v1/cluster-workflow-templates" if cluster else f"api/v1/workflow-templates/{self.namespace}"
+
+    def register_template(self, svc, name: str | None = None, cluster: bool = False) -> str:
+        """Idempotently upsert a (Cluster)WorkflowTemplate holding the compiled spec.
+
+        The template carries a content-hash label; when the stored template already
+        has the same hash nothing is sent, otherwise it is created or updated.
+        """
+        from hera.exceptions import NotFound
+
+        template = self.template_manifest(name, cluster)
+        name = template["metadata"]["name"]
+        base = self._template_base(cluster)
+        try:
+            current = api_request(svc, "get", f"{base}/{name}")
+        except NotFound:
+            api_request(svc, "post", base, {"template": template})
+            return name
+
+        labels = current["metadata"].get("labels") or {}
+        if labels.get(CONTENT_HASH_LABEL) != self.content_hash:
+            template["metadata"]["resourceVersion"] = current["metadata"]["resourceVersion"]
+            api_request(svc, "put", f"{base}/{name}", {"template": template})
+        return name
+
+    def submit_from_template(
+        self,
+        svc,
+        template_name: str,
+        generate_name: str | None = None,
+        parameters: dict | None = None,
+        cluster: bool = False,
+    ) -> str:
+        """Submit a workflowTemplateRef workflow - only name and arguments go over the wire."""
+        ref = {"name": template_name}
+        if cluster:
+            ref["clusterScope"] = True
+        wf = {
+            "metadata": {"generateName": generate_name or self.generate_name, "namespace": self.namespace},
+            "spec": {"workflowTemplateRef": ref},
+        }
+        _with_parameters(wf["spec"], parameters)
+        created = api_request(svc, "post", f"api/v1/workflows/{self.namespace}", {"workflow": wf})
+        return created["metadata"]["name"]
+
+
+class BuildCache:
+    """Cache of compiled workflows, in memory and optionally on disk (one JSON file per key)."""
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+        self._compiled: dict[str, CompiledWorkflow] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, build_fn, *args, **kwargs) -> CompiledWorkflow:
+        """Build the workflow once per (source, arguments) and return the cached result.
+
+        build_fn is called as build_fn(None, *args, **kwargs): the workflows service
+        is not part of the rendered spec, so it is neither needed nor hashed.
+        """
+        key = source_hash(build_fn, args, kwargs)
+        compiled = self._compiled.get(key) or self._load(key)
+        if compiled is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            wf = build_fn(None, *args, **kwargs)
+            compiled = CompiledWorkflow(key, wf.to_dict())
+            self._store(compiled)
+        self._compiled[key] = compiled
+        return compiled
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> CompiledWorkflow | None:
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        with open(self._path(key)) as f:
+            return CompiledWorkflow(key, json.load(f))
+
+    def _store(self, compiled: CompiledWorkflow) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._path(compiled.key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(compiled.manifest, f)
+        os.replace(tmp, self._path(compiled.key))
+
+
+def make_service(server: str | None, pool_size: int | None = None):
+    """WorkflowsService for the argo-server; `pool_size` sizes its keep-alive pool for that many concurrent calls."""
+    from hera.workflows import WorkflowsService
+
+    host = server or os.getenv("ARGO_SERVER") or DEFAULT_HOST
+    svc = WorkflowsService(host=host, token=os.getenv("ARGO_TOKEN"), verify_ssl=False)
+    if pool_size:
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        svc.session.mount("http://", adapter)
+        svc.session.mount("https://", adapter)
+    return svc
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compile a scenario once and submit it many times")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf, e.g. P3/S1/run_workflow.py")
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--count", type=int, default=1, help="number of workflows to submit")
+    p.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="workflow argument")
+    p.add_argument("--register-template", action="store_true", help="upsert a WorkflowTemplate and submit from it")
+    p.add_argument("--cluster-template", action="store_true", help="use a ClusterWorkflowTemplate instead")
+    p.add_argument("--template-name", default=None)
+    p.add_argument("--cache-dir", default=os.getenv("BUILD_CACHE_DIR"))
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+    if args.count < 1:
+        p.error("--count must be at least 1")
+
+    parameters = dict(kv.split("=", 1) for kv in args.param)
+    cache = BuildCache(args.cache_dir)
+    start = time.perf_counter()
+    compiled = cache.compile(load_scenario(args.scenario).build_wf)
+    print(f"compiled {compiled.key} in {time.perf_counter() - start:.3f}s (cache hit: {cache.hits > 0})", file=sys.stderr)
+
+    if args.print_yaml:
+        print(compiled.to_yaml())
+        return
+
+    if not (args.submit or args.register_template or args.cluster_template):
+        p.print_help()
+        return
+
+    svc = make_service(args.server)
+    template_name = None
+    cluster = args.cluster_template
+    if args.register_template or cluster:
+        template_name = compiled.register_template(
+            svc, args.template_name or default_template_name(args.scenario), cluster
+        )
+        print(f"Registered {'ClusterWorkflowTemplate' if cluster else 'WorkflowTemplate'} {template_name}")
+    if not args.submit:
+        return
+
+    start = time.perf_counter()
+    for _ in range(args.count):
+        if template_name:
+            name = compiled.submit_from_template(svc, template_name, parameters=parameters, cluster=cluster)
+        else:
+            name = compiled.submit(svc, parameters=parameters)
+        print(name)
+    elapsed = time.perf_counter() - start
+    print(f"Submitted {args.count} workflow(s) in {elapsed:.3f}s ({elapsed / args.count * 1000:.1f} ms each)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
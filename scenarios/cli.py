@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Single entry point for the scenario tooling.
+
+Subcommands are resolved to their module only when invoked, so
+`python cli.py --help` and `python cli.py <command> --help` import nothing but
+the standard library; Hera/pydantic are loaded by the code paths that build or
+submit workflows. `run` executes a scenario script as if it was called directly.
+
+Examples:
+  python cli.py run P3/S1/run_workflow.py --print-yaml
+  python cli.py cache P3/S1/run_workflow.py --submit --count 50
+  python cli.py startup --baseline startup.json --max-regression 20
+"""
+import importlib
+import os
+import runpy
+import sys
+
+SCENARIOS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# command -> (module, summary); modules are imported on dispatch only
+COMMANDS = {
+    "run": (None, "run a scenario script (P*/S*/*.py) with its own arguments"),
+    "scenarios": ("runner", "list/render/submit/bulk-submit/wait/benchmark scenarios by id"),
+    "cache": ("build_cache", "compile once, submit many / register WorkflowTemplates"),
+    "benchmark": ("benchmark", "submit N workflows and report latency percentiles"),
+    "retry-sim": ("retry_sim", "simulate retryStrategy outcomes offline"),
+    "local": ("local_run", "dry-run a scenario locally"),
+    "dag": ("dag_builder", "render/submit/run the DAG variant of a scenario"),
+    "pooled": ("pooled", "serve tiny scripts from the script-runner pool"),
+    "offload": ("offload", "route large outputs through artifacts"),
+    "memoize": ("memoize", "memoize steps / report cache hit rates"),
+    "size": ("wf_size", "workflow object size and node-count profile"),
+    "render": ("render_all", "regenerate stale rendered.yaml files"),
+    "approvals": ("approval_gateway", "serve approve/reject for suspended workflows"),
+    "resume": ("resume_workflow", "resume one suspended workflow"),
+    "startup": ("startup_check", "check CLI startup time and eager heavy imports"),
+}
+
+
+def usage() -> str:
+    lines = ["usage: cli.py <command> [args...]", "", "commands:"]
+    lines += [f"  {name:12s} {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += ["", "Run `cli.py <command> --help` for the options of a command."]
+    return "\n".join(lines)
+
+
+def run_scenario(argv: list[str]) -> None:
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: cli.py run <scenario.py> [--print-yaml | --submit ...]")
+        return
+    path = argv[0]
+    sys.argv = [path, *argv[1:]]
+    runpy.run_path(path, run_name="__main__")
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"cli.py: unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    module = COMMANDS[command][0]
+    if module is None:
+        return run_scenario(rest)
+    if SCENARIOS_DIR not in sys.path:
+        sys.path.insert(0, SCENARIOS_DIR)
+    sys.argv = [f"cli.py {command}", *rest]
+    importlib.import_module(module).main()
+
+
+if __name__ == "__main__":
+    main()
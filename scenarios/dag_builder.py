@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""DAG variants of the scenario workflows.
+
+The scenarios build strictly sequential Steps templates, so independent steps
+wait for each other. dagify() turns every Steps template of a workflow into a
+DAG template whose task dependencies are derived from parameter references:
+a step depends only on the steps whose outputs it reads ({{steps.X.outputs...}},
+also inside `when`) and everything else runs in parallel. Extra ordering that
+is not visible in parameters (side effects, "just for structure" steps) can be
+added with `after`.
+
+fan_out_fan_in() builds a map/reduce DAG: one task per item (withItems or
+withParam) capped by `parallelism`, and an optional reducer receiving the
+aggregated outputs.
+
+Examples:
+  python dag_builder.py P1/S1/run_workflow.py --print-yaml
+  python dag_builder.py P3/S2/run_workflow.py --after consume-message=produce-message --submit
+  python dag_builder.py P1/S2/run_workflow.py --run-local --supply approved=true
+"""
+import argparse
+import copy
+import os
+import re
+
+from build_cache import DEFAULT_HOST, load_scenario, make_service
+
+_STEP_REF = re.compile(r"\{\{\s*steps\.([^.}\s]+)\.")
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _strings(v)
+
+
+def _rewrite(value):
+    """{{steps.X...}} -> {{tasks.X...}} in every string of a (nested) value."""
+    if isinstance(value, str):
+        return re.sub(r"\{\{(\s*)steps\.", r"{{\1tasks.", value)
+    if isinstance(value, dict):
+        return {k: _rewrite(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rewrite(v) for v in value]
+    return value
+
+
+def step_dependencies(step: dict) -> set[str]:
+    """Names of the steps whose outputs/status this step references."""
+    refs = set()
+    for text in _strings({k: v for k, v in step.items() if k != "name"}):
+        refs.update(_STEP_REF.findall(text))
+    return refs
+
+
+def steps_to_dag(template: dict, after: dict[str, list[str]] | None = None) -> dict:
+    """Convert a rendered Steps template (dict) into an equivalent DAG template."""
+    after = after or {}
+    dag = {k: copy.deepcopy(v) for k, v in template.items() if k != "steps"}
+    names = [step["name"] for group in template["steps"] for step in group]
+    tasks = []
+    for group in template["steps"]:
+        for step in group:
+            task = _rewrite(copy.deepcopy(step))
+            deps = (step_dependencies(step) | set(after.get(step["name"], []))) & set(names)
+            if deps:
+                task["depends"] = " && ".join(sorted(deps))
+            tasks.append(task)
+    dag["dag"] = {"tasks": tasks}
+    if "outputs" in dag:
+        dag["outputs"] = _rewrite(dag["outputs"])
+    return dag
+
+
+def dagify(wf, after: dict[str, list[str]] | None = None, templates: list[str] | None = None):
+    """Return a Hera Workflow where Steps templates (all, or only `templates`) are DAGs.
+
+    `after` maps a step name to steps it must wait for in addition to the ones
+    derived from parameter references.
+    """
+    from hera.workflows import Workflow
+
+    manifest = wf.to_dict()
+    for i, template in enumerate(manifest["spec"]["templates"]):
+        if "steps" in template and (templates is None or template["name"] in templates):
+            manifest["spec"]["templates"][i] = steps_to_dag(template, after)
+    dag_wf = Workflow.from_dict(manifest)
+    dag_wf.workflows_service = getattr(wf, "workflows_service", None)
+    return dag_wf
+
+
+def fan_out_fan_in(
+    name: str,
+    worker,
+    reducer=None,
+    items: list | None = None,
+    param: str | None = None,
+    parallelism: int | None = None,
+    item_argument: str = "item",
+    collect: str | None = None,
+    reducer_argument: str = "results",
+    arguments: dict | None = None,
+):
+    """Map/reduce DAG template; call inside a Workflow context.
+
+    worker runs once per entry of `items` (withItems) or of the JSON list
+    expression `param` (withParam), receiving it as `item_argument`; at most
+    `parallelism` run at once. reducer (optional) gets the aggregated JSON list
+    of the workers' `collect` output parameter (or their stdout results).
+    """
+    from hera.workflows import DAG, Task
+
+    if (items is None) == (param is None):
+        raise ValueError("exactly one of items or param is required")
+
+    # explicit Task objects: calling a string-source Script with with_items makes
+    # Hera try to infer loop parameters from a Python function signature
+    with DAG(name=name, parallelism=parallelism) as dag:
+        mapped = Task(
+            name="map",
+            template=worker,
+            arguments={item_argument: "{{item}}", **(arguments or {})},
+            with_items=items,
+            with_param=param,
+        )
+        if reducer is not None:
+            output = f"outputs.parameters.{collect}" if collect else "outputs.result"
+            mapped >> Task(name="reduce", template=reducer, arguments={reducer_argument: f"{{{{tasks.map.{output}}}}}"})
+    return dag
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render/submit/run the DAG variant of a scenario")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("--after", action="append", default=[], metavar="STEP=DEP[,DEP]",
+                   help="extra ordering not visible in parameter references")
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--run-local", action="store_true", help="execute with local_run.LocalExecutor")
+    p.add_argument("--supply", action="append", default=[], metavar="NAME=VALUE", help="suspend outputs for --run-local")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+
+    after = {}
+    for spec in args.after:
+        step, _, deps = spec.partition("=")
+        after[step] = deps.split(",")
+
+    svc = make_service(args.server) if args.submit else None
+    wf = dagify(load_scenario(args.scenario).build_wf(svc), after)
+
+    if args.print_yaml:
+        yaml_body = wf.to_yaml()
+        if not yaml_body.startswith("apiVersion:"):
+            yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+        print(yaml_body)
+    elif args.submit:
+        wf.create()
+        print(f"Submitted DAG workflow over HTTP. Host used: {svc.host}\n\n{wf.name}")
+    elif args.run_local:
+        from local_run import LocalExecutor
+
+        supplied = dict(kv.split("=", 1) for kv in args.supply)
+        report = LocalExecutor(wf, on_suspend=lambda node, t: supplied, echo=False).run()
+        for n in report["nodes"]:
+            print(f"{n['node']:50s} {n['phase']:10s} {n['duration_s']:7.2f}s")
+        print(f"workflow: {report['phase']} in {report['wall_s']:.2f}s")
+    else:
+        p.print_help()
+
+
+if __name__ == "__main__":
+    main()
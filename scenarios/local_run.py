@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Local dry-run executor for Hera workflows - no cluster, no pods.
+
+Walks the entrypoint of a workflow and executes it on this machine:
+  - Script templates run as local `python` subprocesses (the image is ignored);
+    output paths such as /tmp/message.txt are redirected into a per-node
+    directory so parallel steps do not overwrite each other
+  - steps of one parallel group and DAG tasks whose dependencies are done run
+    concurrently (bounded by --workers)
+  - {{inputs.parameters.*}}, {{steps.X.outputs.parameters.Y}}, {{steps.X.outputs.result}},
+    {{tasks.X.outputs...}}, {{workflow.parameters.*}}, {{item}} and {{retries}} are resolved;
+    withItems/withParam loops fan out and aggregate their outputs into JSON lists
+  - `when` conditions are evaluated, retryStrategy limit/expression are honoured
+    (backoff sleeps are skipped unless --backoff is given)
+  - Suspend templates call a callback that supplies their output parameters
+
+Examples:
+  python local_run.py P1/S1/run_workflow.py --supply approved=true
+  python local_run.py P3/S2/run_workflow.py --backoff
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from build_cache import load_scenario
+from retry_sim import DEADLINE_MESSAGE, ExpressionError, evaluate, evaluate_when, parse_duration, policy_allows
+
+_REF = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+
+class StepFailed(Exception):
+    pass
+
+
+def substitute(text, scope: dict):
+    """Replace {{...}} references found in scope (a flat dict); unknown references are kept."""
+    if not isinstance(text, str):
+        return text
+    return _REF.sub(lambda m: str(scope[m.group(1)]) if m.group(1) in scope else m.group(0), text)
+
+
+def unresolved(text) -> list[str]:
+    """Step/task/input references left after substitution - Argo fails the node on these."""
+    if not isinstance(text, str):
+        return []
+    return [m for m in _REF.findall(text) if m.split(".")[0] in ("steps", "tasks", "inputs")]
+
+
+def _when(expression: str) -> bool:
+    try:
+        return evaluate_when(expression)
+    except (ValueError, TypeError):
+        # free-text values (spaces, punctuation) - fall back to plain string comparison
+        for op in ("!=", "=="):
+            if op in expression:
+                lhs, rhs = (part.strip().strip("'\"") for part in expression.split(op, 1))
+                return (lhs == rhs) == (op == "==")
+        raise
+
+
+def _json_or_str(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def prompt_supplier(node: str, template: dict) -> dict:
+    """Default suspend callback: ask on the terminal for every supplied output parameter."""
+    values = {}
+    for param in (template.get("outputs") or {}).get("parameters", []):
+        values[param["name"]] = input(f"[{node}] suspended, value for {param['name']}: ").strip()
+    return values
+
+
+class LocalExecutor:
+    def __init__(self, wf, on_suspend=prompt_supplier, workers: int = 8, python: str = sys.executable,
+                 backoff: bool = False, workdir: str | None = None, echo: bool = True):
+        self.manifest = wf if isinstance(wf, dict) else wf.to_dict()
+        self.templates = {t["name"]: t for t in self.manifest["spec"]["templates"]}
+        self.on_suspend = on_suspend
+        self.python = python
+        self.backoff = backoff
+        self.workdir = workdir
+        self.echo = echo
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self.nodes: list[dict] = []
+
+    # --- entry point -------------------------------------------------------
+
+    def run(self, parameters: dict | None = None) -> dict:
+        spec = self.manifest["spec"]
+        wf_params = {p["name"]: p.get("value", "") for p in (spec.get("arguments") or {}).get("parameters", [])}
+        wf_params.update(parameters or {})
+        self.globals = {f"workflow.parameters.{k}": v for k, v in wf_params.items()}
+        self.globals["workflow.name"] = self.manifest["metadata"].get("generateName", "local-") + "local"
+        self.globals["workflow.namespace"] = self.manifest["metadata"].get("namespace", "argo")
+
+        own_workdir = self.workdir is None
+        self.workdir = self.workdir or tempfile.mkdtemp(prefix="local-run-")
+        start = time.perf_counter()
+        try:
+            result = self.run_template(spec["entrypoint"], wf_params, spec["entrypoint"])
+        finally:
+            if own_workdir:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+        return {"phase": result["phase"], "wall_s": time.perf_counter() - start, "nodes": self.nodes}
+
+    # --- templates ---------------------------------------------------------
+
+    def run_template(self, name: str, arguments: dict, node: str) -> dict:
+        template = self.templates[name]
+        inputs = {}
+        for param in (template.get("inputs") or {}).get("parameters", []):
+            if param["name"] in arguments:
+                inputs[param["name"]] = arguments[param["name"]]
+            elif "value" in param or "default" in param:
+                inputs[param["name"]] = param.get("value", param.get("default"))
+            else:
+                raise StepFailed(f"{node}: missing input parameter {param['name']!r}")
+        scope = dict(self.globals)
+        scope.update({f"inputs.parameters.{k}": v for k, v in inputs.items()})
+
+        start = time.perf_counter()
+        if "steps" in template:
+            result = self._run_steps(template, scope, node)
+        elif "dag" in template:
+            result = self._run_dag(template, scope, node)
+        elif "suspend" in template:
+            result = self._run_suspend(template, node)
+        elif "script" in template:
+            result = self._run_script(template, scope, node)
+        else:
+            raise StepFailed(f"{node}: template type of {name!r} is not supported locally")
+        self._record(node, name, result["phase"], start, result.get("attempts", 1))
+        return result
+
+    def _template_outputs(self, template: dict, scope: dict) -> dict:
+        outputs = {}
+        for param in (template.get("outputs") or {}).get("parameters", []):
+            value_from = param.get("valueFrom") or {}
+            if "parameter" in value_from:
+                outputs[param["name"]] = substitute(value_from["parameter"], scope)
+            elif "value" in param:
+                outputs[param["name"]] = substitute(param["value"], scope)
+        return outputs
+
+    def _step_scope(self, prefix: str, step_name: str, result: dict, scope: dict) -> None:
+        for k, v in result.get("outputs", {}).items():
+            scope[f"{prefix}.{step_name}.outputs.parameters.{k}"] = v
+        if "result" in result:
+            scope[f"{prefix}.{step_name}.outputs.result"] = result["result"]
+        scope[f"{prefix}.{step_name}.status"] = result["phase"]
+
+    def _invoke(self, step: dict, scope: dict, node: str, parallelism: int | None = None) -> dict:
+        if "withItems" in step or "withParam" in step:
+            return self._run_loop(step, scope, node, parallelism)
+        when = substitute(step.get("when"), scope)
+        arguments = {
+            p["name"]: substitute(p.get("value", ""), scope)
+            for p in (step.get("arguments") or {}).get("parameters", [])
+        }
+        missing = unresolved(when) + [ref for value in arguments.values() for ref in unresolved(value)]
+        if missing:
+            print(f"[{node}] unable to resolve: {', '.join(missing)}")
+            self._record(node, step["template"], "Error", time.perf_counter())
+            return {"phase": "Error", "outputs": {}}
+        if when and not _when(when):
+            self._record(node, step["template"], "Skipped", time.perf_counter())
+            return {"phase": "Skipped", "outputs": {}}
+        return self.run_template(step["template"], arguments, node)
+
+    def _run_loop(self, step: dict, scope: dict, node: str, parallelism: int | None) -> dict:
+        """withItems/withParam: one invocation per item, outputs aggregated into JSON lists like Argo."""
+        items = step["withItems"] if "withItems" in step else json.loads(substitute(step["withParam"], scope))
+        single = {k: v for k, v in step.items() if k not in ("withItems", "withParam")}
+
+        def one(index, item):
+            item_scope = dict(scope, item=json.dumps(item) if isinstance(item, (dict, list)) else item)
+            if isinstance(item, dict):
+                item_scope.update({f"item.{k}": v for k, v in item.items()})
+            return self._invoke(single, item_scope, f"{node}({index}:{item})")
+
+        with ThreadPoolExecutor(max_workers=parallelism or max(len(items), 1)) as pool:
+            results = list(pool.map(one, range(len(items)), items))
+        phase = next((r["phase"] for r in results if r["phase"] not in ("Succeeded", "Skipped")), "Succeeded")
+        names = {k for r in results for k in r.get("outputs", {})}
+        merged = {
+            "phase": phase,
+            "outputs": {k: json.dumps([r["outputs"][k] for r in results if k in r.get("outputs", {})]) for k in names},
+        }
+        if any("result" in r for r in results):
+            merged["result"] = json.dumps([_json_or_str(r["result"]) for r in results if "result" in r])
+        return merged
+
+    def _run_steps(self, template: dict, scope: dict, node: str) -> dict:
+        for group in template["steps"]:
+            with ThreadPoolExecutor(max_workers=len(group)) as pool:
+                futures = {
+                    s["name"]: pool.submit(self._invoke, s, dict(scope), f"{node}.{s['name']}", template.get("parallelism"))
+                    for s in group
+                }
+            for step_name, future in futures.items():
+                result = future.result()
+                self._step_scope("steps", step_name, result, scope)
+                if result["phase"] not in ("Succeeded", "Skipped"):
+                    return {"phase": result["phase"], "outputs": {}}
+        return {"phase": "Succeeded", "outputs": self._template_outputs(template, scope)}
+
+    def _run_dag(self, template: dict, scope: dict, node: str) -> dict:
+        tasks = {t["name"]: t for t in template["dag"]["tasks"]}
+        deps = {name: set(dag_dependencies(t)) for name, t in tasks.items()}
+        done, failed, running = set(), None, {}
+        with ThreadPoolExecutor(max_workers=max(len(tasks), 1)) as pool:
+            while len(done) < len(tasks) and failed is None:
+                for name, task in tasks.items():
+                    if name not in done and name not in running and deps[name] <= done:
+                        running[name] = pool.submit(
+                            self._invoke, task, dict(scope), f"{node}.{name}", template.get("parallelism")
+                        )
+                if not running:
+                    raise StepFailed(f"{node}: unresolvable DAG dependencies {deps}")
+                finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [n for n, f in running.items() if f in finished]:
+                    result = running.pop(name).result()
+                    self._step_scope("tasks", name, result, scope)
+                    done.add(name)
+                    if result["phase"] not in ("Succeeded", "Skipped"):
+                        failed = result["phase"]
+            for name, future in running.items():
+                self._step_scope("tasks", name, future.result(), scope)
+        if failed:
+            return {"phase": failed, "outputs": {}}
+        return {"phase": "Succeeded", "outputs": self._template_outputs(template, scope)}
+
+    def _run_suspend(self, template: dict, node: str) -> dict:
+        duration = parse_duration((template.get("suspend") or {}).get("duration"))
+        if duration:
+            time.sleep(duration)
+            return {"phase": "Succeeded", "outputs": {}}
+        supplied = self.on_suspend(node, template) or {}
+        return {"phase": "Succeeded", "outputs": {k: str(v) for k, v in supplied.items()}}
+
+    def _run_script(self, template: dict, scope: dict, node: str) -> dict:
+        node_dir = os.path.join(self.workdir, node)
+        os.makedirs(node_dir, exist_ok=True)
+        source = template["script"]["source"]
+        # redirect container paths into the node directory
+        out_paths = {}
+        for param in (template.get("outputs") or {}).get("parameters", []):
+            path = (param.get("valueFrom") or {}).get("path")
+            if path:
+                out_paths[param["name"]] = os.path.join(node_dir, os.path.basename(path))
+                source = source.replace(path, out_paths[param["name"]])
+
+        strategy = template.get("retryStrategy") or {}
+        limit = int(strategy.get("limit", 0)) if strategy else 0
+        expression = strategy.get("expression")
+        policy = strategy.get("retryPolicy") or ("Always" if expression else "OnFailure")
+        backoff = strategy.get("backoff") or {}
+        timeout = parse_duration(template.get("timeout"))
+
+        for attempt in range(limit + 1):
+            last = self._attempt(source, dict(scope, retries=attempt), node_dir, timeout, node)
+            if last["status"] == "Succeeded":
+                break
+            if attempt == limit or not policy_allows(policy, last["status"]):
+                break
+            try:
+                if expression and not evaluate(expression, last):
+                    break
+            except ExpressionError as e:
+                print(f"[{node}] retry expression error, not retrying: {e}")
+                break
+            if self.backoff:
+                time.sleep((parse_duration(backoff.get("duration")) or 0) * float(backoff.get("factor", 1)) ** attempt)
+
+        outputs = {}
+        for name, path in out_paths.items():
+            if os.path.exists(path):
+                with open(path) as f:
+                    outputs[name] = f.read()
+        return {"phase": last["status"], "outputs": outputs, "result": last["stdout"].strip(), "attempts": attempt + 1}
+
+    def _attempt(self, source: str, scope: dict, node_dir: str, timeout: float | None, node: str) -> dict:
+        script = os.path.join(node_dir, "script.py")
+        with open(script, "w") as f:
+            f.write(substitute(source, scope))
+        start = time.perf_counter()
+        with self._slots:
+            try:
+                proc = subprocess.run([self.python, script], cwd=node_dir, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired as e:
+                stdout = e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+                return {"exitCode": "-1", "status": "Failed", "message": DEADLINE_MESSAGE,
+                        "duration": str(int(time.perf_counter() - start)), "stdout": stdout}
+        if self.echo:
+            for line in (proc.stdout + proc.stderr).splitlines():
+                print(f"[{node}] {line}")
+        return {
+            "exitCode": str(proc.returncode),
+            "status": "Succeeded" if proc.returncode == 0 else "Failed",
+            "message": proc.stderr.strip().splitlines()[-1] if proc.returncode and proc.stderr.strip() else "",
+            "duration": str(int(time.perf_counter() - start)),
+            "stdout": proc.stdout,
+        }
+
+    def _record(self, node: str, template: str, phase: str, start: float, attempts: int = 1) -> None:
+        with self._lock:
+            self.nodes.append({"node": node, "template": template, "phase": phase,
+                               "duration_s": time.perf_counter() - start, "attempts": attempts})
+
+
+def dag_dependencies(task: dict) -> list[str]:
+    """Task names a DAG task waits for, from `dependencies` or the `depends` expression."""
+    if task.get("dependencies"):
+        return list(task["dependencies"])
+    depends = task.get("depends") or ""
+    return sorted({m.split(".")[0] for m in re.findall(r"[A-Za-z0-9][A-Za-z0-9_.-]*", depends)})
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run a scenario workflow locally without a cluster")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="workflow parameter")
+    p.add_argument("--supply", action="append", default=[], metavar="NAME=VALUE",
+                   help="output parameter supplied to every suspend step (prompted for otherwise)")
+    p.add_argument("--workers", type=int, default=8, help="max concurrently running scripts")
+    p.add_argument("--backoff", action="store_true", help="sleep retry backoff durations")
+    p.add_argument("--quiet", action="store_true", help="do not echo script output")
+    args = p.parse_args()
+
+    supplied = dict(kv.split("=", 1) for kv in args.supply)
+
+    def on_suspend(node, template):
+        names = [prm["name"] for prm in (template.get("outputs") or {}).get("parameters", [])]
+        if all(n in supplied for n in names):
+            print(f"[{node}] suspended, supplying {', '.join(f'{n}={supplied[n]}' for n in names)}")
+            return {n: supplied[n] for n in names}
+        return prompt_supplier(node, template)
+
+    wf = load_scenario(args.scenario).build_wf(None)
+    executor = LocalExecutor(wf, on_suspend=on_suspend, workers=args.workers, backoff=args.backoff, echo=not args.quiet)
+    report = executor.run(dict(kv.split("=", 1) for kv in args.param))
+
+    print(f"\n{'node':50s} {'template':20s} {'phase':10s} {'tries':>5s} {'time':>8s}")
+    for n in report["nodes"]:
+        print(f"{n['node']:50s} {n['template']:20s} {n['phase']:10s} {n['attempts']:5d} {n['duration_s']:7.2f}s")
+    print(f"workflow: {report['phase']} in {report['wall_s']:.2f}s")
+    sys.exit(0 if report["phase"] == "Succeeded" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Argo memoization for deterministic scenario steps.
+
+A memoized template is looked up in a ConfigMap cache before a pod is created:
+on a hit (same key, younger than max age) the node succeeds at once with the
+cached outputs. Keys combine the template name, a hash of the template body
+(source, image, command, ...) and a sha256 of the input parameter values taken
+at runtime (`{{=sprig.sha256sum(...)}}`), so editing the step or passing other
+inputs misses the cache.
+
+Declare a step memoizable in a builder:
+
+    step1 = memoizable(Script(name="step1", ...), max_age="24h")
+
+or memoize templates of an existing scenario with memoize() / the CLI. The
+workflow-controller needs create/update on ConfigMaps in the namespace (see
+infra/rbac.yaml). `--report` prints the cache hit rate per template from the
+`memoizationStatus` of finished workflows.
+
+Examples:
+  python memoize.py P3/S1/run_workflow.py --template step1 --print-yaml
+  python memoize.py P1/S1/run_workflow.py --template step1 --max-age 1h --submit
+  python memoize.py --report --prefix p3-s1-
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from build_cache import DEFAULT_HOST, DEFAULT_NAMESPACE, api_request, load_scenario, make_service
+
+DEFAULT_CACHE = "scenario-memo-cache"
+DEFAULT_MAX_AGE = "24h"
+
+
+def template_hash(template: dict) -> str:
+    """Hash of the template body; memoize settings and metadata are left out."""
+    body = {k: v for k, v in template.items() if k not in ("memoize", "metadata")}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def memo_key(template: dict) -> str:
+    """ConfigMap key expression: <name>-<template hash>[-<sha256 of input values>]."""
+    key = f"{template['name']}-{template_hash(template)}"
+    names = [p["name"] for p in (template.get("inputs") or {}).get("parameters") or []]
+    if names:
+        values = " + '\\x00' + ".join(f"inputs.parameters['{n}']" for n in names)
+        key += f"-{{{{=sprig.sha256sum({values})}}}}"
+    return key
+
+
+def memoize_spec(template: dict, max_age: str = DEFAULT_MAX_AGE, cache: str = DEFAULT_CACHE) -> dict:
+    # configMap.key is required by the schema but unused: each memo key is its own ConfigMap entry
+    return {"key": memo_key(template), "maxAge": max_age, "cache": {"configMap": {"name": cache, "key": "memoize"}}}
+
+
+def memoizable(template, max_age: str = DEFAULT_MAX_AGE, cache: str = DEFAULT_CACHE):
+    """Mark a Hera template (e.g. Script) as memoized; returns it for use inside build_wf."""
+    from hera.workflows.models import Memoize
+
+    spec = memoize_spec(template._build_template().dict(by_alias=True, exclude_none=True), max_age, cache)
+    template.memoize = Memoize.parse_obj(spec)
+    return template
+
+
+def memoize(wf, templates: list[str], max_age: str = DEFAULT_MAX_AGE, cache: str = DEFAULT_CACHE):
+    """Return a Hera Workflow with the named templates memoized."""
+    from hera.workflows import Workflow
+
+    manifest = wf.to_dict()
+    known = {t["name"] for t in manifest["spec"]["templates"]}
+    missing = set(templates) - known
+    if missing:
+        raise ValueError(f"unknown templates: {', '.join(sorted(missing))}")
+    for template in manifest["spec"]["templates"]:
+        if template["name"] in templates:
+            template["memoize"] = memoize_spec(template, max_age, cache)
+    memo_wf = Workflow.from_dict(manifest)
+    memo_wf.workflows_service = getattr(wf, "workflows_service", None)
+    return memo_wf
+
+
+def hit_rates(workflows: list[dict]) -> dict[str, dict]:
+    """templateName -> {runs, hits, hit_rate} over the memoized nodes of the given workflows."""
+    stats: dict[str, dict] = {}
+    for wf in workflows:
+        for node in ((wf.get("status") or {}).get("nodes") or {}).values():
+            memo = node.get("memoizationStatus")
+            if not memo:
+                continue
+            entry = stats.setdefault(node.get("templateName") or node.get("displayName"), {"runs": 0, "hits": 0})
+            entry["runs"] += 1
+            entry["hits"] += bool(memo.get("hit"))
+    for entry in stats.values():
+        entry["hit_rate"] = entry["hits"] / entry["runs"]
+    return stats
+
+
+def list_workflows(svc, namespace: str, prefix: str | None = None, selector: str | None = None) -> list[dict]:
+    params = {"listOptions.labelSelector": selector} if selector else None
+    items = api_request(svc, "get", f"api/v1/workflows/{namespace}", params=params).get("items") or []
+    return [wf for wf in items if not prefix or wf["metadata"]["name"].startswith(prefix)]
+
+
+def _check_max_age(value: str) -> str:
+    if not re.fullmatch(r"(\d+(\.\d+)?(ns|us|ms|s|m|h))+", value):
+        raise argparse.ArgumentTypeError(f"not a Go duration: {value}")
+    return value
+
+
+def main():
+    p = argparse.ArgumentParser(description="Memoize deterministic scenario steps / report cache hit rates")
+    p.add_argument("scenario", nargs="?", help="path to a scenario script exposing build_wf")
+    p.add_argument("--template", action="append", default=[], dest="templates", help="template to memoize (repeatable)")
+    p.add_argument("--max-age", type=_check_max_age, default=DEFAULT_MAX_AGE, help="e.g. 30m, 24h")
+    p.add_argument("--cache", default=DEFAULT_CACHE, help="ConfigMap holding the cache entries")
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--report", action="store_true", help="hit rate per template from workflows in the namespace")
+    p.add_argument("--prefix", default=None, help="--report: only workflows whose name starts with this")
+    p.add_argument("--selector", default=None, help="--report: label selector")
+    p.add_argument("--namespace", default=DEFAULT_NAMESPACE)
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+
+    if args.report:
+        stats = hit_rates(list_workflows(make_service(args.server), args.namespace, args.prefix, args.selector))
+        if not stats:
+            print("no memoized nodes found")
+        for name, s in sorted(stats.items()):
+            print(f"{name:30s} runs={s['runs']:5d} hits={s['hits']:5d} hit_rate={s['hit_rate']:.1%}")
+        return
+    if not args.scenario or not args.templates:
+        p.error("scenario and at least one --template are required unless --report is given")
+
+    svc = make_service(args.server) if args.submit else None
+    wf = memoize(load_scenario(args.scenario).build_wf(svc), args.templates, args.max_age, args.cache)
+
+    if args.print_yaml:
+        yaml_body = wf.to_yaml()
+        if not yaml_body.startswith("apiVersion:"):
+            yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+        print(yaml_body)
+    elif args.submit:
+        wf.create()
+        print(f"Submitted memoized workflow over HTTP. Host used: {svc.host}\n\n{wf.name}")
+    else:
+        p.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Route large step outputs through artifacts instead of inline parameters.
+
+Scenario steps hand results over as `value_from={"path": ...}` output
+parameters. Argo keeps those values inline in the workflow status and copies
+them into the arguments of every consuming step, so a large payload bloats the
+Workflow object (etcd limit ~1.5 MB) and slows the controller.
+
+offload_outputs() patches the Python Script templates of a workflow:
+
+- producers: after the original source, values larger than `threshold` bytes
+  are moved to /tmp/offload/<param> and exported as an optional output
+  artifact; the parameter keeps only a short reference
+  (`offloaded-artifact:<param>`). Small values stay inline, so `when`
+  conditions on flags such as `allow` keep working.
+- consumers: a step argument `{{steps.X.outputs.parameters.P}}` for an offloaded
+  P also gets the artifact (`from: {{steps.X.outputs.artifacts.offload-P}}`),
+  and the quoted `"{{inputs.parameters.N}}"` literal in the source is wrapped so
+  the real value is read from the artifact when a reference arrives.
+
+Only file output parameters are offloaded: a step's stdout (`outputs.result`)
+stays inline in the workflow object whatever its size.
+
+Artifacts are tar+gzip archived by Argo (`--compression-level`, 0 disables
+archiving). They go to the default artifact repository, or the one named by
+`--artifact-repository` in the `artifact-repositories` ConfigMap; see
+infra/minio.yaml for a local MinIO stand-in.
+
+Examples:
+  python offload.py P1/S2/run_workflow.py --threshold 1024 --print-yaml
+  python offload.py P1/S2/run_workflow.py --artifact-repository minio --submit
+"""
+import argparse
+import ast
+import copy
+import io
+import os
+import re
+import sys
+import tokenize
+
+from build_cache import DEFAULT_HOST, load_scenario, make_service
+
+DEFAULT_THRESHOLD = 64 * 1024
+OFFLOAD_MARKER = "offloaded-artifact:"
+OUT_DIR = "/tmp/offload"
+IN_DIR = "/tmp/offload-in"
+ARTIFACT_REPOSITORIES = "artifact-repositories"
+
+_OUTPUT_REF = re.compile(r"^\{\{\s*(steps|tasks)\.([^.}\s]+)\.outputs\.parameters\.([^.}\s]+)\s*\}\}$")
+
+
+def artifact_name(param: str) -> str:
+    return f"offload-{param}"
+
+
+def producer_epilogue(params: dict[str, str], threshold: int) -> str:
+    """Python appended to a producer: move outputs above threshold to the artifact paths."""
+    moves = [(name, path, f"{OUT_DIR}/{name}") for name, path in params.items()]
+    return (
+        "\n\n# --- offload large outputs (scenarios/offload.py) ---\n"
+        "import os as _os, shutil as _shutil\n"
+        f"for _name, _path, _art in {moves!r}:\n"
+        f"    if _os.path.exists(_path) and _os.path.getsize(_path) > {threshold}:\n"
+        "        _os.makedirs(_os.path.dirname(_art), exist_ok=True)\n"
+        "        _shutil.copyfile(_path, _art)\n"
+        "        with open(_path, 'w') as _f:\n"
+        f"            _f.write({OFFLOAD_MARKER!r} + _name)\n"
+    )
+
+
+def consumer_prologue() -> str:
+    return (
+        "# --- offloaded inputs (scenarios/offload.py) ---\n"
+        "def _offloaded(name, value):\n"
+        f"    if value.startswith({OFFLOAD_MARKER!r}):\n"
+        f"        with open({IN_DIR!r} + '/' + name) as f:\n"
+        "            return f.read()\n"
+        "    return value\n\n"
+    )
+
+
+def _wrap_input(source: str, name: str) -> tuple[str, int]:
+    """Wrap every string literal whose value is exactly {{inputs.parameters.N}} in _offloaded("N", ...).
+
+    Literals are found with tokenize, so any quoting works: "...", '...' and Hera's
+    json.loads(r'''{{inputs.parameters.N}}''') become json.loads(_offloaded("N", r'''...''')).
+    """
+    placeholder = re.compile(r"\{\{\s*inputs\.parameters\.%s\s*\}\}" % re.escape(name))
+    line_starts = [0]
+    for line in source.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+    spans = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type != tokenize.STRING:
+                continue
+            try:
+                value = ast.literal_eval(tok.string)
+            except (ValueError, SyntaxError):
+                continue
+            if isinstance(value, str) and placeholder.fullmatch(value.strip()):
+                spans.append((line_starts[tok.start[0] - 1] + tok.start[1], line_starts[tok.end[0] - 1] + tok.end[1]))
+    except (tokenize.TokenError, SyntaxError):
+        return source, 0
+    for start, end in reversed(spans):
+        source = f"{source[:start]}_offloaded({name!r}, {source[start:end]}){source[end:]}"
+    return source, len(spans)
+
+
+def _archive(compression_level: int) -> dict:
+    return {"tar": {"compressionLevel": compression_level}} if compression_level else {"none": {}}
+
+
+def _is_python(template: dict) -> bool:
+    return "script" in template and (template["script"].get("command") or ["python"])[0].startswith("python")
+
+
+def offload_outputs(wf, threshold: int = DEFAULT_THRESHOLD, templates: list[str] | None = None,
+                    compression_level: int = 6, repository: str | None = None, warn=None):
+    """Return a Hera Workflow whose file outputs above `threshold` bytes travel as artifacts.
+
+    `templates` limits the producers (default: every Python Script with file
+    output parameters). `warn` receives messages about references that cannot
+    follow the artifact (e.g. `when` or template outputs reading the value).
+    """
+    from hera.workflows import Workflow
+
+    warn = warn or (lambda msg: print(f"offload: {msg}", file=sys.stderr))
+    manifest = copy.deepcopy(wf.to_dict())
+    by_name = {t["name"]: t for t in manifest["spec"]["templates"]}
+
+    # producers: template name -> {param: path}
+    offloaded = {}
+    for template in by_name.values():
+        if not _is_python(template) or (templates is not None and template["name"] not in templates):
+            continue
+        params = {p["name"]: p["valueFrom"]["path"]
+                  for p in (template.get("outputs") or {}).get("parameters") or []
+                  if "path" in (p.get("valueFrom") or {})}
+        if not params:
+            continue
+        offloaded[template["name"]] = params
+        template["script"]["source"] += producer_epilogue(params, threshold)
+        template["outputs"].setdefault("artifacts", []).extend(
+            {"name": artifact_name(name), "path": f"{OUT_DIR}/{name}", "optional": True,
+             "archive": _archive(compression_level)}
+            for name in params
+        )
+
+    # consumers: steps/tasks arguments that pass an offloaded parameter on
+    consumers: dict[str, set[str]] = {}
+    for template in by_name.values():
+        steps = [s for group in template.get("steps") or [] for s in group] + (template.get("dag") or {}).get("tasks", [])
+        kind = "steps" if "steps" in template else "tasks"
+        producers = {s["name"]: s.get("template") for s in steps}
+        for step in steps:
+            args = step.get("arguments") or {}
+            for param in args.get("parameters") or []:
+                m = _OUTPUT_REF.match(str(param.get("value", "")))
+                if not m or m.group(1) != kind or m.group(3) not in offloaded.get(producers.get(m.group(2)), {}):
+                    continue
+                target = by_name.get(step.get("template"))
+                if target is None or not _is_python(target):
+                    warn(f"{template['name']}/{step['name']}: {param['name']} is not read by a Python script, "
+                         "large values arrive as a reference")
+                    continue
+                args.setdefault("artifacts", []).append({
+                    "name": artifact_name(param["name"]),
+                    "from": f"{{{{{kind}.{m.group(2)}.outputs.artifacts.{artifact_name(m.group(3))}}}}}",
+                    "optional": True,
+                })
+                consumers.setdefault(target["name"], set()).add(param["name"])
+        for text in _other_refs(template, steps):
+            for ref_kind, step_name, param in re.findall(r"\{\{\s*(steps|tasks)\.([^.}\s]+)\.outputs\.parameters\.([^.}\s]+)\s*\}\}", text):
+                if param in offloaded.get(producers.get(step_name), {}):
+                    warn(f"{template['name']}: {{{{{ref_kind}.{step_name}.outputs.parameters.{param}}}}} is used "
+                         "outside step arguments and sees the reference when the value is offloaded")
+
+    for name, inputs in consumers.items():
+        template = by_name[name]
+        original = source = template["script"]["source"]
+        for input_name in sorted(inputs):
+            source, count = _wrap_input(source, input_name)
+            if not count:
+                warn(f"{name}: no quoted {{{{inputs.parameters.{input_name}}}}} literal to resolve")
+            template.setdefault("inputs", {}).setdefault("artifacts", []).append(
+                {"name": artifact_name(input_name), "path": f"{IN_DIR}/{input_name}", "optional": True}
+            )
+        source = consumer_prologue() + source
+        try:
+            compile(source, f"<{name}>", "exec")
+        except SyntaxError as e:
+            warn(f"{name}: rewritten source does not compile ({e.msg}, line {e.lineno}); left unchanged, "
+                 "large values arrive as a reference")
+            source = original
+        template["script"]["source"] = source
+
+    if repository:
+        manifest["spec"]["artifactRepositoryRef"] = {"configMap": ARTIFACT_REPOSITORIES, "key": repository}
+
+    offload_wf = Workflow.from_dict(manifest)
+    offload_wf.workflows_service = getattr(wf, "workflows_service", None)
+    return offload_wf
+
+
+def _other_refs(template: dict, steps: list[dict]):
+    """Strings outside step argument parameters: when, loops, template outputs."""
+    for step in steps:
+        for key in ("when", "withParam"):
+            if step.get(key):
+                yield step[key]
+    for param in (template.get("outputs") or {}).get("parameters") or []:
+        value_from = param.get("valueFrom") or {}
+        if value_from.get("parameter"):
+            yield value_from["parameter"]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render/submit a scenario with large outputs offloaded to artifacts")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="bytes kept inline (default %(default)s)")
+    p.add_argument("--template", action="append", default=None, dest="templates",
+                   help="offload only these producer templates (default: every Python Script)")
+    p.add_argument("--compression-level", type=int, default=6, help="gzip level of the artifact archive, 0 = no archive")
+    p.add_argument("--artifact-repository", default=None,
+                   help=f"key in the {ARTIFACT_REPOSITORIES} ConfigMap (default: controller default repository)")
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+
+    svc = make_service(args.server) if args.submit else None
+    wf = offload_outputs(load_scenario(args.scenario).build_wf(svc), args.threshold, args.templates,
+                         args.compression_level, args.artifact_repository)
+
+    if args.print_yaml:
+        yaml_body = wf.to_yaml()
+        if not yaml_body.startswith("apiVersion:"):
+            yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+        print(yaml_body)
+    elif args.submit:
+        wf.create()
+        print(f"Submitted workflow with offloaded outputs over HTTP. Host used: {svc.host}\n\n{wf.name}")
+    else:
+        p.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Run tiny Script steps on the pooled script-runner instead of python:3.9 pods.
+
+pool_scripts() replaces selected Script templates with Argo HTTP templates that
+POST their source to services/script-runner (`/run`). The runner queues the task
+in Redis for a pool of long-lived workers (the service-b -> service-c pattern)
+and answers with the content of the script's output file, or its stdout when it
+has no output. HTTP templates run in the Argo agent, so no pod is started per step.
+
+The response body becomes the step's `outputs.result`; references to the
+replaced output parameter ({{steps.X.outputs.parameters.P}}, also tasks.X and
+Steps-level valueFrom.parameter) are rewritten to {{steps.X.outputs.result}}.
+
+By default a Script is pooled when it is "tiny": no retryStrategy, no timeout
+({{retries}} and per-attempt deadlines need a pod) and at most one output
+parameter read from a file path. Input values are substituted by Argo into
+the JSON body, so they must not contain double quotes or backslashes.
+
+Examples:
+  python pooled.py P1/S2/run_workflow.py --print-yaml
+  python pooled.py P1/S2/run_workflow.py --submit --url http://script-runner.otel-demo.svc:8000/run
+"""
+import argparse
+import json
+import os
+import re
+
+from build_cache import DEFAULT_HOST, load_scenario, make_service
+
+DEFAULT_RUNNER_URL = "http://script-runner.otel-demo.svc:8000/run"
+DEFAULT_SCRIPT_TIMEOUT = 60
+# Secret (name, key) in the workflow's namespace holding the runner's SCRIPT_RUNNER_TOKEN
+DEFAULT_TOKEN_SECRET = ("script-runner-token", "token")
+
+
+def is_tiny(template: dict) -> bool:
+    if "script" not in template or template.get("retryStrategy") or template.get("timeout"):
+        return False
+    outputs = (template.get("outputs") or {})
+    params = outputs.get("parameters") or []
+    if outputs.get("artifacts") or len(params) > 1:
+        return False
+    return all("path" in (p.get("valueFrom") or {}) for p in params)
+
+
+def http_template(template: dict, url: str, timeout: int = DEFAULT_SCRIPT_TIMEOUT,
+                  token_secret: tuple[str, str] = DEFAULT_TOKEN_SECRET) -> dict:
+    """Rendered Script template (dict) -> HTTP template calling the script runner."""
+    params = (template.get("outputs") or {}).get("parameters") or []
+    body = {"source": template["script"]["source"], "timeout": timeout}
+    if params:
+        body["output"] = params[0]["valueFrom"]["path"]
+    http = {
+        "url": url,
+        "method": "POST",
+        "headers": [
+            {"name": "Content-Type", "value": "application/json"},
+            {"name": "X-Script-Token",
+             "valueFrom": {"secretKeyRef": {"name": token_secret[0], "key": token_secret[1]}}},
+        ],
+        "body": json.dumps(body),
+        "successCondition": "response.statusCode == 200",
+        "timeoutSeconds": timeout + 30,
+    }
+    pooled = {"name": template["name"], "http": http}
+    if template.get("inputs"):
+        pooled["inputs"] = template["inputs"]
+    return pooled
+
+
+def _rewrite_refs(value, refs: dict[tuple[str, str], str]):
+    """Rewrite {{steps|tasks.<step>.outputs.parameters.<param>}} for pooled steps to .outputs.result."""
+    if isinstance(value, str):
+        def sub(m):
+            kind, step, param = m.group(1), m.group(2), m.group(3)
+            if refs.get((step, kind)) == param:
+                return f"{{{{{kind}.{step}.outputs.result}}}}"
+            return m.group(0)
+        return re.sub(r"\{\{\s*(steps|tasks)\.([^.}\s]+)\.outputs\.parameters\.([^.}\s]+)\s*\}\}", sub, value)
+    if isinstance(value, dict):
+        return {k: _rewrite_refs(v, refs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rewrite_refs(v, refs) for v in value]
+    return value
+
+
+def pool_scripts(wf, url: str = DEFAULT_RUNNER_URL, templates: list[str] | None = None,
+                 timeout: int = DEFAULT_SCRIPT_TIMEOUT, token_secret: tuple[str, str] = DEFAULT_TOKEN_SECRET):
+    """Return a Hera Workflow with the selected (default: tiny) Script templates served by the runner."""
+    from hera.workflows import Workflow
+
+    manifest = wf.to_dict()
+    all_templates = manifest["spec"]["templates"]
+    pooled = {}
+    for i, template in enumerate(all_templates):
+        selected = template["name"] in templates if templates is not None else is_tiny(template)
+        if selected and "script" in template:
+            params = (template.get("outputs") or {}).get("parameters") or []
+            pooled[template["name"]] = params[0]["name"] if params else None
+            all_templates[i] = http_template(template, url, timeout, token_secret)
+
+    for i, template in enumerate(all_templates):
+        refs = {}
+        for step in [s for group in template.get("steps") or [] for s in group] + (template.get("dag") or {}).get("tasks", []):
+            if step.get("template") in pooled and pooled[step["template"]]:
+                kind = "steps" if "steps" in template else "tasks"
+                refs[(step["name"], kind)] = pooled[step["template"]]
+        if refs:
+            all_templates[i] = _rewrite_refs(template, refs)
+
+    pooled_wf = Workflow.from_dict(manifest)
+    pooled_wf.workflows_service = getattr(wf, "workflows_service", None)
+    return pooled_wf
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render/submit a scenario with tiny scripts served by the script runner")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("--url", default=os.getenv("SCRIPT_RUNNER_URL", DEFAULT_RUNNER_URL))
+    p.add_argument("--template", action="append", default=None, dest="templates",
+                   help="pool only these Script templates (default: every tiny one)")
+    p.add_argument("--timeout", type=int, default=DEFAULT_SCRIPT_TIMEOUT, help="per-script timeout in seconds")
+    p.add_argument("--token-secret", default=":".join(DEFAULT_TOKEN_SECRET), metavar="NAME:KEY",
+                   help="Secret with the runner's SCRIPT_RUNNER_TOKEN, sent as X-Script-Token")
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+
+    svc = make_service(args.server) if args.submit else None
+    secret_name, _, secret_key = args.token_secret.partition(":")
+    wf = pool_scripts(load_scenario(args.scenario).build_wf(svc), args.url, args.templates, args.timeout,
+                      (secret_name, secret_key or DEFAULT_TOKEN_SECRET[1]))
+
+    if args.print_yaml:
+        yaml_body = wf.to_yaml()
+        if not yaml_body.startswith("apiVersion:"):
+            yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+        print(yaml_body)
+    elif args.submit:
+        wf.create()
+        print(f"Submitted pooled workflow over HTTP. Host used: {svc.host}\n\n{wf.name}")
+    else:
+        p.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Regenerate the committed rendered.yaml of every scenario in one process.
+
+Each scenario directory (P*/S*) keeps a `rendered.yaml` equal to the output of
+its script's `--print-yaml`. This renders all of them in a single interpreter,
+so Hera and pydantic are imported once, and only scenarios whose inputs
+changed are rendered again: the state file (`.render_state.json`) records the
+hash of the script source plus the Hera version, and of the written YAML (so a
+hand-edited render is checked again). Files are written only when the rendered
+manifest actually differs, and the difference is reported per field
+(`spec.templates[gate].outputs.parameters[allow]: ...`) instead of as a text diff.
+
+The script rendered for a directory is `run_workflow.py`, or the only script
+defining build_wf when there is no run_workflow.py.
+
+Examples:
+  python render_all.py            # render changed scenarios, write changed files
+  python render_all.py --check    # CI: exit 1 when a rendered.yaml is stale
+  python render_all.py --force P3 # ignore the state for scenarios under P3/
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from build_cache import load_scenario
+from runner import discover
+
+SCENARIOS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(SCENARIOS_DIR, ".render_state.json")
+RENDERED = "rendered.yaml"
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def input_hash(script: str) -> str:
+    """Hash of the script and of the Hera version it is rendered with."""
+    from importlib.metadata import version
+
+    with open(script, "rb") as f:
+        return _sha(f.read() + version("hera").encode())
+
+
+def render(script: str) -> str:
+    """Same output as `<script> --print-yaml`."""
+    yaml_body = load_scenario(script).build_wf(None).to_yaml()
+    if not yaml_body.startswith("apiVersion:"):
+        yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+    return yaml_body + "\n"
+
+
+def semantic_diff(old, new, path: str = "") -> list[str]:
+    """Field-level differences of two parsed manifests; list items with a name are matched by name."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        out = []
+        for key in sorted(set(old) | set(new), key=str):
+            sub = f"{path}.{key}" if path else str(key)
+            if key not in old:
+                out.append(f"+ {sub}: {_short(new[key])}")
+            elif key not in new:
+                out.append(f"- {sub}: {_short(old[key])}")
+            else:
+                out += semantic_diff(old[key], new[key], sub)
+        return out
+    if isinstance(old, list) and isinstance(new, list) and _named(old) and _named(new) and _unique(old, new):
+        old_by, new_by = {i["name"]: i for i in old}, {i["name"]: i for i in new}
+        out = []
+        for name in list(old_by) + [n for n in new_by if n not in old_by]:
+            sub = f"{path}[{name}]"
+            if name not in old_by:
+                out.append(f"+ {sub}: {_short(new_by[name])}")
+            elif name not in new_by:
+                out.append(f"- {sub}: {_short(old_by[name])}")
+            else:
+                out += semantic_diff(old_by[name], new_by[name], sub)
+        return out
+    if isinstance(old, list) and isinstance(new, list):
+        return _list_diff(old, new, path)
+    return [] if old == new else [f"~ {path}: {_short(old)} -> {_short(new)}"]
+
+
+def _named(items: list) -> bool:
+    return all(isinstance(i, dict) and "name" in i for i in items)
+
+
+def _unique(*lists) -> bool:
+    return all(len({i["name"] for i in items}) == len(items) for items in lists)
+
+
+def _list_diff(old: list, new: list, path: str) -> list[str]:
+    if len(old) != len(new):
+        return [f"~ {path}: {len(old)} -> {len(new)} items"]
+    return [line for i, (a, b) in enumerate(zip(old, new)) for line in semantic_diff(a, b, f"{path}[{i}]")]
+
+
+def _short(value, limit: int = 80) -> str:
+    text = json.dumps(value) if not isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def load_state() -> dict:
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render every scenario's rendered.yaml, skipping unchanged ones")
+    p.add_argument("only", nargs="*", help="limit to these scenario directories or prefixes (e.g. P3 or P1/S1)")
+    p.add_argument("--check", action="store_true", help="do not write; exit 1 if any rendered.yaml is stale")
+    p.add_argument("--force", action="store_true", help="render even when the source hash is unchanged")
+    p.add_argument("--quiet", action="store_true", help="do not print field-level diffs")
+    args = p.parse_args()
+
+    import yaml
+
+    state = {} if args.force else load_state()
+    new_state = load_state()
+    stale, skipped, written = [], 0, 0
+    for rel, script in discover(SCENARIOS_DIR, args.only).items():
+        directory = os.path.join(SCENARIOS_DIR, rel)
+        if not os.path.isdir(directory):
+            continue  # P*/S*/<stem>: not the script the directory is rendered from
+        target = os.path.join(directory, RENDERED)
+        current = open(target, "rb").read() if os.path.exists(target) else None
+        key = input_hash(script)
+        entry = state.get(rel) or {}
+        if entry.get("input") == key and current is not None and entry.get("output") == _sha(current):
+            skipped += 1
+            continue
+
+        try:
+            rendered = render(script)
+        except Exception as e:
+            print(f"{rel}: render failed: {e}", file=sys.stderr)
+            stale.append(rel)
+            continue
+        if current is not None and yaml.safe_load(current) == yaml.safe_load(rendered):
+            new_state[rel] = {"script": os.path.basename(script), "input": key, "output": _sha(current)}
+            continue
+
+        stale.append(rel)
+        diff = semantic_diff(yaml.safe_load(current), yaml.safe_load(rendered)) if current else [f"+ {RENDERED} (new file)"]
+        print(f"{rel}: {'stale' if args.check else 'updated'} ({len(diff)} field(s) from {os.path.basename(script)})")
+        if not args.quiet:
+            for line in diff:
+                print(f"    {line}")
+        if not args.check:
+            with open(target, "w") as f:
+                f.write(rendered)
+            written += 1
+            new_state[rel] = {"script": os.path.basename(script), "input": key, "output": _sha(rendered.encode())}
+
+    if not args.check:
+        save_state(new_state)
+    print(f"{skipped} unchanged, {written} written, {len(stale) - written} stale")
+    if args.check and stale:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
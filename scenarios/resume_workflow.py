@@ -1,11 +1,6 @@
 #!/usr/bin/env python3
 # pip install "hera-workflows>=5"
 import argparse
-from hera.workflows import WorkflowsService
-from hera.workflows.models import (
-    WorkflowResumeRequest,
-    WorkflowSetRequest,
-)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -42,6 +37,13 @@ Example:
 
     args = parser.parse_args()
 
+    # imported after argument parsing: --help and usage errors skip the Hera import
+    from hera.workflows import WorkflowsService
+    from hera.workflows.models import (
+        WorkflowResumeRequest,
+        WorkflowSetRequest,
+    )
+
     ws = WorkflowsService(
         host=args.server,
         namespace=args.namespace,
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""Offline simulator for retryStrategy / timeout settings.
+
+Takes a Hera workflow (or a scenario script exposing build_wf), extracts every
+template's retryStrategy and timeout and replays a scripted sequence of attempt
+outcomes against them: retryPolicy, the `expression` (lastRetry.exitCode /
+status / duration / message), backoff and the per-attempt timeout.
+Reports attempt count, final phase and expected wall time per template and for
+the entrypoint steps, without running a single pod.
+
+Outcome syntax (per template, comma separated, last outcome repeats):
+  0          exit 0 after --duration seconds
+  100@5      exit 100 after 5s
+  timeout    attempt exceeds the template timeout (deadline message)
+  deleted    pod deleted (Error phase)
+
+Examples:
+  python retry_sim.py P3/S2/run_workflow.py --outcomes step2=100,100,100,0@5
+  python retry_sim.py P3/S1/run_workflow.py --outcomes step2=timeout,timeout,0@10 --json
+"""
+import argparse
+import json
+import operator
+import re
+import sys
+
+from build_cache import load_scenario
+
+DEADLINE_MESSAGE = "Pod was active on the node longer than the specified deadline"
+DELETED_MESSAGE = "pod deleted"
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value) -> float | None:
+    """Argo duration string ("1s", "2m", "1h30m", "100") to seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if re.fullmatch(r"\d+(\.\d+)?", value):
+        return float(value)
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise ValueError(f"invalid duration: {value!r}")
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+# --- expression evaluation -------------------------------------------------
+# A small subset of expr-lang, enough for the retry expressions used here:
+# literals, lastRetry.<field>, asInt/asFloat/string, ==, !=, <, <=, >, >=,
+# matches, contains, !, not, &&, ||, and, or, parentheses.
+# &&/|| short-circuit like expr-lang: the right side is parsed but not evaluated.
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<num>\d+(?:\.\d+)?)|(?P<str>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<op>&&|\|\||==|!=|<=|>=|<|>|!|\(|\)|,)|(?P<name>[A-Za-z_][A-Za-z0-9_.]*))"
+)
+_ORDERING = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+_FUNCS = {"asInt": lambda v: int(float(v)), "asFloat": float, "string": str}
+_NUMBER = re.compile(r"-?\d+(\.\d+)?")
+
+
+class ExpressionError(ValueError):
+    """An expression that cannot be parsed or evaluated (unknown name, type mismatch, bad regex)."""
+
+
+def _coerce(lhs, rhs):
+    # lastRetry.exitCode/duration are strings ("1", "5"); compared with a number they count as that number
+    def number(v, other):
+        if isinstance(v, str) and isinstance(other, (int, float)) and not isinstance(other, bool) and _NUMBER.fullmatch(v):
+            return float(v) if "." in v else int(v)
+        return v
+    return number(lhs, rhs), number(rhs, lhs)
+
+
+def _tokenize(expr: str) -> list[tuple[str, str]]:
+    tokens, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"cannot parse expression at {expr[pos:]!r}")
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+        while pos < len(expr) and expr[pos].isspace():
+            pos += 1
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expr: str, env: dict, strict: bool = True):
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+        self.env = env
+        self.strict = strict
+        self.skipping = 0  # > 0 while parsing the short-circuited side of &&/||
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def expect(self, value):
+        if self.take()[1] != value:
+            raise ValueError(f"expected {value!r}")
+
+    def parse(self):
+        value = self.or_()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected token {self.peek()[1]!r}")
+        return value
+
+    def or_(self):
+        value = self.and_()
+        while self.peek()[1] in ("||", "or"):
+            self.take()
+            value = bool(value)
+            self.skipping += value
+            rhs = self.and_()
+            self.skipping -= value
+            value = value or bool(rhs)
+        return value
+
+    def and_(self):
+        value = self.not_()
+        while self.peek()[1] in ("&&", "and"):
+            self.take()
+            value = bool(value)
+            self.skipping += not value
+            rhs = self.not_()
+            self.skipping -= not value
+            value = value and bool(rhs)
+        return value
+
+    def not_(self):
+        if self.peek()[1] in ("!", "not"):
+            self.take()
+            return not self.not_()
+        return self.comparison()
+
+    def comparison(self):
+        lhs = self.atom()
+        op = self.peek()[1]
+        if op in ("==", "!=", "<", "<=", ">", ">=", "matches", "contains"):
+            self.take()
+            rhs = self.atom()
+            if self.skipping:
+                return None
+            lhs, rhs = _coerce(lhs, rhs)
+            if op == "==":
+                return lhs == rhs
+            if op == "!=":
+                return lhs != rhs
+            if op == "matches":
+                return re.search(str(rhs), str(lhs)) is not None
+            if op == "contains":
+                return str(rhs) in str(lhs)
+            return _ORDERING[op](lhs, rhs)
+        return lhs
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == "num":
+            return float(value) if "." in value else int(value)
+        if kind == "str":
+            return value[1:-1].encode().decode("unicode_escape")
+        if value == "(":
+            inner = self.or_()
+            self.expect(")")
+            return inner
+        if kind == "name":
+            if value in ("true", "false"):
+                return value == "true"
+            if self.peek()[1] == "(":
+                self.take()
+                arg = self.or_()
+                self.expect(")")
+                if value not in _FUNCS:
+                    raise ValueError(f"unknown function {value!r}")
+                return None if self.skipping else _FUNCS[value](arg)
+            if value not in self.env:
+                if self.skipping:
+                    return None
+                if not self.strict:
+                    return value  # bare word after {{...}} substitution, e.g. `Hello == Hello`
+                raise ValueError(f"unknown variable {value!r}")
+            return self.env[value]
+        raise ValueError(f"unexpected token {value!r}")
+
+
+def _run(expression: str, env: dict, strict: bool) -> bool:
+    try:
+        return bool(_Parser(expression, env, strict).parse())
+    except (ValueError, TypeError, re.error) as e:
+        raise ExpressionError(f"{expression!r}: {e}") from None
+
+
+def evaluate(expression: str, last_retry: dict) -> bool:
+    """Evaluate a retryStrategy expression; ExpressionError when it cannot be evaluated."""
+    return _run(expression, {f"lastRetry.{k}": v for k, v in last_retry.items()}, strict=True)
+
+
+def evaluate_when(expression: str) -> bool:
+    """Evaluate a step `when` condition whose {{...}} references are already substituted."""
+    return _run(expression, {}, strict=False)
+
+
+# --- simulation ------------------------------------------------------------
+
+def parse_outcome(token: str, default_duration: float) -> dict:
+    token = token.strip()
+    if token == "timeout":
+        return {"kind": "timeout"}
+    if token == "deleted":
+        return {"kind": "deleted", "duration": default_duration}
+    code, _, duration = token.partition("@")
+    return {"kind": "exit", "exit_code": int(code), "duration": float(duration) if duration else default_duration}
+
+
+def policy_allows(policy: str, phase: str) -> bool:
+    if policy == "Always":
+        return True
+    if policy == "OnError":
+        return phase == "Error"
+    if policy == "OnTransientError":
+        return False  # transient errors are k8s-level conditions, not simulated
+    return phase == "Failed"  # OnFailure
+
+
+def simulate_template(template: dict, outcomes: list[dict], default_duration: float = 1.0) -> dict:
+    """Replay outcomes against one template's retryStrategy and timeout (no outcomes: succeed)."""
+    outcomes = outcomes or [{"kind": "exit", "exit_code": 0, "duration": default_duration}]
+    strategy = template.get("retryStrategy") or {}
+    timeout = parse_duration(template.get("timeout"))
+    limit = int(strategy.get("limit", 0)) if strategy else 0
+    expression = strategy.get("expression")
+    # Argo defaults retryPolicy to OnFailure; with only an expression set every phase is considered.
+    policy = strategy.get("retryPolicy") or ("Always" if expression else "OnFailure")
+    backoff = strategy.get("backoff") or {}
+    base_delay = parse_duration(backoff.get("duration")) or 0
+    factor = float(backoff.get("factor", 1) or 1)
+    max_duration = parse_duration(backoff.get("maxDuration"))
+
+    elapsed, attempts, timeline = 0.0, [], []
+    phase, reason = "Failed", ""
+    for attempt in range(limit + 1):
+        outcome = outcomes[min(attempt, len(outcomes) - 1)]
+        if outcome["kind"] == "timeout" or (timeout and outcome.get("duration", 0) > timeout):
+            duration = timeout if timeout else 0
+            last = {"exitCode": "-1", "status": "Failed", "duration": str(int(duration)), "message": DEADLINE_MESSAGE}
+        elif outcome["kind"] == "deleted":
+            duration = outcome["duration"]
+            last = {"exitCode": "-1", "status": "Error", "duration": str(int(duration)), "message": DELETED_MESSAGE}
+        else:
+            duration = outcome["duration"]
+            code = outcome["exit_code"]
+            status = "Succeeded" if code == 0 else "Failed"
+            last = {"exitCode": str(code), "status": status, "duration": str(int(duration)), "message": ""}
+        timeline.append({"attempt": attempt + 1, "start_s": elapsed, "duration_s": duration, **last})
+        elapsed += duration
+        attempts.append(last)
+
+        if last["status"] == "Succeeded":
+            phase, reason = "Succeeded", ""
+            break
+        phase = last["status"]
+        if attempt == limit:
+            reason = "retry limit reached"
+            break
+        if not policy_allows(policy, last["status"]):
+            reason = f"retryPolicy {policy} does not retry {last['status']}"
+            break
+        try:
+            retry = not expression or evaluate(expression, last)
+        except ExpressionError as e:
+            # Argo errors the node when the retry expression cannot be evaluated
+            reason = f"expression error: {e}"
+            break
+        if not retry:
+            reason = "expression evaluated to false"
+            break
+        delay = base_delay * factor ** attempt
+        if max_duration is not None and elapsed + delay > max_duration:
+            reason = "backoff maxDuration exceeded"
+            break
+        timeline[-1]["backoff_s"] = delay
+        elapsed += delay
+
+    return {
+        "template": template["name"],
+        "phase": phase,
+        "attempts": len(attempts),
+        "wall_s": elapsed,
+        "reason": reason,
+        "timeline": timeline,
+    }
+
+
+def simulate(wf, outcomes: dict[str, list[dict]], suspend_s: float = 0.0, default_duration: float = 1.0) -> dict:
+    """Simulate the entrypoint of a Hera Workflow (or its to_dict()) with scripted outcomes per template.
+
+    Steps groups run sequentially, parallel steps of a group take the slowest branch;
+    `when` conditions are not evaluated, every step is assumed to run.
+    """
+    manifest = wf if isinstance(wf, dict) else wf.to_dict()
+    templates = {t["name"]: t for t in manifest["spec"]["templates"]}
+    results: list[dict] = []
+
+    def run(name: str) -> tuple[str, float]:
+        template = templates[name]
+        if "steps" in template or "dag" in template:
+            groups = template.get("steps") or [[task] for task in template["dag"]["tasks"]]
+            total = 0.0
+            for group in groups:
+                group_wall, group_phase = 0.0, "Succeeded"
+                for step in group:
+                    phase, wall = run(step["template"])
+                    group_wall = max(group_wall, wall)
+                    if phase != "Succeeded":
+                        group_phase = phase
+                total += group_wall
+                if group_phase != "Succeeded":
+                    return group_phase, total
+            return "Succeeded", total
+        if "suspend" in template:
+            return "Succeeded", suspend_s
+        result = simulate_template(template, outcomes.get(name, []), default_duration)
+        results.append(result)
+        return result["phase"], result["wall_s"]
+
+    phase, wall = run(manifest["spec"]["entrypoint"])
+    return {"phase": phase, "wall_s": wall, "templates": results}
+
+
+def retry_strategies(wf) -> dict[str, dict]:
+    """Template name -> {retryStrategy, timeout} for every template that declares one."""
+    manifest = wf if isinstance(wf, dict) else wf.to_dict()
+    return {
+        t["name"]: {"retryStrategy": t.get("retryStrategy"), "timeout": t.get("timeout")}
+        for t in manifest["spec"]["templates"]
+        if t.get("retryStrategy") or t.get("timeout")
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Simulate retry strategies of a scenario offline")
+    p.add_argument("scenario", help="path to a scenario script exposing build_wf")
+    p.add_argument("--outcomes", action="append", default=[], metavar="TEMPLATE=OUTCOME,...")
+    p.add_argument("--duration", type=float, default=1.0, help="default attempt duration in seconds")
+    p.add_argument("--suspend", type=float, default=0.0, help="seconds spent in suspend templates")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args()
+
+    outcomes = {}
+    for spec in args.outcomes:
+        name, _, tokens = spec.partition("=")
+        outcomes[name] = [parse_outcome(t, args.duration) for t in tokens.split(",")]
+
+    wf = load_scenario(args.scenario).build_wf(None)
+    report = simulate(wf, outcomes, args.suspend, args.duration)
+    report["strategies"] = retry_strategies(wf)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    for t in report["templates"]:
+        print(f"{t['template']:20s} {t['phase']:10s} attempts={t['attempts']:<3d} wall={t['wall_s']:.1f}s {t['reason']}")
+        for a in t["timeline"]:
+            backoff = f" +{a['backoff_s']:.1f}s backoff" if "backoff_s" in a else ""
+            print(f"  #{a['attempt']} at {a['start_s']:7.1f}s ran {a['duration_s']:.1f}s "
+                  f"exit={a['exitCode']} {a['status']}{backoff} {a['message']}")
+    print(f"workflow: {report['phase']} in {report['wall_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Common runner for the scenario workflows.
+
+Every P*/S* script only defines build_wf(); its command line (--print-yaml,
+--submit, --template, ...) is scenario_main() below, and this module can drive
+any scenario by id (`P3/S1`, `P1/S1/run_workflow_func`) or path:
+
+  list          discovered scenarios
+  render        print the manifest
+  submit        submit once (raw JSON from the compiled spec, or via a template)
+  bulk-submit   submit N copies concurrently over one pooled session, optionally wait
+  wait          wait for workflows by name and report their phases
+  benchmark     benchmark.py with the same scenario ids
+
+Examples:
+  python runner.py list
+  python runner.py render P3/S1
+  python runner.py bulk-submit P3/S2 -n 50 --concurrency 10 --template --wait
+  python runner.py wait p3-s2-retries-wf-abcde p3-s2-retries-wf-fghij
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from build_cache import (
+    DEFAULT_HOST,
+    DEFAULT_NAMESPACE,
+    BuildCache,
+    default_template_name,
+    load_scenario,
+    make_service,
+    submit_via_template,
+)
+
+SCENARIOS_DIR = os.path.dirname(os.path.abspath(__file__))
+SUBMIT_HINT = "Ensure argo-server started with --secure=false and is reachable."
+
+
+def discover(root: str = SCENARIOS_DIR, only: list[str] | None = None) -> dict[str, str]:
+    """Scenario id -> script. run_workflow.py (or a directory's only script) is `P*/S*`, others `P*/S*/<stem>`.
+
+    The single source of scenarios for this runner and render_all.py; `only` keeps directories under the given prefixes.
+    """
+    found = {}
+    for directory in sorted(glob.glob(os.path.join(root, "P*", "S*"))):
+        rel = os.path.relpath(directory, root)
+        if only and not any(rel == o.rstrip("/") or rel.startswith(o.rstrip("/") + os.sep) for o in only):
+            continue
+        scripts = []
+        for script in sorted(glob.glob(os.path.join(directory, "*.py"))):
+            with open(script) as f:
+                if re.search(r"^def build_wf\(", f.read(), re.M):
+                    scripts.append(script)
+        primary = os.path.join(directory, "run_workflow.py")
+        primary = primary if primary in scripts else (scripts[0] if len(scripts) == 1 else None)
+        for script in scripts:
+            stem = os.path.splitext(os.path.basename(script))[0]
+            found[rel if script == primary else f"{rel}/{stem}"] = script
+    return found
+
+
+def resolve(scenario: str) -> str:
+    if os.path.isfile(scenario):
+        return scenario
+    scenarios = discover()
+    key = scenario.rstrip("/").removesuffix(".py")
+    if key not in scenarios:
+        raise SystemExit(f"unknown scenario {scenario!r}; known: {', '.join(scenarios)}")
+    return scenarios[key]
+
+
+def to_yaml(wf) -> str:
+    yaml_body = wf.to_yaml()
+    if not yaml_body.startswith("apiVersion:"):
+        yaml_body = "apiVersion: argoproj.io/v1alpha1\n" + yaml_body
+    return yaml_body
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_template_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--template", action="store_true", help="publish as WorkflowTemplate, submit by workflowTemplateRef")
+    p.add_argument("--cluster-template", action="store_true", help="same as --template with a ClusterWorkflowTemplate")
+    p.add_argument("--template-name", default=None, help="defaults to a name derived from the scenario path")
+
+
+def scenario_main(path: str, build_wf, argv: list[str] | None = None) -> None:
+    """Command line of a scenario script: --print-yaml or --submit [--template | --cluster-template]."""
+    p = argparse.ArgumentParser()
+    p.add_argument("--print-yaml", action="store_true")
+    p.add_argument("--submit", action="store_true")
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    add_template_arguments(p)
+    args = p.parse_args(argv)
+
+    if not (args.print_yaml or args.submit):
+        p.print_help()
+        return
+
+    # Hera is imported by build_wf/make_service only, so --help stays fast
+    svc = make_service(args.server) if args.submit else None
+    wf = build_wf(svc)
+
+    if args.print_yaml:
+        print(to_yaml(wf))
+        return
+
+    try:
+        if args.template or args.cluster_template:
+            wf.name = submit_via_template(wf, svc, path, args.template_name, cluster=args.cluster_template)
+        else:
+            wf.create()
+        print(f"Submitted workflow over HTTP. Host used: {svc.host}\n\n{wf.name}")
+    except Exception as e:
+        print(f"Submission failed (HTTP mode): {e}\n{SUBMIT_HINT}")
+
+
+def submit_many(args) -> list[str]:
+    """Compile once, then submit args.count copies with args.concurrency parallel requests on one session."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = resolve(args.scenario)
+    parameters = dict(kv.split("=", 1) for kv in args.param)
+    compiled = BuildCache(args.cache_dir).compile(load_scenario(path).build_wf)
+    svc = make_service(args.server, pool_size=args.concurrency)
+
+    template_name, cluster = None, args.cluster_template
+    if args.template or cluster:
+        template_name = compiled.register_template(svc, args.template_name or default_template_name(path), cluster)
+
+    def one(_):
+        if template_name:
+            return compiled.submit_from_template(svc, template_name, parameters=parameters, cluster=cluster)
+        return compiled.submit(svc, parameters=parameters)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        names = list(pool.map(one, range(args.count)))
+    elapsed = time.perf_counter() - start
+    for name in names:
+        print(name)
+    print(f"Submitted {len(names)} workflow(s) in {elapsed:.3f}s ({elapsed / len(names) * 1000:.1f} ms each)",
+          file=sys.stderr)
+    if getattr(args, "wait", False):
+        wait_all(svc, compiled.namespace, names, args.timeout, args.poll_interval, args.concurrency)
+    return names
+
+
+def wait_all(svc, namespace: str, names: list[str], timeout: float, poll_interval: float, concurrency: int) -> None:
+    """Wait for every workflow, print its final phase; exit 1 unless all succeeded."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from benchmark import wait_for
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        workflows = list(pool.map(lambda n: wait_for(svc, namespace, n, timeout, poll_interval), names))
+    phases = {}
+    for name, wf in zip(names, workflows):
+        phase = (wf.get("status") or {}).get("phase")
+        phases[phase] = phases.get(phase, 0) + 1
+        print(f"{name:50s} {phase}")
+    print(f"phases: {phases}", file=sys.stderr)
+    if set(phases) != {"Succeeded"}:
+        sys.exit(1)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render, submit, bulk-submit, wait for and benchmark scenarios")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="list discovered scenarios")
+
+    render = sub.add_parser("render", help="print the manifest of a scenario")
+    render.add_argument("scenario", help="scenario id (e.g. P3/S1) or path")
+
+    for name, help_text in (("submit", "submit a scenario once"), ("bulk-submit", "submit many copies concurrently")):
+        s = sub.add_parser(name, help=help_text)
+        s.add_argument("scenario", help="scenario id (e.g. P3/S1) or path")
+        s.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="workflow argument")
+        add_template_arguments(s)
+        s.add_argument("--cache-dir", default=os.getenv("BUILD_CACHE_DIR"))
+        s.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+        if name == "submit":
+            s.set_defaults(count=1, concurrency=1)
+        else:
+            s.add_argument("-n", "--count", type=positive_int, default=10)
+            s.add_argument("--concurrency", type=positive_int, default=8, help="parallel create calls (and pooled connections)")
+            s.add_argument("--wait", action="store_true", help="wait for all workflows to finish")
+            s.add_argument("--timeout", type=float, default=900)
+            s.add_argument("--poll-interval", type=float, default=2)
+
+    wait = sub.add_parser("wait", help="wait for workflows by name")
+    wait.add_argument("names", nargs="+")
+    wait.add_argument("--namespace", default=DEFAULT_NAMESPACE)
+    wait.add_argument("--timeout", type=float, default=900)
+    wait.add_argument("--poll-interval", type=float, default=2)
+    wait.add_argument("--concurrency", type=positive_int, default=8)
+    wait.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+
+    sub.add_parser("benchmark", help="benchmark.py; the scenario may be an id", add_help=False)
+
+    args, rest = p.parse_known_args()
+    if args.command == "benchmark":
+        import benchmark
+
+        if rest and not rest[0].startswith("-"):
+            rest[0] = resolve(rest[0])
+        sys.argv = ["runner.py benchmark", *rest]
+        return benchmark.main()
+    if rest:
+        p.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    if args.command == "list":
+        for key, script in discover().items():
+            print(f"{key:30s} {os.path.relpath(script, SCENARIOS_DIR)}")
+    elif args.command == "render":
+        print(to_yaml(load_scenario(resolve(args.scenario)).build_wf(None)))
+    elif args.command in ("submit", "bulk-submit"):
+        submit_many(args)
+    elif args.command == "wait":
+        svc = make_service(args.server, pool_size=args.concurrency)
+        wait_all(svc, args.namespace, args.names, args.timeout, args.poll_interval, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Startup-time check for the scenario CLIs.
+
+The scripts are called from automation many times a day, so `--help`, usage
+errors and subcommand dispatch must not pay for Hera/pydantic/requests. For
+every cli.py command and every scenario script this runs `<cmd> --help` under
+`python -X importtime` and
+
+  - fails when one of the heavy packages (--forbid) is imported eagerly,
+  - reports the best-of-N wall time and fails when a command costs more than
+    --max-overhead-ms on top of a bare interpreter start, so a regression is
+    caught even without a stored baseline,
+  - with --baseline also fails when a command got slower than --max-regression
+    percent (plus a small absolute slack against timer noise).
+
+Examples:
+  python startup_check.py
+  python startup_check.py --out startup.json
+  python startup_check.py --baseline startup.json --max-regression 20
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from cli import COMMANDS, SCENARIOS_DIR
+
+DEFAULT_FORBIDDEN = ["hera", "pydantic", "requests", "yaml"]
+NOISE_MS = 15.0
+
+
+def targets() -> dict[str, list[str]]:
+    """label -> argv (without the interpreter) of every command to check."""
+    cli = os.path.join(SCENARIOS_DIR, "cli.py")
+    found = {f"cli.py {name}": [cli, name, "--help"] for name in COMMANDS}
+    found["cli.py"] = [cli, "--help"]
+    for script in sorted(glob.glob(os.path.join(SCENARIOS_DIR, "P*", "S*", "*.py"))):
+        found[os.path.relpath(script, SCENARIOS_DIR)] = [script, "--help"]
+    return found
+
+
+def imported_modules(argv: list[str]) -> set[str]:
+    """Top-level packages imported while running argv (from -X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True, cwd=SCENARIOS_DIR)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}: {proc.stderr[-500:]}")
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return modules
+
+
+def wall_ms(argv: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], capture_output=True, cwd=SCENARIOS_DIR, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    p = argparse.ArgumentParser(description="Check startup time and eager heavy imports of the scenario CLIs")
+    p.add_argument("--repeat", type=int, default=5, help="runs per command, the fastest counts")
+    p.add_argument("--forbid", action="append", default=None, help=f"package that must not be imported (default: {DEFAULT_FORBIDDEN})")
+    p.add_argument("--out", default=None, help="write timings as JSON (use as a later --baseline)")
+    p.add_argument("--baseline", default=None, help="JSON written by --out to compare against")
+    p.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown vs baseline (%%)")
+    p.add_argument("--max-overhead-ms", type=float, default=100.0,
+                   help="allowed time on top of a bare interpreter start (importing Hera alone exceeds it)")
+    args = p.parse_args()
+
+    forbidden = set(args.forbid or DEFAULT_FORBIDDEN)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures, timings = [], {}
+    python_ms = wall_ms(["-c", "pass"], args.repeat)
+    budget_ms = python_ms + args.max_overhead_ms
+    base_header = f" {'base':>8s}" if baseline else ""
+    print(f"{'command':40s} {'ms':>8s}{base_header}  (bare interpreter {python_ms:.0f} ms, budget {budget_ms:.0f} ms)")
+    for label, argv in targets().items():
+        try:
+            heavy = sorted(imported_modules(argv) & forbidden)
+        except RuntimeError as e:
+            failures.append(str(e))
+            continue
+        timings[label] = ms = wall_ms(argv, args.repeat)
+        base = baseline.get(label)
+        base_column = (f" {base:8.0f}" if base is not None else f" {'-':>8s}") if baseline else ""
+        print(f"{label:40s} {ms:8.0f}{base_column}" + (f"  imports {', '.join(heavy)}" if heavy else ""))
+        if heavy:
+            failures.append(f"{label}: imports {', '.join(heavy)} on --help")
+        if ms > budget_ms:
+            failures.append(f"{label}: {ms:.0f} ms, over the {budget_ms:.0f} ms budget"
+                            f" (interpreter + {args.max_overhead_ms:.0f} ms)")
+        if base is not None and ms > base * (1 + args.max_regression / 100) + NOISE_MS:
+            failures.append(f"{label}: {ms:.0f} ms vs baseline {base:.0f} ms (> {args.max_regression:.0f}%)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(timings, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
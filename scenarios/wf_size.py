@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Workflow object size and node-count profiler.
+
+Tells when a workflow needs `nodeStatusOffload` (or a smaller design) before it
+slows the controller. Input is either a live workflow (name, fetched from the
+argo-server) or a rendered manifest (`P1/S1/rendered.yaml`, or a scenario
+script exposing build_wf). Reported:
+
+- serialized size of the whole object, spec and status (live only)
+- node count; for manifests an estimate from the template tree, best case
+  (first attempt succeeds) and worst case (every retryStrategy.limit used),
+  with the expansion per retrying template
+- largest parameters (live: node inputs/outputs, manifest: spec values)
+- projected object size when the workflow is fanned out `--fan-out` times
+  (withParam loops get that many items; without loops the whole body is
+  repeated)
+
+Warnings are printed when a size is above `--warn-ratio` of the etcd request
+limit (1.5 MiB by default, `--limit`).
+
+Examples:
+  python wf_size.py P3/S1/rendered.yaml --fan-out 500
+  python wf_size.py P3/S2/run_workflow.py --output-size 4096
+  python wf_size.py p3-s1-retries-wf-x7k2p --server http://localhost:2746
+"""
+import argparse
+import json
+import os
+
+from build_cache import DEFAULT_HOST, DEFAULT_NAMESPACE, api_request, load_scenario, make_service
+
+ETCD_LIMIT = 1536 * 1024
+DEFAULT_WARN_RATIO = 0.8
+DEFAULT_OUTPUT_SIZE = 64
+
+
+def size_of(obj) -> int:
+    return len(json.dumps(obj, separators=(",", ":")).encode()) if obj is not None else 0
+
+
+def sample_node(template: str, outputs: int, output_size: int) -> dict:
+    """A typical node status entry, used to estimate status size of manifests."""
+    node = {
+        "id": "p3-s1-retries-wf-x7k2p-1234567890",
+        "name": "p3-s1-retries-wf-x7k2p[0].consume-message(0)",
+        "displayName": "consume-message(0)",
+        "type": "Pod",
+        "templateName": template,
+        "templateScope": "local/p3-s1-retries-wf-x7k2p",
+        "phase": "Succeeded",
+        "boundaryID": "p3-s1-retries-wf-x7k2p",
+        "startedAt": "2025-01-01T00:00:00Z",
+        "finishedAt": "2025-01-01T00:00:10Z",
+        "progress": "1/1",
+        "resourcesDuration": {"cpu": 1, "memory": 10},
+        "hostNodeName": "worker-node-1",
+        "children": ["p3-s1-retries-wf-x7k2p-1234567891"],
+    }
+    if outputs:
+        node["outputs"] = {
+            "parameters": [{"name": f"param-{i}", "value": "x" * output_size} for i in range(outputs)],
+            "exitCode": "0",
+        }
+    return node
+
+
+class NodeEstimate:
+    """Static node count of a manifest: Argo creates one node per template invocation
+    plus StepGroup nodes for Steps, a Retry node around retrying templates and one
+    child per attempt / loop item."""
+
+    def __init__(self, manifest: dict, fan_out: int, output_size: int):
+        self.templates = {t["name"]: t for t in manifest["spec"]["templates"]}
+        self.fan_out = fan_out
+        self.output_size = output_size
+        self.retries: dict[str, tuple[int, int]] = {}
+        self.loops = 0
+
+    def count(self, name: str, depth: int = 0) -> tuple[int, int, int]:
+        """(best, worst, status bytes worst) for one invocation of template `name`."""
+        template = self.templates.get(name)
+        if template is None or depth > 50:  # templateRef / recursion: count as one node
+            return 1, 1, size_of(sample_node(name, 0, 0))
+        outputs = len((template.get("outputs") or {}).get("parameters") or [])
+        own = size_of(sample_node(name, outputs, self.output_size))
+        best, worst, nbytes = 1, 1, own
+
+        children = []
+        if "steps" in template:
+            for group in template["steps"]:
+                best, worst, nbytes = best + 1, worst + 1, nbytes + own  # StepGroup
+                children += group
+        elif "dag" in template:
+            children = template["dag"].get("tasks") or []
+        for child in children:
+            b, w, s = self.count(child.get("template"), depth + 1) if child.get("template") else (1, 1, own)
+            items = self._items(child)
+            if items != 1:
+                b, w, s = b * items + 1, w * items + 1, s * items + own  # loop parent node
+            best, worst, nbytes = best + b, worst + w, nbytes + s
+
+        limit = int(str((template.get("retryStrategy") or {}).get("limit", 0)) or 0) if template.get("retryStrategy") else None
+        if limit is not None:
+            self.retries[name] = (best + 1, worst * (limit + 1) + 1)
+            best, worst, nbytes = best + 1, worst * (limit + 1) + 1, nbytes * (limit + 1) + own
+        return best, worst, nbytes
+
+    def _items(self, step: dict) -> int:
+        if step.get("withItems") is not None:
+            self.loops += 1
+            return len(step["withItems"])
+        if step.get("withParam") or step.get("withSequence"):
+            self.loops += 1
+            count = (step.get("withSequence") or {}).get("count")
+            return int(count) if str(count or "").isdigit() else self.fan_out
+        return 1
+
+
+def spec_parameters(manifest: dict) -> list[tuple[str, int]]:
+    """(location, bytes) of every parameter value/default found in the spec."""
+    found = []
+
+    def walk(value, path):
+        if isinstance(value, dict):
+            if "name" in value and ("value" in value or "default" in value):
+                for key in ("value", "default"):
+                    if key in value:
+                        found.append((path, len(str(value[key]).encode())))
+            for k, v in value.items():
+                walk(v, f"{path}.{k}" if path else k)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v, f"{path}[{v['name']}]" if isinstance(v, dict) and "name" in v else path)
+
+    walk(manifest.get("spec") or {}, "spec")
+    return found
+
+
+def status_parameters(wf: dict) -> list[tuple[str, int]]:
+    found = []
+    for node in ((wf.get("status") or {}).get("nodes") or {}).values():
+        for kind in ("inputs", "outputs"):
+            for param in (node.get(kind) or {}).get("parameters") or []:
+                if "value" in param:
+                    found.append((f"{node.get('displayName')}.{kind}.{param['name']}", len(str(param["value"]).encode())))
+    return found
+
+
+def profile_manifest(manifest: dict, fan_out: int, output_size: int) -> dict:
+    estimate = NodeEstimate(manifest, fan_out, output_size)
+    spec_bytes = size_of(manifest.get("spec"))
+    base = NodeEstimate(manifest, 1, output_size).count(manifest["spec"]["entrypoint"])
+    projected = estimate.count(manifest["spec"]["entrypoint"])
+    if not estimate.loops:  # no loop to widen: repeat the whole body
+        projected = tuple(v * fan_out for v in projected)
+    return {
+        "source": "manifest",
+        "object_bytes": size_of(manifest) + base[2],
+        "spec_bytes": spec_bytes,
+        "status_bytes": base[2],
+        "nodes": {"best": base[0], "worst": base[1]},
+        "retry_expansion": {name: {"best": b, "worst": w} for name, (b, w) in estimate.retries.items()},
+        "largest_parameters": sorted(spec_parameters(manifest), key=lambda p: -p[1]),
+        "projected": {"fan_out": fan_out, "nodes": projected[1], "object_bytes": spec_bytes + projected[2]},
+    }
+
+
+def profile_live(wf: dict, fan_out: int) -> dict:
+    status = wf.get("status") or {}
+    nodes = status.get("nodes") or {}
+    status_bytes = size_of(status)
+    per_node = size_of(nodes) / len(nodes) if nodes else 0
+    retry = {}
+    for node in nodes.values():
+        if node.get("type") == "Retry":
+            retry[node.get("templateName") or node.get("displayName")] = {"best": 2, "worst": 1 + len(node.get("children") or [])}
+    return {
+        "source": "live",
+        "object_bytes": size_of(wf),
+        "spec_bytes": size_of(wf.get("spec")),
+        "status_bytes": status_bytes,
+        "nodes": {"best": len(nodes), "worst": len(nodes)},
+        "retry_expansion": retry,  # worst = attempts so far
+        "largest_parameters": sorted(status_parameters(wf) + spec_parameters(wf), key=lambda p: -p[1]),
+        "projected": {"fan_out": fan_out, "nodes": len(nodes) * fan_out,
+                      "object_bytes": size_of(wf) - status_bytes + int(per_node * len(nodes) * fan_out)},
+        "offloaded": bool(status.get("offloadNodeStatusVersion")),
+        "compressed": bool(status.get("compressedNodes")),
+    }
+
+
+def warnings(report: dict, limit: int, ratio: float) -> list[str]:
+    out = []
+    for label, value in (("object", report["object_bytes"]), ("projected object", report["projected"]["object_bytes"])):
+        if value >= limit:
+            out.append(f"{label} size {value} B exceeds the etcd limit ({limit} B): enable nodeStatusOffload or split the workflow")
+        elif value >= limit * ratio:
+            out.append(f"{label} size {value} B is at {value / limit:.0%} of the etcd limit ({limit} B)")
+    return out
+
+
+def load(target: str, server: str, namespace: str) -> tuple[dict, bool]:
+    """Manifest dict and whether it is a live workflow."""
+    if target.endswith((".yaml", ".yml")):
+        import yaml
+
+        with open(target) as f:
+            return yaml.safe_load(f), False
+    if target.endswith(".py"):
+        return load_scenario(target).build_wf(None).to_dict(), False
+    return api_request(make_service(server), "get", f"api/v1/workflows/{namespace}/{target}"), True
+
+
+def print_report(report: dict, top: int, warn: list[str]) -> None:
+    kib = lambda n: f"{n / 1024:.1f} KiB"  # noqa: E731
+    print(f"object:  {kib(report['object_bytes'])} (spec {kib(report['spec_bytes'])}, status {kib(report['status_bytes'])}"
+          + (", estimated)" if report["source"] == "manifest" else ")"))
+    if report.get("offloaded") or report.get("compressed"):
+        print(f"status:  {'offloaded' if report.get('offloaded') else 'compressed'} nodes (sizes exclude them)")
+    print(f"nodes:   {report['nodes']['best']}" + (f" (worst case with retries {report['nodes']['worst']})"
+                                                   if report["nodes"]["worst"] != report["nodes"]["best"] else ""))
+    for name, r in sorted(report["retry_expansion"].items()):
+        print(f"  retry {name:30s} {r['best']} -> {r['worst']} nodes")
+    if report["largest_parameters"]:
+        print("largest parameters:")
+        for location, n in report["largest_parameters"][:top]:
+            print(f"  {n:8d} B  {location}")
+    proj = report["projected"]
+    print(f"projected at fan-out {proj['fan_out']}: {proj['nodes']} nodes, {kib(proj['object_bytes'])}")
+    for w in warn:
+        print(f"WARNING: {w}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Report workflow object size, node count and projected growth")
+    p.add_argument("target", help="workflow name, rendered YAML or scenario script")
+    p.add_argument("--fan-out", type=int, default=100, help="withParam items / body repetitions for the projection")
+    p.add_argument("--output-size", type=int, default=DEFAULT_OUTPUT_SIZE,
+                   help="assumed bytes per output parameter value when estimating manifests")
+    p.add_argument("--limit", type=int, default=ETCD_LIMIT, help="object size limit in bytes")
+    p.add_argument("--warn-ratio", type=float, default=DEFAULT_WARN_RATIO)
+    p.add_argument("--top", type=int, default=5, help="number of largest parameters to show")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    p.add_argument("--namespace", default=DEFAULT_NAMESPACE)
+    p.add_argument("--server", default=os.getenv("ARGO_SERVER", DEFAULT_HOST))
+    args = p.parse_args()
+
+    manifest, live = load(args.target, args.server, args.namespace)
+    report = profile_live(manifest, args.fan_out) if live else profile_manifest(manifest, args.fan_out, args.output_size)
+    warn = warnings(report, args.limit, args.warn_ratio)
+    if args.json:
+        print(json.dumps({**report, "warnings": warn}, indent=2))
+    else:
+        print_report(report, args.top, warn)
+
+
+if __name__ == "__main__":
+    main()
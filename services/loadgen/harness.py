@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Run one service of the pipeline with a measurement endpoint (used by overhead.py).
+
+The service's app.py is imported unchanged, so its module-level setup (tracing,
+metrics, instrumentors, logging) runs exactly as under `python app.py`. Flask
+services are then served with app.run() on --port, consumers run main_loop().
+A daemon thread serves on --control-port:
+
+  POST /mark   start a measurement window
+  GET  /stats  counters of the window: CPU time of the process (all threads,
+               including exporters), GC collections, RSS and, with
+               --tracemalloc, traced memory growth and peak
+
+Examples:
+  python harness.py ../service-a --port 8010 --control-port 9010
+  python harness.py ../../services_no_otel/service-z --consumer --control-port 9012 --tracemalloc
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+def peak_rss_kib() -> int:
+    """VmHWM of this process; ru_maxrss is kept across exec, so a child would report its parent's peak."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Window:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mark()
+
+    @staticmethod
+    def _counters() -> dict:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "time": time.time(),
+            "cpu_s": usage.ru_utime + usage.ru_stime,
+            "gc": [g["collections"] for g in gc.get_stats()],
+            "traced": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        }
+
+    def mark(self):
+        with self.lock:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            self.start = self._counters()
+
+    def stats(self) -> dict:
+        with self.lock:
+            now = self._counters()
+            start = self.start
+        out = {
+            "pid": os.getpid(),
+            "wall_s": now["time"] - start["time"],
+            "cpu_s": now["cpu_s"] - start["cpu_s"],
+            "gc_collections": [b - a for a, b in zip(start["gc"], now["gc"])],
+            "maxrss_kib": peak_rss_kib(),
+            "threads": threading.active_count(),
+        }
+        if now["traced"] is not None:
+            out["traced_growth_kib"] = (now["traced"] - start["traced"]) / 1024
+            # peak above the traced memory at the mark: what the requests allocated at most at once
+            out["traced_peak_kib"] = (tracemalloc.get_traced_memory()[1] - start["traced"]) / 1024
+        return out
+
+
+def serve_control(port: int, window: Window) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._reply(window.stats())
+            self.send_error(404)
+
+        def do_POST(self):
+            if self.path == "/mark":
+                window.mark()
+                return self._reply({"marked": True})
+            self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run a pipeline service with a CPU/GC/memory measurement endpoint")
+    p.add_argument("service_dir", help="directory with the service's app.py")
+    p.add_argument("--port", type=int, default=8000, help="HTTP port of a Flask service")
+    p.add_argument("--control-port", type=int, required=True)
+    p.add_argument("--consumer", action="store_true", help="run main_loop() instead of serving app")
+    p.add_argument("--tracemalloc", action="store_true", help="trace allocations (slows the service down)")
+    args = p.parse_args()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    service_dir = os.path.abspath(args.service_dir)
+    os.chdir(service_dir)
+    sys.path.insert(0, service_dir)
+    module = importlib.import_module("app")
+
+    window = Window()
+    serve_control(args.control_port, window)
+    if args.consumer:
+        module.main_loop()
+    else:
+        module.app.run(host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
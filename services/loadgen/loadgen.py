@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Load generator for the service-a -> service-b -> (redis) -> service-c pipeline.
+
+Drives GET /start on service-a (or service-x) and measures:
+
+  - the HTTP leg: latency histogram and p50/p95/p99 of /start,
+  - end-to-end completion: service-b puts an `id` in every envelope (returned
+    through service-a) and service-c publishes {id, enqueued_at, started_at,
+    finished_at} on the COMPLETIONS_CHANNEL; completions are matched to the
+    request that produced them,
+  - queue wait (started_at - enqueued_at) and processing time from the
+    consumer timestamps,
+  - throughput and queue depth (LLEN of the task queue) over time.
+
+Modes:
+  open loop   --rate R: requests are scheduled at a constant arrival rate,
+              latency counts from the scheduled time, so a saturated service
+              cannot hide its queueing (no coordinated omission); at most
+              --concurrency requests are in flight.
+  closed loop --concurrency N without --rate: N clients send back to back.
+
+Examples (port-forward service-a to 8000 and redis to 6379):
+  python loadgen.py --url http://localhost:8000/start --rate 20 --duration 60
+  python loadgen.py --url http://localhost:8000/start --concurrency 16 --duration 60 --out run.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+import requests
+from requests.adapters import HTTPAdapter
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict:
+    out = {"count": len(values)}
+    if values:
+        out.update({"mean": sum(values) / len(values), "max": max(values)})
+        out.update({f"p{q}": percentile(values, q) for q in PERCENTILES})
+    return out
+
+
+def histogram(values: list[float], start: float = 0.001, factor: float = 2.0) -> list[tuple[float, int]]:
+    """(upper bound in seconds, count) log buckets: 1ms, 2ms, 4ms, ..."""
+    if not values:
+        return []
+    buckets, bound = [], start
+    top = max(values)
+    while True:
+        buckets.append([bound, 0])
+        if bound >= top:
+            break
+        bound *= factor
+    for v in values:
+        index = 0 if v <= start else min(len(buckets) - 1, math.ceil(math.log(v / start, factor)))
+        buckets[index][1] += 1
+    first = next(i for i, (_, c) in enumerate(buckets) if c)
+    return [(b, c) for b, c in buckets[first:]]
+
+
+class Recorder:
+    """Thread-safe store of sends, HTTP results and completions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.http: list[dict] = []
+        self.sent_at: dict[str, float] = {}  # envelope id -> scheduled send time (wall clock)
+        self.completions: dict[str, dict] = {}
+        self.unmatched: dict[str, dict] = {}
+
+    def record_http(self, scheduled: float, latency: float, status: int | None, task_id: str | None, error=None):
+        with self.lock:
+            self.http.append({"t": scheduled, "latency_s": latency, "status": status, "error": error})
+            if task_id:
+                self.sent_at[task_id] = scheduled
+                early = self.unmatched.pop(task_id, None)  # completion arrived before the response
+                if early:
+                    self._complete(task_id, early)
+
+    def record_completion(self, message: dict, received: float):
+        message["received_at"] = received
+        with self.lock:
+            if message["id"] in self.sent_at:
+                self._complete(message["id"], message)
+            else:
+                self.unmatched[message["id"]] = message
+
+    def _complete(self, task_id: str, message: dict):
+        message["e2e_s"] = message["received_at"] - self.sent_at[task_id]
+        self.completions[task_id] = message
+
+
+class CompletionListener(threading.Thread):
+    def __init__(self, client: redis.Redis, channel: str, recorder: Recorder):
+        super().__init__(daemon=True)
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel)  # before the first request, so nothing is missed
+        self.recorder = recorder
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                message = self.pubsub.get_message(timeout=0.5)
+                if message and message["type"] == "message":
+                    self.recorder.record_completion(json.loads(message["data"]), time.time())
+        except redis.ConnectionError:
+            pass  # reported as missing completions
+        finally:
+            self.pubsub.close()
+
+
+class QueueSampler(threading.Thread):
+    def __init__(self, client: redis.Redis, queue: str, interval: float):
+        super().__init__(daemon=True)
+        self.client, self.queue, self.interval = client, queue, interval
+        self.samples: list[tuple[float, int]] = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.samples.append((time.time(), self.client.llen(self.queue)))
+            except redis.RedisError:
+                pass
+
+
+class LoadGenerator:
+    def __init__(self, url: str, recorder: Recorder, concurrency: int, timeout: float):
+        self.url = url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        return session
+
+    def request(self, scheduled: float):
+        task_id, status, error = None, None, None
+        try:
+            resp = self._session().get(self.url, timeout=self.timeout)
+            status = resp.status_code
+            body = resp.json()
+            downstream = body.get("service_b_status") or body.get("service_y_status") or {}
+            task_id = downstream.get("id")
+        except (requests.RequestException, ValueError) as e:
+            error = type(e).__name__
+        self.recorder.record_http(scheduled, time.time() - scheduled, status, task_id, error)
+
+    def open_loop(self, rate: float, duration: float) -> int:
+        interval = 1.0 / rate
+        start = time.time()
+        sent = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                scheduled = start + sent * interval
+                if scheduled - start >= duration:
+                    break
+                delay = scheduled - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.request, scheduled)
+                sent += 1
+        return sent
+
+    def closed_loop(self, duration: float) -> int:
+        deadline = time.time() + duration
+        counts = [0] * self.concurrency
+
+        def client(index):
+            while time.time() < deadline:
+                self.request(time.time())
+                counts[index] += 1
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return sum(counts)
+
+
+def is_ok(r: dict) -> bool:
+    # 202: /start queued the task and did not wait for its result
+    return r["status"] is not None and 200 <= r["status"] < 300
+
+
+def timeline(recorder: Recorder, samples: list[tuple[float, int]], start: float, bucket: float) -> list[dict]:
+    rows: dict[int, dict] = {}
+
+    def row(t: float) -> dict:
+        index = max(0, int((t - start) // bucket))
+        return rows.setdefault(index, {"t": index * bucket, "sent": 0, "http_ok": 0, "completed": 0, "queue_depth": None})
+
+    for r in recorder.http:
+        entry = row(r["t"])
+        entry["sent"] += 1
+        entry["http_ok"] += is_ok(r)
+    for c in recorder.completions.values():
+        row(c["received_at"])["completed"] += 1
+    for t, depth in samples:
+        entry = row(t)
+        entry["queue_depth"] = depth if entry["queue_depth"] is None else max(entry["queue_depth"], depth)
+    return [rows[i] for i in sorted(rows)]
+
+
+def build_report(args, recorder: Recorder, samples, start: float, load_s: float) -> dict:
+    ok = [r["latency_s"] for r in recorder.http if is_ok(r)]
+    completions = list(recorder.completions.values())
+    with_ids = len(recorder.sent_at)
+    return {
+        "url": args.url,
+        "mode": "open" if args.rate else "closed",
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "duration_s": load_s,
+        "http": {
+            "sent": len(recorder.http),
+            "ok": len(ok),
+            "errors": len(recorder.http) - len(ok),
+            "throughput_rps": len(ok) / load_s if load_s else 0,
+            "latency_s": summarize(ok),
+            "histogram": histogram(ok),
+        },
+        "e2e": {
+            "tracked": with_ids,
+            "completed": len(completions),
+            "missing": with_ids - len(completions),
+            "throughput_rps": len(completions) / (max(c["received_at"] for c in completions) - start) if completions else 0,
+            "latency_s": summarize([c["e2e_s"] for c in completions]),
+            "queue_wait_s": summarize([c["started_at"] - c["enqueued_at"] for c in completions if c.get("enqueued_at")]),
+            "processing_s": summarize([c["finished_at"] - c["started_at"] for c in completions]),
+        },
+        "queue_depth_max": max((d for _, d in samples), default=None),
+        "timeline": timeline(recorder, samples, start, args.bucket),
+    }
+
+
+def print_report(report: dict) -> None:
+    http, e2e = report["http"], report["e2e"]
+    print(f"{report['mode']} loop, {report['duration_s']:.1f}s: sent={http['sent']} ok={http['ok']} errors={http['errors']}"
+          f" throughput={http['throughput_rps']:.1f}/s")
+    print(f"{'':16s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}  (seconds)")
+    for label, stats in (("http", http["latency_s"]), ("end-to-end", e2e["latency_s"]),
+                         ("queue wait", e2e["queue_wait_s"]), ("processing", e2e["processing_s"])):
+        if stats["count"]:
+            print(f"{label:16s} " + " ".join(f"{stats[k]:9.3f}" for k in ("p50", "p95", "p99", "max")))
+    print(f"completed {e2e['completed']}/{e2e['tracked']} tracked ({e2e['missing']} missing),"
+          f" e2e throughput={e2e['throughput_rps']:.1f}/s, max queue depth={report['queue_depth_max']}")
+
+    if http["histogram"]:
+        print("\nhttp latency histogram")
+        peak = max(c for _, c in http["histogram"]) or 1
+        for bound, count in http["histogram"]:
+            print(f"  <= {bound * 1000:8.0f} ms {count:7d} {'#' * round(40 * count / peak)}")
+
+    print(f"\n{'t':>6s} {'sent':>6s} {'ok':>6s} {'done':>6s} {'queue':>6s}")
+    for row in report["timeline"]:
+        depth = "" if row["queue_depth"] is None else row["queue_depth"]
+        print(f"{row['t']:6.0f} {row['sent']:6d} {row['http_ok']:6d} {row['completed']:6d} {depth:>6}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Drive /start and measure the HTTP leg and end-to-end completion")
+    p.add_argument("--url", default=os.getenv("LOADGEN_URL", "http://localhost:8000/start"))
+    p.add_argument("--rate", type=float, default=None, help="open loop: requests per second")
+    p.add_argument("--concurrency", type=int, default=8, help="closed loop clients / open loop max in flight")
+    p.add_argument("--duration", type=float, default=30)
+    p.add_argument("--timeout", type=float, default=10, help="HTTP timeout per request")
+    p.add_argument("--drain", type=float, default=30, help="max seconds to wait for outstanding completions")
+    p.add_argument("--redis-host", default=os.getenv("REDIS_HOST", "localhost"))
+    p.add_argument("--redis-port", type=int, default=int(os.getenv("REDIS_PORT", "6379")))
+    p.add_argument("--queue", default=os.getenv("REDIS_QUEUE", "tasks"))
+    p.add_argument("--channel", default=os.getenv("COMPLETIONS_CHANNEL", "task-completions"))
+    p.add_argument("--no-redis", action="store_true", help="HTTP leg only (no completions / queue depth)")
+    p.add_argument("--sample-interval", type=float, default=1.0, help="queue depth sampling period")
+    p.add_argument("--bucket", type=float, default=5.0, help="timeline bucket in seconds")
+    p.add_argument("--out", default=None, help="write the JSON report here")
+    args = p.parse_args()
+
+    recorder = Recorder()
+    listener = sampler = None
+    if not args.no_redis:
+        client = redis.Redis(host=args.redis_host, port=args.redis_port, db=0)
+        listener = CompletionListener(client, args.channel, recorder)
+        sampler = QueueSampler(client, args.queue, args.sample_interval)
+        listener.start()
+        sampler.start()
+
+    generator = LoadGenerator(args.url, recorder, args.concurrency, args.timeout)
+    start = time.time()
+    if args.rate:
+        generator.open_loop(args.rate, args.duration)
+    else:
+        generator.closed_loop(args.duration)
+    load_s = time.time() - start
+
+    if listener:
+        deadline = time.time() + args.drain
+        while time.time() < deadline and len(recorder.completions) < len(recorder.sent_at):
+            time.sleep(0.2)
+        listener.stopped.set()
+        sampler.stopped.set()
+        listener.join()
+
+    report = build_report(args, recorder, sampler.samples if sampler else [], start, load_s)
+    print_report(report)
+    if listener and recorder.sent_at and not recorder.completions:
+        print(f"\nno completions received: service-c/z publish only with COMPLETIONS_CHANNEL={args.channel} set",
+              file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Instrumentation overhead benchmark: services/ (a, b, c) vs services_no_otel/ (x, y, z).
+
+A third configuration, otel-off, runs services/ with TELEMETRY_TRACES/METRICS/LOGS
+set to off, to check that the disabled path costs what no instrumentation does.
+
+Both chains run locally, one configuration at a time, against the same
+stand-ins: a Redis (fakeredis' TCP server unless --redis-port points to a real
+one) and a stub OTLP/HTTP receiver that accepts and counts what the exporters
+send. Every service runs under harness.py, which imports its app.py unchanged
+and reports CPU time, GC collections and RSS for a measurement window.
+
+Per configuration (and per --repeat, configurations alternating):
+  warmup       closed loop, not measured
+  latency      open loop at --rate: HTTP and end-to-end p50/p95/p99, CPU ms per
+               request per service (window includes --settle seconds, so spans
+               exported by the batch processor after the load are counted)
+  throughput   closed loop with --concurrency clients: max requests/s of the
+               HTTP leg and completions/s of the consumers
+  allocations  with --alloc, a second launch under tracemalloc (kept apart
+               because tracing slows everything down): peak of traced memory
+               above the start of the window and retained growth per service
+
+The consumer's simulated work is --task-duration (default 0), so the consumer
+numbers are its own overhead rather than the sleep. Results with --repeat > 1
+are medians.
+
+Examples:
+  python overhead.py --duration 20 --rate 50
+  python overhead.py --configs otel otel-off no-otel
+  python overhead.py --repeat 3 --alloc --out overhead.json
+  python overhead.py --configs otel --redis-port 6379   # a real redis-server
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import redis
+import requests
+
+from loadgen import CompletionListener, LoadGenerator, Recorder, is_ok, summarize
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+ROLES = ("front", "producer", "consumer")
+# fakeredis keeps serving the BRPOP of a killed consumer and loses the task it pops, so every launch gets its own queue
+_launches = itertools.count()
+
+# configuration -> role -> service directory; the front calls the producer at <url var>
+CONFIGS = {
+    "otel": {
+        "front": "services/service-a",
+        "producer": "services/service-b",
+        "consumer": "services/service-c",
+        "producer_url_env": "SERVICE_B_URL",
+    },
+    # same code with every signal switched off (common.Telemetry)
+    "otel-off": {
+        "front": "services/service-a",
+        "producer": "services/service-b",
+        "consumer": "services/service-c",
+        "producer_url_env": "SERVICE_B_URL",
+        "env": {"TELEMETRY_TRACES": "off", "TELEMETRY_METRICS": "off", "TELEMETRY_LOGS": "off"},
+    },
+    "no-otel": {
+        "front": "services_no_otel/service-x",
+        "producer": "services_no_otel/service-y",
+        "consumer": "services_no_otel/service-z",
+        "producer_url_env": "SERVICE_Y_URL",
+    },
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class OTLPStub(ThreadingHTTPServer):
+    """Accepts OTLP/HTTP exports (any path) with 200 and counts requests and bytes."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int):
+        self.counts: dict[str, list[int]] = {}
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.lock:
+                    entry = stub.counts.setdefault(self.path, [0, 0])
+                    entry[0] += 1
+                    entry[1] += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-protobuf")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", port), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def snapshot(self) -> dict[str, list[int]]:
+        with self.lock:
+            return {path: list(entry) for path, entry in self.counts.items()}
+
+
+def start_fake_redis(port: int) -> None:
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise SystemExit("fakeredis is not installed: pip install fakeredis, or pass --redis-port of a running redis")
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True  # connection threads of killed consumers stay blocked in BRPOP
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+class Chain:
+    """The three services of one configuration, each under harness.py."""
+
+    def __init__(self, config: str, args, otlp_port: int, tracemalloc: bool = False):
+        spec = CONFIGS[config]
+        self.front_port, self.producer_port = free_port(), free_port()
+        self.url = f"http://127.0.0.1:{self.front_port}/start"
+        env = dict(
+            os.environ,
+            REDIS_HOST=args.redis_host,
+            REDIS_PORT=str(args.redis_port),
+            REDIS_QUEUE=f"overhead-{config}-{os.getpid()}-{next(_launches)}",
+            COMPLETIONS_CHANNEL=args.channel,
+            TASK_DURATION_S=str(args.task_duration),
+            OTEL_EXPORTER_OTLP_TRACES_ENDPOINT=f"http://127.0.0.1:{otlp_port}/v1/traces",
+            OTEL_EXPORTER_OTLP_METRICS_ENDPOINT=f"http://127.0.0.1:{otlp_port}/v1/metrics",
+            ADMIN_PORT="0",  # consumers' telemetry admin endpoint on any free port
+            **spec.get("env", {}),
+        )
+        env[spec["producer_url_env"]] = f"http://127.0.0.1:{self.producer_port}/process"
+        if args.metric_export_interval:
+            env["OTEL_METRIC_EXPORT_INTERVAL"] = str(int(args.metric_export_interval * 1000))
+
+        self.config = config
+        self.controls: dict[str, list[str]] = {role: [] for role in ROLES}
+        self.procs: list[subprocess.Popen] = []
+        self.logs = tempfile.mkdtemp(prefix=f"overhead-{config}-")
+        launches = [("front", self.front_port), ("producer", self.producer_port)]
+        launches += [("consumer", None)] * args.consumers
+        for i, (role, port) in enumerate(launches):
+            control = free_port()
+            cmd = [sys.executable, os.path.join(HERE, "harness.py"), os.path.join(ROOT, spec[role]),
+                   "--control-port", str(control)]
+            cmd += ["--port", str(port)] if port else ["--consumer"]
+            if tracemalloc:
+                cmd.append("--tracemalloc")
+            with open(os.path.join(self.logs, f"{role}-{i}.log"), "w") as log:
+                self.procs.append(subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT))
+            self.controls[role].append(f"http://127.0.0.1:{control}")
+
+    def wait_ready(self, timeout: float = 60) -> None:
+        deadline = time.time() + timeout
+        pending = [c for urls in self.controls.values() for c in urls] + [self.url]
+        while pending:
+            if time.time() > deadline or any(p.poll() is not None for p in self.procs):
+                self.stop(keep_logs=True)
+                raise SystemExit(f"{self.config}: services did not start, see logs in {self.logs}")
+            try:
+                target = pending[0]
+                resp = requests.get(target if target == self.url else f"{target}/stats", timeout=2)
+                if resp.ok:
+                    pending.pop(0)
+                    continue
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+
+    def mark(self) -> None:
+        for urls in self.controls.values():
+            for url in urls:
+                requests.post(f"{url}/mark", timeout=5).raise_for_status()
+
+    def stats(self) -> dict[str, list[dict]]:
+        return {role: [requests.get(f"{url}/stats", timeout=5).json() for url in urls]
+                for role, urls in self.controls.items()}
+
+    def stop(self, keep_logs: bool = False) -> None:
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if not keep_logs:
+            shutil.rmtree(self.logs, ignore_errors=True)
+
+
+def run_load(chain: Chain, args, client: redis.Redis, rate: float | None, duration: float) -> tuple[Recorder, float, float]:
+    """Drive the chain, wait for the completions; returns (recorder, start, load seconds)."""
+    recorder = Recorder()
+    listener = CompletionListener(client, args.channel, recorder)
+    listener.start()
+    generator = LoadGenerator(chain.url, recorder, args.concurrency, args.timeout)
+    start = time.time()
+    if rate:
+        generator.open_loop(rate, duration)
+    else:
+        generator.closed_loop(duration)
+    load_s = time.time() - start
+    deadline = time.time() + args.drain
+    while time.time() < deadline and len(recorder.completions) < len(recorder.sent_at):
+        time.sleep(0.1)
+    listener.stopped.set()
+    listener.join()
+    return recorder, start, load_s
+
+
+def cpu_per_request(stats: dict[str, list[dict]], handled: dict[str, int]) -> dict[str, float]:
+    out = {}
+    for role in ROLES:
+        cpu = sum(s["cpu_s"] for s in stats[role])
+        out[f"cpu_ms_per_req.{role}"] = cpu * 1000 / handled[role] if handled[role] else float("nan")
+        out[f"gc_per_1k_req.{role}"] = (sum(sum(s["gc_collections"]) for s in stats[role]) * 1000 / handled[role]
+                                        if handled[role] else float("nan"))
+        out[f"rss_mib.{role}"] = max(s["maxrss_kib"] for s in stats[role]) / 1024
+    out["cpu_ms_per_req.total"] = sum(out[f"cpu_ms_per_req.{role}"] for role in ROLES)
+    return out
+
+
+def run_config(config: str, args, otlp: OTLPStub, client: redis.Redis) -> dict[str, float]:
+    result: dict[str, float] = {}
+    chain = Chain(config, args, otlp.server_address[1])
+    try:
+        chain.wait_ready()
+        run_load(chain, args, client, None, args.warmup)
+
+        chain.mark()
+        exported_before = otlp.snapshot()
+        recorder, _, _ = run_load(chain, args, client, args.rate, args.duration)
+        time.sleep(args.settle)
+        stats = chain.stats()
+        ok = sum(map(is_ok, recorder.http))
+        completed = len(recorder.completions)
+        http = summarize([r["latency_s"] for r in recorder.http if is_ok(r)])
+        e2e = summarize([c["e2e_s"] for c in recorder.completions.values()])
+        for name, summary in (("http_ms", http), ("e2e_ms", e2e)):
+            for q in ("p50", "p95", "p99"):
+                result[f"{name}.{q}"] = summary.get(q, float("nan")) * 1000
+        result["errors"] = len(recorder.http) - ok
+        result["missing_completions"] = len(recorder.sent_at) - completed
+        result.update(cpu_per_request(stats, {"front": ok, "producer": ok, "consumer": completed}))
+        exported = otlp.snapshot()
+        exported_bytes = sum(v[1] for v in exported.values()) - sum(v[1] for v in exported_before.values())
+        result["otlp_bytes_per_req"] = exported_bytes / ok if ok else float("nan")
+
+        recorder, start, load_s = run_load(chain, args, client, None, args.duration)
+        result["max_http_rps"] = sum(map(is_ok, recorder.http)) / load_s
+        finished = [c["received_at"] for c in recorder.completions.values()]
+        result["max_completions_per_s"] = len(finished) / (max(finished) - start) if finished else 0.0
+    finally:
+        chain.stop()
+
+    if args.alloc:
+        chain = Chain(config, args, otlp.server_address[1], tracemalloc=True)
+        try:
+            chain.wait_ready()
+            run_load(chain, args, client, None, args.warmup)
+            chain.mark()
+            recorder, _, _ = run_load(chain, args, client, args.rate, args.alloc_duration)
+            time.sleep(args.settle)
+            stats = chain.stats()
+        finally:
+            chain.stop()
+        handled = max(1, sum(map(is_ok, recorder.http)))
+        for role in ROLES:
+            result[f"traced_peak_kib.{role}"] = max(s["traced_peak_kib"] for s in stats[role])
+            result[f"traced_growth_b_per_req.{role}"] = sum(s["traced_growth_kib"] for s in stats[role]) * 1024 / handled
+    return result
+
+
+def median_runs(runs: list[dict[str, float]]) -> dict[str, float]:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def print_table(results: dict[str, dict[str, float]]) -> None:
+    configs = list(results)
+    keys = list(results[configs[0]])
+    header = f"{'metric':34s}" + "".join(f"{c:>12s}" for c in configs)
+    if {"otel", "no-otel"} <= set(configs):
+        header += f"{'overhead':>12s}"
+    print(header)
+    for key in keys:
+        line = f"{key:34s}" + "".join(f"{results[c][key]:12.3f}" for c in configs)
+        if {"otel", "no-otel"} <= set(configs):
+            base, value = results["no-otel"][key], results["otel"][key]
+            line += f"{(value - base) / base * 100:+11.1f}%" if base else f"{'':>12s}"
+        print(line)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Measure the cost of the OpenTelemetry instrumentation of the services")
+    p.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    p.add_argument("--repeat", type=int, default=1, help="runs per configuration (alternating), medians reported")
+    p.add_argument("--rate", type=float, default=50, help="open-loop rate of the latency phase (req/s)")
+    p.add_argument("--concurrency", type=int, default=8, help="closed-loop clients / open-loop max in flight")
+    p.add_argument("--duration", type=float, default=20, help="seconds per measured phase")
+    p.add_argument("--warmup", type=float, default=3)
+    p.add_argument("--settle", type=float, default=6, help="wait after the load so batched spans are exported")
+    p.add_argument("--drain", type=float, default=30, help="max seconds to wait for outstanding completions")
+    p.add_argument("--timeout", type=float, default=10)
+    p.add_argument("--consumers", type=int, default=2)
+    p.add_argument("--task-duration", type=float, default=0.0, help="TASK_DURATION_S of the consumers")
+    p.add_argument("--metric-export-interval", type=float, default=None, help="seconds (default: SDK default)")
+    p.add_argument("--alloc", action="store_true", help="extra tracemalloc run per configuration")
+    p.add_argument("--alloc-duration", type=float, default=10)
+    p.add_argument("--redis-host", default="127.0.0.1")
+    p.add_argument("--redis-port", type=int, default=None, help="use a running redis instead of fakeredis")
+    p.add_argument("--channel", default="overhead-completions")
+    p.add_argument("--out", default=None, help="write all runs and medians as JSON")
+    args = p.parse_args()
+
+    if args.redis_port is None:
+        args.redis_port = free_port()
+        start_fake_redis(args.redis_port)
+    client = redis.Redis(host=args.redis_host, port=args.redis_port, db=0)
+    client.ping()
+    otlp = OTLPStub(free_port())
+
+    runs: dict[str, list[dict[str, float]]] = {c: [] for c in args.configs}
+    for i in range(args.repeat):
+        order = args.configs if i % 2 == 0 else args.configs[::-1]
+        for config in order:
+            print(f"run {i + 1}/{args.repeat}: {config}", file=sys.stderr)
+            runs[config].append(run_config(config, args, otlp, client))
+
+    results = {config: median_runs(config_runs) for config, config_runs in runs.items()}
+    print_table(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "runs": runs, "median": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Span-rate load test of a collector's OTLP/HTTP receiver (the chart's otel-collector or operator collector).
+
+Sends ExportTraceServiceRequest batches at --rate spans/s for --duration seconds
+and reports:
+
+  - offered vs accepted spans/s and the latency of one export request,
+  - refusals: 429/503 are the memory_limiter pushing back, any other status
+    or a connection error is a failure,
+  - whether the senders kept their schedule; falling behind without refusals
+    means the generator, not the collector, is the limit (add --senders),
+  - with --metrics-url (the collector's own telemetry on :8888/metrics), the
+    receiver accepted/refused and exporter sent/failed span counters over the
+    run, i.e. the share of spans the tail-sampling policies kept.
+
+Traces are shaped like the pipeline: --spans-per-trace spans from service-a,
+-b and -c, one under the other. --error-ratio of the traces end in an ERROR
+span and --slow-ratio last --slow-ms, so the errors/slow policies have
+something to keep. The run passes (exit 0) when the accepted rate reaches
+--min-ratio of --rate without refusals or failures.
+
+Examples (kubectl port-forward ds/otel-collector 4318 8888):
+  python spanload.py --url http://localhost:4318/v1/traces --rate 5000 --duration 60
+  python spanload.py --rate 20000 --senders 4 --metrics-url http://localhost:8888/metrics --out spans.json
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.proto.trace.v1.trace_pb2 import Span, Status
+
+from loadgen import summarize
+
+SERVICES = ("service-a", "service-b", "service-c")
+REFUSED = (429, 503)
+COLLECTOR_COUNTERS = (
+    "otelcol_receiver_accepted_spans",
+    "otelcol_receiver_refused_spans",
+    "otelcol_exporter_sent_spans",
+    "otelcol_exporter_send_failed_spans",
+)
+
+
+class BatchBuilder:
+    """One request template per sender; ids, timestamps and status are rewritten for every batch."""
+
+    def __init__(self, traces: int, spans_per_trace: int, args):
+        self.args = args
+        self.rng = random.Random()
+        self.request = ExportTraceServiceRequest()
+        self.traces = []  # per trace: its spans, root first
+        per_service = []
+        for name in SERVICES:
+            resource_spans = self.request.resource_spans.add()
+            attr = resource_spans.resource.attributes.add()
+            attr.key, attr.value.string_value = "service.name", name
+            scope = resource_spans.scope_spans.add()
+            scope.scope.name = "spanload"
+            per_service.append(scope)
+        for _ in range(traces):
+            spans = []
+            for depth in range(spans_per_trace):
+                span = per_service[min(depth, len(SERVICES) - 1)].spans.add()
+                span.name = f"span-{depth}"
+                span.kind = Span.SPAN_KIND_SERVER if depth == 0 else Span.SPAN_KIND_INTERNAL
+                attr = span.attributes.add()
+                attr.key, attr.value.string_value = "http.route", "/start"
+                spans.append(span)
+            self.traces.append(spans)
+
+    def build(self) -> tuple[bytes, int, int]:
+        """Serialized batch, and how many of its traces are errors and slow."""
+        args, rng = self.args, self.rng
+        now = time.time_ns()
+        errors = slow = 0
+        for spans in self.traces:
+            trace_id = rng.randbytes(16)
+            is_error = rng.random() < args.error_ratio
+            is_slow = rng.random() < args.slow_ratio
+            errors += is_error
+            slow += is_slow
+            duration = (args.slow_ms if is_slow else args.span_ms) * 1_000_000
+            parent = b""
+            for depth, span in enumerate(spans):
+                span.trace_id = trace_id
+                span.span_id = rng.randbytes(8)
+                span.parent_span_id = parent
+                parent = span.span_id
+                span.start_time_unix_nano = now - duration + depth * 1000
+                span.end_time_unix_nano = now - depth * 1000
+                last = depth == len(spans) - 1
+                span.status.code = Status.STATUS_CODE_ERROR if is_error and last else Status.STATUS_CODE_UNSET
+        return self.request.SerializeToString(), errors, slow
+
+
+class Sender(threading.Thread):
+    """Sends one batch every `interval` seconds (open loop) and records what the collector answered."""
+
+    def __init__(self, args, interval: float, stop_at: float):
+        super().__init__(daemon=True)
+        self.args, self.interval, self.stop_at = args, interval, stop_at
+        self.builder = BatchBuilder(args.batch_spans // args.spans_per_trace, args.spans_per_trace, args)
+        self.spans_per_batch = len(self.builder.traces) * args.spans_per_trace
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.latencies, self.statuses = [], {}
+        self.sent = self.accepted = self.refused = self.failed = self.errors = self.slow = 0
+        self.late = 0  # batches started more than one interval after their scheduled time
+
+    def run(self):
+        headers = {"Content-Type": "application/x-protobuf"}
+        if self.args.gzip:
+            headers["Content-Encoding"] = "gzip"
+        scheduled = time.perf_counter() + random.random() * self.interval  # spread the senders
+        while time.time() < self.stop_at:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > self.interval:
+                self.late += 1
+            body, errors, slow = self.builder.build()
+            if self.args.gzip:
+                body = gzip.compress(body, compresslevel=1)
+            start = time.perf_counter()
+            try:
+                status = self.session.post(self.args.url, data=body, headers=headers, timeout=self.args.timeout).status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            latency = time.perf_counter() - start
+            with self.lock:
+                self.sent += self.spans_per_batch
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if status == 200:
+                    self.accepted += self.spans_per_batch
+                    self.errors += errors
+                    self.slow += slow
+                    self.latencies.append(latency)
+                elif status in REFUSED:
+                    self.refused += self.spans_per_batch
+                else:
+                    self.failed += self.spans_per_batch
+            scheduled += self.interval
+
+
+def scrape(url: str) -> dict[str, float]:
+    """Sum of every series of the COLLECTOR_COUNTERS (with or without the _total suffix) in a Prometheus text page."""
+    totals = dict.fromkeys(COLLECTOR_COUNTERS, 0.0)
+    for line in requests.get(url, timeout=5).text.splitlines():
+        if line.startswith("#") or not line.strip():
+            continue
+        name = line.split("{", 1)[0].split(" ", 1)[0].removesuffix("_total")
+        if name in totals:
+            totals[name] += float(line.rsplit(" ", 1)[-1])
+    return totals
+
+
+def build_report(args, senders: list[Sender], elapsed: float, counters: dict | None) -> dict:
+    def total(attr):
+        return sum(getattr(s, attr) for s in senders)
+
+    statuses = {}
+    for sender in senders:
+        for status, count in sender.statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    accepted_rate = total("accepted") / elapsed
+    traces = total("accepted") / args.spans_per_trace
+    report = {
+        "target_spans_per_s": args.rate,
+        "duration_s": elapsed,
+        "sent_spans": total("sent"),
+        "accepted_spans": total("accepted"),
+        "refused_spans": total("refused"),
+        "failed_spans": total("failed"),
+        "accepted_spans_per_s": accepted_rate,
+        "late_batches": total("late"),
+        "statuses": statuses,
+        "request_latency_s": summarize([l for s in senders for l in s.latencies]),
+        # what the sampling policies should keep at least: error and slow traces, plus the baseline share of the rest
+        "error_traces": total("errors"),
+        "slow_traces": total("slow"),
+        "accepted_traces": traces,
+        "passed": total("refused") == 0 and total("failed") == 0 and accepted_rate >= args.min_ratio * args.rate,
+    }
+    if counters is not None:
+        report["collector"] = counters
+        received = counters["otelcol_receiver_accepted_spans"]
+        if received:
+            report["collector_kept_share"] = counters["otelcol_exporter_sent_spans"] / received
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"target {report['target_spans_per_s']:.0f} spans/s for {report['duration_s']:.1f}s:"
+          f" accepted {report['accepted_spans_per_s']:.0f} spans/s"
+          f" (sent={report['sent_spans']} accepted={report['accepted_spans']}"
+          f" refused={report['refused_spans']} failed={report['failed_spans']})")
+    latency = report["request_latency_s"]
+    if latency["count"]:
+        print("request latency  " + "  ".join(f"{k}={latency[k] * 1000:.1f}ms" for k in ("p50", "p95", "p99", "max")))
+    print(f"statuses {report['statuses']}, late batches {report['late_batches']}")
+    if report["late_batches"] and not report["refused_spans"] and not report["failed_spans"]:
+        print("senders fell behind schedule without refusals: the generator is the limit, add --senders")
+    print(f"traces accepted {report['accepted_traces']:.0f}: {report['error_traces']} with errors, {report['slow_traces']} slow")
+    if "collector" in report:
+        counters = report["collector"]
+        print("collector " + " ".join(f"{k.removeprefix('otelcol_')}={v:.0f}" for k, v in counters.items()))
+        if "collector_kept_share" in report:
+            print(f"spans exported / received by the collector: {report['collector_kept_share']:.1%}")
+    print("PASS" if report["passed"] else "FAIL")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Offer spans/s to a collector's OTLP/HTTP receiver and check it keeps up")
+    p.add_argument("--url", default=os.getenv("SPANLOAD_URL", "http://localhost:4318/v1/traces"))
+    p.add_argument("--rate", type=float, default=5000, help="target spans per second")
+    p.add_argument("--duration", type=float, default=30)
+    p.add_argument("--senders", type=int, default=2, help="sending threads (one request in flight each)")
+    p.add_argument("--batch-spans", type=int, default=512, help="spans per export request")
+    p.add_argument("--spans-per-trace", type=int, default=3)
+    p.add_argument("--span-ms", type=float, default=20, help="duration of a normal trace")
+    p.add_argument("--slow-ms", type=float, default=2000, help="duration of a slow trace")
+    p.add_argument("--error-ratio", type=float, default=0.01)
+    p.add_argument("--slow-ratio", type=float, default=0.01)
+    p.add_argument("--no-gzip", dest="gzip", action="store_false", help="send uncompressed (services send gzip)")
+    p.add_argument("--timeout", type=float, default=10)
+    p.add_argument("--min-ratio", type=float, default=0.95, help="accepted/target rate needed to pass")
+    p.add_argument("--metrics-url", default=None, help="collector telemetry, e.g. http://localhost:8888/metrics")
+    p.add_argument("--settle", type=float, default=15,
+                   help="seconds to wait before the final scrape (tail sampling decides after decision_wait)")
+    p.add_argument("--out", default=None, help="write the JSON report here")
+    args = p.parse_args()
+    if args.batch_spans < args.spans_per_trace:
+        p.error("--batch-spans must hold at least one trace")
+
+    before = scrape(args.metrics_url) if args.metrics_url else None
+    spans_per_batch = args.batch_spans // args.spans_per_trace * args.spans_per_trace
+    interval = spans_per_batch * args.senders / args.rate
+    start = time.time()
+    senders = [Sender(args, interval, start + args.duration) for _ in range(args.senders)]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    elapsed = time.time() - start
+
+    counters = None
+    if args.metrics_url:
+        time.sleep(args.settle)
+        after = scrape(args.metrics_url)
+        counters = {name: after[name] - before[name] for name in COLLECTOR_COUNTERS}
+
+    report = build_report(args, senders, elapsed, counters)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import hmac
+import json
+import uuid
+import logging
+from flask import Flask, Response, request
+import redis
+
+from opentelemetry.instrumentation.flask import FlaskInstrumentor
+from opentelemetry.propagate import inject
+from common import setup_tracing, setup_metrics
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "script-runner")
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_QUEUE = os.getenv("REDIS_QUEUE", "script-tasks")
+RESULT_PREFIX = os.getenv("RESULT_PREFIX", "script-results:")
+DEFAULT_TIMEOUT = float(os.getenv("DEFAULT_TIMEOUT", "60"))
+# extra time a task may wait in the queue before the HTTP call gives up
+QUEUE_GRACE = float(os.getenv("QUEUE_GRACE", "30"))
+# shared token callers send as X-Script-Token; /run executes arbitrary Python, so it refuses everything while unset
+RUN_TOKEN = os.getenv("SCRIPT_RUNNER_TOKEN")
+
+app = Flask(__name__)
+
+tracer = setup_tracing(SERVICE_NAME)
+setup_metrics(SERVICE_NAME)
+FlaskInstrumentor().instrument_app(app)
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+
+
+def _run_authorized(headers) -> bool:
+    return bool(RUN_TOKEN) and hmac.compare_digest(headers.get("X-Script-Token", ""), RUN_TOKEN)
+
+
+@app.route("/run", methods=["POST"])
+def run():
+    """Queue a script for the worker pool and block until its result comes back.
+
+    Body: {"source": "...", "output": "/tmp/message.txt" (optional), "timeout": 30}
+    200 + output file content (stdout when no output path) on exit code 0,
+    500 + stderr otherwise, 504 when no worker answered in time.
+    Requires the X-Script-Token header to match SCRIPT_RUNNER_TOKEN (403 otherwise, also when it is unset).
+    """
+    if not _run_authorized(request.headers):
+        if not RUN_TOKEN:
+            logger.warning("Refusing /run: SCRIPT_RUNNER_TOKEN is not configured")
+        return Response("forbidden", status=403, mimetype="text/plain")
+    body = request.get_json(force=True) or {}
+    if not body.get("source"):
+        return Response("missing source", status=400, mimetype="text/plain")
+
+    task_id = uuid.uuid4().hex
+    timeout = float(body.get("timeout") or DEFAULT_TIMEOUT)
+    logger.info("Queueing script task %s", task_id)
+
+    carrier = {}
+    inject(carrier)
+    envelope = {
+        "id": task_id,
+        "task": {"source": body["source"], "output": body.get("output"), "timeout": timeout},
+        "otel_context": carrier,
+    }
+    redis_client.lpush(REDIS_QUEUE, json.dumps(envelope))
+
+    popped = redis_client.blpop(RESULT_PREFIX + task_id, timeout=int(timeout + QUEUE_GRACE))
+    if popped is None:
+        logger.warning("Script task %s timed out waiting for a worker", task_id)
+        return Response("timed out waiting for a worker", status=504, mimetype="text/plain")
+
+    result = json.loads(popped[1])
+    if result["exit_code"] != 0:
+        return Response(result["stderr"], status=500, mimetype="text/plain")
+    return Response(result["output"], status=200, mimetype="text/plain")
+
+
+@app.route("/healthz")
+def healthz():
+    return Response("ok", mimetype="text/plain")
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=8000, threaded=True)
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import logging
+import tempfile
+import threading
+import subprocess
+import redis
+
+from opentelemetry.propagate import extract
+from common import setup_tracing, setup_metrics
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "script-runner-worker")
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_QUEUE = os.getenv("REDIS_QUEUE", "script-tasks")
+RESULT_PREFIX = os.getenv("RESULT_PREFIX", "script-results:")
+RESULT_TTL = int(os.getenv("RESULT_TTL", "300"))
+CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+
+tracer = setup_tracing(SERVICE_NAME)
+setup_metrics(SERVICE_NAME)
+logger = logging.getLogger(__name__)
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+
+
+def run_task(task: dict) -> dict:
+    """Run one script in a scratch directory; its output path is redirected there."""
+    with tempfile.TemporaryDirectory() as workdir:
+        source = task["source"]
+        output = task.get("output")
+        local_output = None
+        if output:
+            local_output = os.path.join(workdir, os.path.basename(output))
+            source = source.replace(output, local_output)
+
+        script = os.path.join(workdir, "script.py")
+        with open(script, "w") as f:
+            f.write(source)
+
+        try:
+            proc = subprocess.run(
+                [sys.executable, script], cwd=workdir, capture_output=True, text=True, timeout=task["timeout"]
+            )
+        except subprocess.TimeoutExpired:
+            return {"exit_code": -1, "output": "", "stderr": f"script exceeded {task['timeout']}s"}
+
+        if local_output and os.path.exists(local_output):
+            with open(local_output) as f:
+                value = f.read()
+        else:
+            value = proc.stdout.strip()
+        return {"exit_code": proc.returncode, "output": value, "stderr": proc.stderr[-4000:]}
+
+
+def main_loop():
+    while True:
+        _, raw = redis_client.brpop(REDIS_QUEUE)
+        try:
+            envelope = json.loads(raw)
+            task_id = envelope["id"]
+            if not isinstance(task_id, str) or not task_id:
+                raise ValueError(f"invalid task id {task_id!r}")
+            ctx = extract(envelope.get("otel_context") or {})
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # nobody can be answered without an id; drop the item instead of the worker thread
+            logger.exception("Dropping malformed script task %r", raw[:200])
+            continue
+
+        with tracer.start_as_current_span("run-script", context=ctx) as span:
+            try:
+                result = run_task(envelope["task"])
+            except Exception as e:
+                logger.exception("Script task %s could not be run", task_id)
+                result = {"exit_code": -1, "output": "", "stderr": f"worker could not run the task: {type(e).__name__}: {e}"}
+            span.set_attribute("script.exit_code", result["exit_code"])
+            logger.info("Script task %s finished with exit code %s", task_id, result["exit_code"])
+
+        key = RESULT_PREFIX + task_id
+        pipe = redis_client.pipeline()
+        pipe.lpush(key, json.dumps(result))
+        pipe.expire(key, RESULT_TTL)
+        pipe.execute()
+
+
+if __name__ == "__main__":
+    logger.info("Script runner worker started with %d slots, waiting for tasks...", CONCURRENCY)
+    for _ in range(CONCURRENCY - 1):
+        threading.Thread(target=main_loop, daemon=True).start()
+    main_loop()
@@ -1,31 +1,127 @@
 import os
+import json
+import math
+import time
 import logging
-from flask import Flask, jsonify
+import threading
+from flask import Flask, jsonify, request
 import requests
+import redis
 
-from opentelemetry.instrumentation.flask import FlaskInstrumentor
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-
-from common import setup_tracing, setup_metrics
+from common import Telemetry, register_admin
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "service-a")
 SERVICE_B_URL = os.getenv("SERVICE_B_URL", "http://service-b:8000/process")
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# service-c stores task results under RESULT_KEY_PREFIX + id and publishes the id here; empty (default) disables
+RESULTS_CHANNEL = os.getenv("RESULTS_CHANNEL", "")
+RESULT_KEY_PREFIX = "task-result:"
+RESULT_TTL_S = int(os.getenv("RESULT_TTL_S", "3600"))
+# upper bound of /start?wait=
+MAX_WAIT_S = float(os.getenv("MAX_WAIT_S", "30"))
 
 app = Flask(__name__)
 
-setup_tracing(SERVICE_NAME)
-setup_metrics(SERVICE_NAME)
-
-FlaskInstrumentor().instrument_app(app)
-RequestsInstrumentor().instrument()
+# tracing / metrics / log correlation, switchable at runtime via TELEMETRY_* or /admin/telemetry
+telemetry = Telemetry(SERVICE_NAME, app=app, instrument_requests=True)
+register_admin(app, telemetry)
 
 logger = logging.getLogger(__name__)
 
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+
+
+class ResultListener(threading.Thread):
+    """One subscription to RESULTS_CHANNEL for every waiting request; a published id wakes its waiter.
+
+    A waiter registers before it reads the result key, and service-c writes the key before it
+    publishes, so a notification sent before the registration is never lost: the key is already there.
+    """
+
+    def __init__(self, client: redis.Redis, channel: str):
+        super().__init__(daemon=True)
+        self.client = client
+        self.channel = channel
+        self.lock = threading.Lock()
+        self.waiters: dict[str, threading.Event] = {}
+
+    def run(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        while True:
+            try:
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    with self.lock:
+                        event = self.waiters.get(message["data"].decode())
+                    if event is not None:
+                        event.set()
+            except redis.ConnectionError:
+                # waiters missing a notification meanwhile still read the key when they time out
+                logger.warning("Result listener lost Redis, resubscribing")
+                time.sleep(1)
+
+    def wait(self, task_id: str, timeout: float) -> dict | None:
+        event = threading.Event()
+        with self.lock:
+            self.waiters[task_id] = event
+        try:
+            result = read_result(task_id)
+            if result is None or result["status"] == "pending":
+                event.wait(timeout)
+                result = read_result(task_id)
+            return result
+        finally:
+            with self.lock:
+                self.waiters.pop(task_id, None)
+
+
+def read_result(task_id: str) -> dict | None:
+    raw = redis_client.get(RESULT_KEY_PREFIX + task_id)
+    return json.loads(raw) if raw else None
+
+
+results = None
+if RESULTS_CHANNEL:
+    results = ResultListener(redis_client, RESULTS_CHANNEL)
+    results.start()
+
+
 @app.route("/start")
 def start():
+    wait = request.args.get("wait", type=float)  # None when absent or not a number
+    if "wait" in request.args and (wait is None or not math.isfinite(wait)):
+        return jsonify({"error": "wait must be a finite number of seconds"}), 400
+
     logger.info("Received request in service A, calling service B")
     resp = requests.post(SERVICE_B_URL, json={"payload": "hello-from-A"})
-    return jsonify({"status": "ok", "service_b_status": resp.json()}), resp.status_code
+    body = resp.json()
+    task_id = body.get("id")
+    reply = {"status": "ok", "service_b_status": body}
+    if results is None or resp.status_code != 200 or not task_id:
+        return jsonify(reply), resp.status_code
+
+    # marks the task as known for /status; NX keeps a result service-c may already have written
+    pending = {"id": task_id, "status": "pending"}
+    redis_client.set(RESULT_KEY_PREFIX + task_id, json.dumps(pending), ex=RESULT_TTL_S, nx=True)
+    status_url = f"/status/{task_id}"
+    if wait is None:
+        # callers that do not wait keep the plain 200 answer, plus where to poll for the result
+        return jsonify({**reply, "status_url": status_url}), 200
+
+    result = results.wait(task_id, min(max(wait, 0), MAX_WAIT_S))
+    if result is not None and result["status"] != "pending":
+        return jsonify({**result, "service_b_status": body}), 200
+    return jsonify({**pending, "status_url": status_url, "service_b_status": body}), 202, {"Location": status_url}
+
+
+@app.route("/status/<task_id>")
+def status(task_id: str):
+    result = read_result(task_id)
+    if result is None:
+        return jsonify({"id": task_id, "status": "unknown"}), 404
+    return jsonify(result), 202 if result["status"] == "pending" else 200
+
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000)
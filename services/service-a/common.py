@@ -1,57 +1,754 @@
+import os
+import copy
+import json
+import hmac
+import queue
+import atexit
+import random
+import time
 import logging
+import logging.handlers
+import threading
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
-from opentelemetry import trace, metrics
+import requests
+
+from opentelemetry import context, trace, metrics
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON, ParentBased, Sampler, TraceIdRatioBased
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.instrumentation.logging.constants import DEFAULT_LOGGING_FORMAT
+from opentelemetry.sdk.metrics import Counter, Histogram, MeterProvider, ObservableCounter
+from opentelemetry.sdk.metrics.export import (
+    AggregationTemporality, Gauge, HistogramDataPoint, MetricExporter, MetricExportResult, NumberDataPoint,
+    PeriodicExportingMetricReader, Sum,
+)
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
 from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
 
+# text output (LOG_JSON=false); the plain format is used while log correlation is off
+LOG_FORMAT = DEFAULT_LOGGING_FORMAT
+PLAIN_LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
 
-def setup_tracing(service_name: str, service_namespace: str | None = "otel-demo"):
+def setup_tracing(
+    service_name: str,
+    service_namespace: str | None = "otel-demo",
+    sampler: Sampler | None = None,
+    log_correlation: bool = True,
+):
     resource_attrs = {"service.name": service_name}
     if service_namespace:
         resource_attrs["service.namespace"] = service_namespace
 
     resource = Resource.create(resource_attrs)
 
-    provider = TracerProvider(resource=resource)
+    provider = TracerProvider(resource=resource, sampler=sampler)
 
-    # OTLP HTTP exporter to otel-collector inside the cluster
-    span_exporter = OTLPSpanExporter(endpoint="http://otel-collector:4318/v1/traces")
-    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    # OTLP exporter to otel-collector inside the cluster (transport and endpoint from the environment)
+    provider.add_span_processor(BatchSpanProcessor(otlp_exporter("traces")))
 
     trace.set_tracer_provider(provider)
 
-    # log correlation
-    LoggingInstrumentor().instrument(set_logging_format=True)
+    # log correlation: trace/span ids are added to each record when it is created
+    if log_correlation:
+        _instrument_logging()
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s "
-               "[service=%(otelServiceName)s trace_id=%(otelTraceID)s span_id=%(otelSpanID)s] "
-               "%(message)s",
-    )
+    setup_logging(service_name, correlation=log_correlation)
 
     return trace.get_tracer(service_name)
 
 
-def setup_metrics(service_name: str, service_namespace: str | None = "otel-demo"):
-    # Configure global MeterProvider + OTLP exporter so auto-instrumentation metrics are sent
+OTLP_COLLECTOR = "otel-collector"
+_OTLP_HTTP_PATHS = {"traces": "/v1/traces", "metrics": "/v1/metrics", "logs": "/v1/logs"}
+_EXPORT_DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+def _otlp_option(signal: str, name: str, default: str) -> str:
+    # per-signal variable first, then the shared one (same precedence as the SDK)
+    return os.getenv(f"OTEL_EXPORTER_OTLP_{signal.upper()}_{name}") or os.getenv(f"OTEL_EXPORTER_OTLP_{name}") or default
+
+
+def otlp_exporter(signal: str):
+    """OTLP exporter of "traces", "metrics" or "logs" to otel-collector, configured from the environment.
+
+    OTEL_EXPORTER_OTLP_PROTOCOL selects http/protobuf (default, port 4318) or grpc (port 4317),
+    OTEL_EXPORTER_OTLP_COMPRESSION gzip (default), deflate or none, and OTEL_EXPORTER_OTLP_TIMEOUT the
+    timeout of one export in seconds (default 10); each also has a per-signal variant such as
+    OTEL_EXPORTER_OTLP_TRACES_PROTOCOL. OTEL_EXPORTER_OTLP_TRACES_ENDPOINT (full URL) or
+    OTEL_EXPORTER_OTLP_ENDPOINT (base URL) override the collector address. HTTP exporters share one
+    keep-alive connection pool, a gRPC exporter keeps its channel open between exports.
+    """
+    protocol = _otlp_option(signal, "PROTOCOL", "http/protobuf").lower()
+    compression = _otlp_option(signal, "COMPRESSION", "gzip").lower()
+    timeout = float(_otlp_option(signal, "TIMEOUT", "10"))
+    endpoint = os.getenv(f"OTEL_EXPORTER_OTLP_{signal.upper()}_ENDPOINT")
+    base = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if protocol == "grpc":
+        if endpoint and endpoint.rstrip("/").endswith(_OTLP_HTTP_PATHS[signal]):
+            # an OTLP/HTTP URL (…:4318/v1/traces) left in the environment; gRPC needs the collector's 4317
+            logging.getLogger(__name__).warning("Ignoring HTTP endpoint %s of %s in grpc mode", endpoint, signal)
+            endpoint = None
+        exporter = _grpc_exporter(signal, endpoint or base or f"http://{OTLP_COLLECTOR}:4317", compression, timeout)
+    elif protocol == "http/protobuf":
+        if endpoint is None:
+            endpoint = (base or f"http://{OTLP_COLLECTOR}:4318").rstrip("/") + _OTLP_HTTP_PATHS[signal]
+        exporter = _http_exporter(signal, endpoint, compression, timeout)
+    else:
+        raise ValueError(f"OTLP protocol of {signal}: expected http/protobuf or grpc, got {protocol!r}")
+    return _time_exports(exporter, signal, protocol)
+
+
+_otlp_session: requests.Session | None = None
+
+
+def _http_exporter(signal: str, endpoint: str, compression: str, timeout: float):
+    from opentelemetry.exporter.otlp.proto.http import Compression
+
+    global _otlp_session
+    if _otlp_session is None:
+        # one keep-alive pool to the collector for the trace, metric and log exporters (one thread each)
+        _otlp_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=len(_OTLP_HTTP_PATHS))
+        _otlp_session.mount("http://", adapter)
+        _otlp_session.mount("https://", adapter)
+    kwargs = dict(endpoint=endpoint, timeout=timeout, compression=Compression(compression), session=_otlp_session)
+    if signal == "traces":
+        return OTLPSpanExporter(**kwargs)
+    if signal == "metrics":
+        return OTLPMetricExporter(**kwargs)
+    from opentelemetry.exporter.otlp.proto.http._log_exporter import OTLPLogExporter
+
+    return OTLPLogExporter(**kwargs)
+
+
+def _grpc_exporter(signal: str, endpoint: str, compression: str, timeout: float):
+    # imported here so the default HTTP transport does not load grpc
+    import grpc
+
+    kwargs = dict(
+        endpoint=endpoint,
+        insecure=endpoint.startswith("http://"),
+        timeout=timeout,
+        compression={"gzip": grpc.Compression.Gzip, "deflate": grpc.Compression.Deflate,
+                     "none": grpc.Compression.NoCompression}[compression],
+    )
+    if signal == "traces":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter as GrpcSpanExporter
+
+        return GrpcSpanExporter(**kwargs)
+    if signal == "metrics":
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter as GrpcMetricExporter
+
+        return GrpcMetricExporter(**kwargs)
+    from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter as GrpcLogExporter
+
+    return GrpcLogExporter(**kwargs)
+
+
+_export_instruments = None
+
+
+def _time_exports(exporter, signal: str, protocol: str):
+    """Records otlp.exporter.export.duration (s, by outcome) and otlp.exporter.export.failures per export call.
+
+    The instruments come from the global meter provider, so they record once setup_metrics() has run;
+    the duration includes the exporter's own retries.
+    """
+    global _export_instruments
+    if _export_instruments is None:
+        meter = metrics.get_meter(__name__)
+        _export_instruments = (
+            meter.create_histogram(
+                "otlp.exporter.export.duration", unit="s", description="Duration of OTLP export calls",
+                explicit_bucket_boundaries_advisory=_EXPORT_DURATION_BUCKETS,
+            ),
+            meter.create_counter(
+                "otlp.exporter.export.failures", unit="{export}", description="OTLP export calls that failed"
+            ),
+        )
+    duration, failures = _export_instruments
+    attrs = {"signal": signal, "protocol": protocol}
+    export = exporter.export
+
+    def timed_export(*args, **kwargs):
+        start = time.perf_counter()
+        result = None
+        try:
+            result = export(*args, **kwargs)
+            return result
+        finally:
+            # Span/Metric/LogExportResult all call their success member SUCCESS
+            ok = result is not None and result.name == "SUCCESS"
+            duration.record(time.perf_counter() - start, {**attrs, "outcome": "success" if ok else "failure"})
+            if not ok:
+                failures.add(1, attrs)
+
+    exporter.export = timed_export
+    return exporter
+
+
+def _instrument_logging():
+    # no basicConfig (setup_logging owns the root handlers) and no synchronous SDK handler on the root logger
+    LoggingInstrumentor().instrument(
+        set_logging_format=False, inject_trace_context=True, enable_log_auto_instrumentation=False
+    )
+
+
+_OTEL_DEFAULTS = {"otelTraceID": "0", "otelSpanID": "0", "otelServiceName": "", "otelTraceSampled": False}
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "otel_context"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, msg, trace fields (when correlated) and `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "otelTraceID", "0")
+        if trace_id != "0":
+            out.update(trace_id=trace_id, span_id=record.otelSpanID, trace_sampled=record.otelTraceSampled)
+        if getattr(record, "otelServiceName", None):
+            out["service"] = record.otelServiceName
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith("otel"):
+                out[key] = value
+        if record.exc_text:
+            out["exception"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class TraceAwareSampler(logging.Filter):
+    """Keeps WARNING and above, and every record of a sampled trace; other INFO/DEBUG records with `ratio`.
+
+    The decision for records inside an unsampled trace is derived from the trace id, so a trace
+    keeps all or none of its logs.
+    """
+
+    def __init__(self, ratio: float):
+        super().__init__()
+        self.ratio = ratio
+        self.threshold = int(ratio * (1 << 32))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.ratio >= 1:
+            return True
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.trace_flags.sampled:
+            return True
+        if span_context.is_valid:
+            return (span_context.trace_id & 0xFFFFFFFF) < self.threshold
+        return random.random() < self.ratio
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues without waiting: when the queue is full the record is dropped and counted."""
+
+    def __init__(self, log_queue: queue.Queue, capture_context: bool):
+        super().__init__(log_queue)
+        self.capture_context = capture_context
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # resolve what may change or go away after the call (args, traceback, context); format in the listener
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if self.capture_context:
+            record.otel_context = context.get_current()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"log queue full, dropped {self.dropped} record(s)",
+                }))
+                # reset only once the warning is queued; if it did not fit, the count carries over
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _ContextLoggingHandler(logging.Handler):
+    """Runs the OTel SDK LoggingHandler in the listener thread under the context captured at the call."""
+
+    def __init__(self, handler: logging.Handler):
+        super().__init__()
+        self.handler = handler
+
+    def emit(self, record: logging.LogRecord):
+        ctx = getattr(record, "otel_context", None)
+        record = copy.copy(record)
+        record.__dict__.pop("otel_context", None)
+        token = context.attach(ctx) if ctx is not None else None
+        try:
+            self.handler.emit(record)
+        finally:
+            if token is not None:
+                context.detach(token)
+
+
+class LogPipeline:
+    """Root logging through a bounded queue: request threads only enqueue, a listener thread formats and writes.
+
+    LOG_JSON (default true) selects JSON lines over the text format on stderr, LOG_STREAM=false turns that
+    output off, LOG_INFO_SAMPLE_RATIO samples INFO/DEBUG outside sampled traces (TraceAwareSampler),
+    LOG_QUEUE_SIZE bounds the queue, and LOG_OTLP=true additionally exports records over OTLP
+    (otlp_exporter("logs")) with a batching processor.
+    """
+
+    def __init__(self, service_name: str, correlation: bool = True):
+        self.json_output = os.getenv("LOG_JSON", "true").lower() == "true"
+        otlp = os.getenv("LOG_OTLP", "false").lower() == "true"
+        handlers = []
+        self.stream = None
+        if os.getenv("LOG_STREAM", "true").lower() == "true":
+            self.stream = logging.StreamHandler()
+            handlers.append(self.stream)
+        if otlp:
+            handlers.append(_ContextLoggingHandler(self._otlp_handler(service_name)))
+        self.set_correlation(correlation)
+
+        self.queue = queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        self.handler = NonBlockingQueueHandler(self.queue, capture_context=otlp)
+        self.handler.addFilter(TraceAwareSampler(float(os.getenv("LOG_INFO_SAMPLE_RATIO", "1"))))
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(logging.INFO)
+
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)  # drains the queue before the interpreter exits
+
+    def set_correlation(self, enabled: bool):
+        if self.stream is None:
+            return
+        if self.json_output:
+            self.stream.setFormatter(JsonFormatter())
+        else:
+            # defaults: records queued before a switch may lack the otel* attributes
+            self.stream.setFormatter(logging.Formatter(LOG_FORMAT if enabled else PLAIN_LOG_FORMAT, defaults=_OTEL_DEFAULTS))
+
+    @staticmethod
+    def _otlp_handler(service_name: str) -> logging.Handler:
+        # the logs SDK is still underscore-private upstream; only imported when LOG_OTLP is on
+        from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+        from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+
+        provider = LoggerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_log_record_processor(BatchLogRecordProcessor(otlp_exporter("logs")))
+        return LoggingHandler(logger_provider=provider)
+
+
+_log_pipeline: LogPipeline | None = None
+
+
+def setup_logging(service_name: str, correlation: bool = True) -> LogPipeline:
+    """Install the queue-backed root logging once per process (later calls return the same pipeline)."""
+    global _log_pipeline
+    if _log_pipeline is None:
+        _log_pipeline = LogPipeline(service_name, correlation)
+    return _log_pipeline
+
+
+def setup_metrics(
+    service_name: str,
+    service_namespace: str | None = "otel-demo",
+    exporter: MetricExporter | None = None,
+    views: list[View] | None = None,
+    temporality: str | None = None,
+    export_interval_ms: float | None = None,
+    cardinality_limit: int | None = None,
+):
+    """Global MeterProvider exporting over OTLP so auto-instrumentation metrics are sent.
+
+    views default to default_views(); temporality is "cumulative" or "delta" (None: the exporter's
+    preference, OTEL_EXPORTER_OTLP_METRICS_TEMPORALITY_PREFERENCE); export_interval_ms defaults to
+    OTEL_METRIC_EXPORT_INTERVAL (60 s); cardinality_limit caps the series per metric (default
+    METRIC_CARDINALITY_LIMIT, 2000; 0 turns the cap off), see CardinalityLimitingExporter.
+    """
     resource_attrs = {"service.name": service_name}
     if service_namespace:
         resource_attrs["service.namespace"] = service_namespace
 
     resource = Resource.create(resource_attrs)
 
-    metric_exporter = OTLPMetricExporter(endpoint="http://otel-collector:4318/v1/metrics")
-    reader = PeriodicExportingMetricReader(metric_exporter)
+    if cardinality_limit is None:
+        cardinality_limit = int(os.getenv("METRIC_CARDINALITY_LIMIT", "2000"))
+    metric_exporter = CardinalityLimitingExporter(
+        exporter or otlp_exporter("metrics"), cardinality_limit, _temporality_preference(temporality)
+    )
+    reader = PeriodicExportingMetricReader(metric_exporter, export_interval_millis=export_interval_ms)
 
-    meter_provider = MeterProvider(resource=resource, metric_readers=[reader])
+    meter_provider = MeterProvider(
+        resource=resource, metric_readers=[reader], views=default_views() if views is None else views
+    )
     metrics.set_meter_provider(meter_provider)
 
     meter = metrics.get_meter(service_name)
+    meter.create_observable_gauge(
+        "otel.metric.overflow.series", callbacks=[metric_exporter.observe_overflow], unit="{series}",
+        description="Series folded into the otel.metric.overflow point of a metric at the last export",
+    )
     return meter
+
+
+HTTP_METRIC_ATTRIBUTES = "http.method,http.request.method,http.status_code,http.response.status_code,error.type"
+LATENCY_BUCKETS_MS = "1,2.5,5,10,25,50,100,250,500,1000,2500,5000,10000"
+
+
+def default_views() -> list[View]:
+    """Views for the auto-instrumented HTTP metrics: an attribute allow-list and latency buckets.
+
+    Only the METRIC_HTTP_ATTRIBUTES (comma separated) are kept on the http.* duration and active
+    request metrics, so host, port, server name, target/route and URL attributes no longer split
+    series. Duration histograms use METRIC_LATENCY_BUCKETS_MS as boundaries (divided by 1000 for
+    instruments in seconds).
+    """
+    keys = {key.strip() for key in os.getenv("METRIC_HTTP_ATTRIBUTES", HTTP_METRIC_ATTRIBUTES).split(",") if key.strip()}
+    buckets_ms = [float(b) for b in os.getenv("METRIC_LATENCY_BUCKETS_MS", LATENCY_BUCKETS_MS).split(",")]
+    return [
+        View(instrument_name="http.*duration", instrument_unit="ms", attribute_keys=keys,
+             aggregation=ExplicitBucketHistogramAggregation(buckets_ms)),
+        View(instrument_name="http.*duration", instrument_unit="s", attribute_keys=keys,
+             aggregation=ExplicitBucketHistogramAggregation([b / 1000 for b in buckets_ms])),
+        View(instrument_name="http.*.active_requests", attribute_keys=keys),
+    ]
+
+
+def _temporality_preference(temporality: str | None) -> dict | None:
+    if temporality is None:
+        return None
+    if temporality == "cumulative":
+        return {}  # MetricExporter fills in CUMULATIVE for every instrument type
+    if temporality == "delta":
+        # up-down counters stay cumulative, like the SDK's "delta" preference
+        return {kind: AggregationTemporality.DELTA for kind in (Counter, Histogram, ObservableCounter)}
+    raise ValueError(f"temporality: expected cumulative or delta, got {temporality!r}")
+
+
+OVERFLOW_ATTRIBUTES = {"otel.metric.overflow": True}
+
+
+class CardinalityLimitingExporter(MetricExporter):
+    """Caps the series (attribute sets) exported per metric; the rest is folded into one overflow point.
+
+    The first `limit` - 1 attribute sets seen for a metric keep their series for the life of the
+    process, so exported series stay stable. Points of any further set are merged into one point
+    with otel.metric.overflow=true: sums and histogram buckets add up, a gauge keeps the latest value.
+    The number of folded series per metric is reported by observe_overflow() and logged once.
+    """
+
+    def __init__(self, exporter: MetricExporter, limit: int, preferred_temporality: dict | None = None):
+        super().__init__(
+            preferred_temporality=exporter._preferred_temporality if preferred_temporality is None else preferred_temporality,
+            preferred_aggregation=exporter._preferred_aggregation,
+        )
+        self.exporter = exporter
+        self.limit = limit
+        self.admitted = {}  # (scope, metric) -> attribute sets with a series of their own
+        self.overflow = {}  # metric -> series folded at the last export
+
+    def export(self, metrics_data, timeout_millis: float = 10_000, **kwargs):
+        if self.limit > 0:
+            metrics_data = replace(metrics_data, resource_metrics=[
+                replace(rm, scope_metrics=[
+                    replace(sm, metrics=[self._limit(sm.scope.name, metric) for metric in sm.metrics])
+                    for sm in rm.scope_metrics
+                ])
+                for rm in metrics_data.resource_metrics
+            ])
+        return self.exporter.export(metrics_data, timeout_millis=timeout_millis, **kwargs)
+
+    def _limit(self, scope: str, metric):
+        admitted = self.admitted.setdefault((scope, metric.name), set())
+        kept, folded = [], []
+        for point in metric.data.data_points:
+            attrs = frozenset((point.attributes or {}).items())
+            if attrs in admitted or len(admitted) < self.limit - 1:  # one series is left for the overflow
+                admitted.add(attrs)
+                kept.append(point)
+            else:
+                folded.append(point)
+        if folded and metric.name not in self.overflow:
+            logging.getLogger(__name__).warning(
+                "Metric %s exceeds %d series, further attribute sets go to otel.metric.overflow", metric.name, self.limit
+            )
+        if folded or metric.name in self.overflow:
+            self.overflow[metric.name] = len(folded)
+        if not folded:
+            return metric
+        merged = _merge_points(metric.data, folded)
+        if merged is not None:
+            kept.append(merged)
+        return replace(metric, data=replace(metric.data, data_points=kept))
+
+    def observe_overflow(self, options):
+        return [metrics.Observation(count, {"metric": name}) for name, count in list(self.overflow.items())]
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs) -> None:
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
+
+
+def _merge_points(data, points):
+    """One overflow point from points of the same metric (None for exponential histograms, which are dropped)."""
+    first = points[0]
+    times = dict(start_time_unix_nano=min(p.start_time_unix_nano for p in points),
+                 time_unix_nano=max(p.time_unix_nano for p in points))
+    if isinstance(data, Gauge):
+        return replace(max(points, key=lambda p: p.time_unix_nano), attributes=OVERFLOW_ATTRIBUTES, exemplars=[])
+    if isinstance(data, Sum) and isinstance(first, NumberDataPoint):
+        return replace(first, attributes=OVERFLOW_ATTRIBUTES, exemplars=[], value=sum(p.value for p in points), **times)
+    if isinstance(first, HistogramDataPoint):
+        return replace(
+            first, attributes=OVERFLOW_ATTRIBUTES, exemplars=[], **times,
+            count=sum(p.count for p in points),
+            sum=sum(p.sum for p in points),
+            bucket_counts=[sum(counts) for counts in zip(*(p.bucket_counts for p in points))],
+            min=min(p.min for p in points),
+            max=max(p.max for p in points),
+        )
+    return None
+
+
+class SwitchableSampler(Sampler):
+    """Sampler whose decision can be replaced at runtime: on, off or a trace-id ratio (parent-based)."""
+
+    def __init__(self):
+        self.delegate = ParentBased(ALWAYS_ON)
+
+    def set(self, traces):
+        if traces == "off":
+            self.delegate = ALWAYS_OFF
+        elif traces == "on":
+            self.delegate = ParentBased(ALWAYS_ON)
+        else:
+            self.delegate = ParentBased(TraceIdRatioBased(traces))
+
+    def should_sample(self, *args, **kwargs):
+        return self.delegate.should_sample(*args, **kwargs)
+
+    def get_description(self):
+        return f"Switchable{{{self.delegate.get_description()}}}"
+
+
+class SwitchableMetricExporter(MetricExporter):
+    """Drops exports (no serialization, no request) while metrics are off."""
+
+    def __init__(self, exporter: MetricExporter):
+        super().__init__(
+            preferred_temporality=exporter._preferred_temporality,
+            preferred_aggregation=exporter._preferred_aggregation,
+        )
+        self.exporter = exporter
+        self.enabled = True
+
+    def export(self, metrics_data, timeout_millis: float = 10_000, **kwargs):
+        if not self.enabled:
+            return MetricExportResult.SUCCESS
+        return self.exporter.export(metrics_data, timeout_millis=timeout_millis, **kwargs)
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs) -> None:
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
+
+
+def parse_switch(name: str, value) -> str | float:
+    """'on'/'off' for every signal; traces also take a sampling ratio between 0 and 1."""
+    value = str(value).strip().lower()
+    if value in ("on", "off"):
+        return value
+    if name == "traces":
+        try:
+            ratio = float(value)
+        except ValueError:
+            ratio = -1.0
+        if 0 <= ratio <= 1:
+            return "off" if ratio == 0 else "on" if ratio == 1 else ratio
+    raise ValueError(f"{name}: expected on/off{' or a ratio in [0, 1]' if name == 'traces' else ''}, got {value!r}")
+
+
+class Telemetry:
+    """Runtime switches for tracing, metrics and log correlation of one service.
+
+    Initial values come from TELEMETRY_TRACES (on/off/ratio), TELEMETRY_METRICS and
+    TELEMETRY_LOGS (on/off); register_admin()/serve_admin() change them without a
+    restart. Hot paths check `tracing` before injecting or extracting context and
+    `metering` before recording the service's own instruments.
+    The Flask/requests instrumentors are removed while both traces and metrics are
+    off, so a fully disabled service runs the plain request path (requests in
+    flight at that moment may lose their span). With metrics off but traces on,
+    their HTTP duration histograms and the otlp.exporter.* instruments keep
+    aggregating in memory; only the export is dropped.
+    """
+
+    SIGNALS = ("traces", "metrics", "logs")
+
+    def __init__(self, service_name: str, app=None, instrument_requests: bool = False):
+        self.app = app
+        self.instrument_requests = instrument_requests
+        self.lock = threading.Lock()
+        self.state = {name: parse_switch(name, os.getenv(f"TELEMETRY_{name.upper()}", "on")) for name in self.SIGNALS}
+        self.tracing = self.state["traces"] != "off"
+        self.metering = self.state["metrics"] == "on"
+        self.instrumented = None  # first _apply_instrumentors() always runs, Flask must be instrumented before serving
+
+        self.sampler = SwitchableSampler()
+        self.sampler.set(self.state["traces"])
+        self.tracer = setup_tracing(service_name, sampler=self.sampler, log_correlation=self.state["logs"] == "on")
+        self.metric_exporter = SwitchableMetricExporter(otlp_exporter("metrics"))
+        self.metric_exporter.enabled = self.state["metrics"] == "on"
+        self.meter = setup_metrics(service_name, exporter=self.metric_exporter)
+        self._apply_instrumentors()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.state)
+
+    def update(self, changes: dict) -> dict:
+        """Apply {signal: value} changes; raises ValueError (nothing applied) on an invalid one."""
+        if not isinstance(changes, dict):
+            raise ValueError("expected a JSON object like {\"traces\": \"off\"}")
+        unknown = set(changes) - set(self.SIGNALS)
+        if unknown:
+            raise ValueError(f"unknown signal(s): {', '.join(sorted(unknown))}")
+        parsed = {name: parse_switch(name, value) for name, value in changes.items()}
+        with self.lock:
+            if "logs" in parsed and parsed["logs"] != self.state["logs"]:
+                self._set_log_correlation(parsed["logs"] == "on")
+            self.state.update(parsed)
+            self.sampler.set(self.state["traces"])
+            self.tracing = self.state["traces"] != "off"
+            self.metering = self.state["metrics"] == "on"
+            self.metric_exporter.enabled = self.metering
+            self._apply_instrumentors()
+            logging.getLogger(__name__).info("Telemetry switched to %s", self.state)
+            return dict(self.state)
+
+    def _apply_instrumentors(self):
+        wanted = self.state["traces"] != "off" or self.state["metrics"] == "on"
+        if wanted == self.instrumented:
+            return
+        # imported here so services without Flask/requests do not need the instrumentation packages
+        if self.app is not None:
+            self._set_flask_instrumentation(wanted)
+        if self.instrument_requests and (wanted or self.instrumented):
+            from opentelemetry.instrumentation.requests import RequestsInstrumentor
+
+            if wanted:
+                RequestsInstrumentor().instrument()
+            else:
+                RequestsInstrumentor().uninstrument()
+        self.instrumented = wanted
+
+    def _set_flask_instrumentation(self, enabled: bool):
+        # Flask rejects new before_request hooks once it served a request, so the app is instrumented
+        # once and then switched like FlaskInstrumentor.uninstrument_app does: wsgi_app and the two hooks
+        app = self.app
+        if not getattr(app, "_is_instrumented_by_opentelemetry", False):
+            from opentelemetry.instrumentation.flask import FlaskInstrumentor
+
+            FlaskInstrumentor().instrument_app(app)
+            self.flask_wsgi_app = app.wsgi_app
+        before, teardown = app.before_request_funcs.setdefault(None, []), app.teardown_request_funcs.setdefault(None, [])
+        if enabled:
+            app.wsgi_app = self.flask_wsgi_app
+            if app._before_request not in before:
+                before.insert(0, app._before_request)
+            if app._teardown_request not in teardown:
+                teardown.append(app._teardown_request)
+        else:
+            app.wsgi_app = app._original_wsgi_app
+            if app._before_request in before:
+                before.remove(app._before_request)
+            if app._teardown_request in teardown:
+                teardown.remove(app._teardown_request)
+
+    @staticmethod
+    def _set_log_correlation(enabled: bool):
+        if enabled:
+            _instrument_logging()
+        else:
+            LoggingInstrumentor().uninstrument()
+        if _log_pipeline is not None:
+            _log_pipeline.set_correlation(enabled)
+
+
+def _admin_authorized(headers) -> bool:
+    # no token configured: the admin endpoint is closed
+    token = os.getenv("TELEMETRY_ADMIN_TOKEN")
+    return bool(token) and hmac.compare_digest(headers.get("X-Admin-Token", ""), token)
+
+
+def register_admin(app, telemetry: Telemetry):
+    """GET/POST /admin/telemetry on a Flask app; POST takes e.g. {"traces": 0.1, "metrics": "off"}."""
+    from flask import jsonify, request
+
+    @app.route("/admin/telemetry", methods=["GET", "POST"])
+    def admin_telemetry():
+        if not _admin_authorized(request.headers):
+            return jsonify({"error": "forbidden"}), 403
+        if request.method == "GET":
+            return jsonify(telemetry.snapshot())
+        try:
+            return jsonify(telemetry.update(request.get_json(force=True) or {}))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+
+def serve_admin(telemetry: Telemetry, port: int):
+    """Same endpoint as register_admin() for services without an HTTP server (consumers), in a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/admin/telemetry":
+                return self._reply(404, {"error": "not found"})
+            if not _admin_authorized(self.headers):
+                return self._reply(403, {"error": "forbidden"})
+            self._reply(200, telemetry.snapshot())
+
+        def do_POST(self):
+            if self.path != "/admin/telemetry":
+                return self._reply(404, {"error": "not found"})
+            if not _admin_authorized(self.headers):
+                return self._reply(403, {"error": "forbidden"})
+            try:
+                changes = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                self._reply(200, telemetry.update(changes))
+            except ValueError as e:
+                self._reply(400, {"error": str(e)})
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
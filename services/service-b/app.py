@@ -1,12 +1,14 @@
 import os
 import json
+import time
+import uuid
 import logging
 from flask import Flask, request, jsonify
 import redis
 
-from opentelemetry.instrumentation.flask import FlaskInstrumentor
 from opentelemetry.propagate import inject
-from common import setup_tracing, setup_metrics
+from opentelemetry.trace import SpanKind
+from common import Telemetry, register_admin
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "service-b")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
@@ -15,15 +17,24 @@ REDIS_QUEUE = os.getenv("REDIS_QUEUE", "tasks")
 
 app = Flask(__name__)
 
-tracer = setup_tracing(SERVICE_NAME)
-# enable OTEL metrics export (auto-instrumentation)
-setup_metrics(SERVICE_NAME)
-FlaskInstrumentor().instrument_app(app)
+# tracing / metrics / log correlation, switchable at runtime via TELEMETRY_* or /admin/telemetry
+telemetry = Telemetry(SERVICE_NAME, app=app)
+register_admin(app, telemetry)
 
 logger = logging.getLogger(__name__)
 
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
 
+def encode_envelope(header: dict, body: bytes) -> bytes:
+    # header line first: the consumer decodes only the header and leaves the body to the task's handler
+    # (json.dumps never emits a raw newline, so the first one ends the header)
+    return json.dumps(header).encode() + b"\n" + body
+
+def enqueue(header: dict, body: bytes) -> int:
+    header["enqueued_at"] = time.time()
+    redis_client.lpush(REDIS_QUEUE, encode_envelope(header, body))
+    return len(body)
+
 @app.route("/process", methods=["POST"])
 def process():
     body = request.get_json() or {}
@@ -33,18 +44,33 @@ def process():
         "payload": body.get("payload", "no-payload"),
     }
 
-    # otel context -> carrier
-    carrier = {}
-    inject(carrier)  # wstawi 'traceparent', 'tracestate'
-
-    task_envelope = {
-        "task": task,
-        "otel_context": carrier,
+    # id + enqueue time let the consumer measure queue wait and report completion (services/loadgen);
+    # the task travels as the envelope's body, serialized once here
+    header = {
+        "id": uuid.uuid4().hex,
+        "type": "task",
+        "enqueued_at": None,
+        "otel_context": {},
     }
+    task_body = json.dumps(task).encode()
 
-    redis_client.lpush(REDIS_QUEUE, json.dumps(task_envelope))
+    if telemetry.tracing:
+        # producer span (messaging semantic conventions); its context travels in the envelope
+        with telemetry.tracer.start_as_current_span(
+            f"send {REDIS_QUEUE}", kind=SpanKind.PRODUCER, attributes={
+                "messaging.system": "redis",
+                "messaging.destination.name": REDIS_QUEUE,
+                "messaging.operation.type": "send",
+                "messaging.operation.name": "lpush",
+                "messaging.message.id": header["id"],
+            },
+        ) as span:
+            inject(header["otel_context"])  # wstawi 'traceparent', 'tracestate'
+            span.set_attribute("messaging.message.body.size", enqueue(header, task_body))
+    else:
+        enqueue(header, task_body)
 
-    return jsonify({"queued": True}), 200
+    return jsonify({"queued": True, "id": header["id"]}), 200
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000)
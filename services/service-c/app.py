@@ -1,39 +1,208 @@
 import os
 import json
+import re
 import time
 import logging
 import redis
 
 from opentelemetry import trace
-from opentelemetry.propagate import extract
-from common import setup_tracing, setup_metrics
+from opentelemetry.propagate import extract, inject
+from opentelemetry.trace import Link, SpanKind, Status, StatusCode
+from common import Telemetry, serve_admin
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "service-c")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_QUEUE = os.getenv("REDIS_QUEUE", "tasks")
+# completions are published for the load generator; empty (default) disables, loadgen/overhead runs set it
+COMPLETIONS_CHANNEL = os.getenv("COMPLETIONS_CHANNEL", "")
+# results for service-a (request-reply): stored under RESULT_KEY_PREFIX + id for RESULT_TTL_S, then the id
+# is published on RESULTS_CHANNEL; empty (default) disables
+RESULTS_CHANNEL = os.getenv("RESULTS_CHANNEL", "")
+RESULT_KEY_PREFIX = "task-result:"
+RESULT_TTL_S = int(os.getenv("RESULT_TTL_S", "3600"))
+# simulated processing time per task (0 in services/loadgen/overhead.py)
+TASK_DURATION_S = float(os.getenv("TASK_DURATION_S", "0.5"))
+ADMIN_PORT = int(os.getenv("ADMIN_PORT", "8001"))
+# up to BATCH_SIZE queued tasks are taken per receive; a batch gets one span linked to every producer
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1"))
 
-tracer = setup_tracing(SERVICE_NAME)
-# enable OTEL metrics export for this service
-setup_metrics(SERVICE_NAME)
+# tracing / metrics / log correlation, switchable at runtime via TELEMETRY_* or /admin/telemetry on ADMIN_PORT
+telemetry = Telemetry(SERVICE_NAME)
 logger = logging.getLogger(__name__)
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
 
+MESSAGING_ATTRS = {"messaging.system": "redis", "messaging.destination.name": REDIS_QUEUE}
+DURATION_BUCKETS_S = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300]
+# queueing vs processing: enqueue (service-b clock) -> receive, and the processing of one task
+queue_wait = telemetry.meter.create_histogram(
+    "messaging.queue_wait.duration", unit="s", description="Time tasks spent in the queue before being received",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS_S,
+)
+process_duration = telemetry.meter.create_histogram(
+    "messaging.process.duration", unit="s", description="Processing time of one task",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS_S,
+)
+
+def publish_completion(envelope: dict, started_at: float):
+    if COMPLETIONS_CHANNEL and envelope.get("id"):
+        redis_client.publish(COMPLETIONS_CHANNEL, json.dumps({
+            "id": envelope["id"],
+            "enqueued_at": envelope.get("enqueued_at"),
+            "started_at": started_at,
+            "finished_at": time.time(),
+        }))
+
+def publish_result(envelope: dict, result: dict):
+    if RESULTS_CHANNEL and envelope.get("id"):
+        record = {"id": envelope["id"], **result, "finished_at": time.time()}
+        # one MULTI: the key is in place before anyone is notified
+        pipe = redis_client.pipeline()
+        pipe.set(RESULT_KEY_PREFIX + envelope["id"], json.dumps(record), ex=RESULT_TTL_S)
+        pipe.publish(RESULTS_CHANNEL, envelope["id"])
+        pipe.execute()
+
+
+def load_body(body) -> dict:
+    # envelopes queued before the header/body split carry the task already decoded
+    return body if isinstance(body, dict) else json.loads(str(body, "utf-8"))
+
+def process_task(envelope: dict) -> dict:
+    task = load_body(envelope["body"])
+    logger.info("Service C processing task", extra={"payload": task.get("payload")})
+    # tu jakaś logika biznesowa...
+    time.sleep(TASK_DURATION_S)
+    return {"payload": task.get("payload"), "processed_by": SERVICE_NAME}
+
+def forward_task(envelope: dict) -> None:
+    """Re-enqueue the task on the header's `forward_to` queue as a "task"; the body bytes are not re-serialized.
+
+    Returns None: the consumer of that queue reports the result and the completion.
+    """
+    target = envelope.get("forward_to")
+    if not isinstance(target, str) or not target:
+        raise ValueError("forward envelope without a forward_to queue")
+    header = {"id": envelope.get("id"), "type": "task", "enqueued_at": time.time(), "otel_context": {}}
+    if telemetry.tracing:
+        inject(header["otel_context"])
+    body = envelope["body"]
+    if isinstance(body, dict):
+        body = json.dumps(body).encode()
+    # one copy into the pushed value; the memoryview slice of the received envelope is joined as is
+    redis_client.lpush(target, b"".join((json.dumps(header).encode(), b"\n", body)))
+
+# handler per envelope type (the header's "type"); it gets the envelope with the undecoded body and decodes
+# what it needs; a handler returning None reports nothing for the task
+HANDLERS = {"task": process_task, "forward": forward_task}
+_ENVELOPE_ID = re.compile(rb'"id":\s*"([0-9a-f]{1,64})"')
+
+def decode_envelope(raw: bytes) -> dict:
+    """Header fields of a queued envelope; the body stays undecoded (a memoryview of raw) under "body".
+
+    An envelope that cannot be decoded becomes {"id": <id if found>, "error": ...}, reported as a failed task.
+    """
+    split = raw.find(b"\n")
+    try:
+        if split < 0:
+            # one JSON document, as queued before the header/body split
+            envelope = json.loads(raw)
+            body = envelope.pop("task", {}) if isinstance(envelope, dict) else None
+        else:
+            envelope = json.loads(raw[:split])
+            body = memoryview(raw)[split + 1:]
+        if not isinstance(envelope, dict):
+            raise ValueError("header is not a JSON object")
+        if not isinstance(envelope.get("id", ""), str) or not isinstance(envelope.get("otel_context", {}), dict):
+            raise ValueError("id must be a string and otel_context an object")
+    except ValueError as e:
+        found = _ENVELOPE_ID.search(raw if split < 0 else raw[:split])
+        return {"id": found[1].decode() if found else None, "error": f"malformed envelope: {e}"}
+    envelope["body"] = body
+    return envelope
+
+def receive() -> list[dict]:
+    _, raw = redis_client.brpop(REDIS_QUEUE)
+    raws = [raw]
+    if BATCH_SIZE > 1:
+        raws += redis_client.rpop(REDIS_QUEUE, BATCH_SIZE - 1) or []
+    # decoded one by one: a malformed envelope fails alone, the rest of the batch is still handled
+    return [decode_envelope(r) for r in raws]
+
+def wait_of(envelope: dict, received_at: float) -> float | None:
+    enqueued_at = envelope.get("enqueued_at")
+    if not isinstance(enqueued_at, (int, float)):
+        return None
+    # clocks of service-b and service-c may differ slightly; never report a negative wait
+    return max(0.0, received_at - enqueued_at)
+
+def handle(envelope: dict):
+    started_at = time.time()
+    try:
+        if "error" in envelope:
+            raise ValueError(envelope["error"])
+        handler = HANDLERS.get(envelope.get("type", "task"))
+        if handler is None:
+            raise ValueError(f"no handler for envelope type {envelope.get('type')!r}")
+        outcome = handler(envelope)
+        result = None if outcome is None else {"status": "done", "result": outcome}
+    except Exception as e:
+        # a failed task is reported to its waiter instead of stopping the consumer
+        logger.exception("Task %s failed", envelope.get("id"))
+        span = trace.get_current_span()
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    if telemetry.metering:
+        process_duration.record(time.time() - started_at, MESSAGING_ATTRS)
+    if result is not None:
+        publish_result(envelope, result)
+        publish_completion(envelope, started_at)
+
+def process_attributes(envelope: dict, wait: float | None) -> dict:
+    attrs = {"messaging.message.id": envelope.get("id") or ""}
+    if wait is not None:
+        attrs["messaging.queue_wait.duration"] = wait
+    return attrs
+
 def main_loop():
+    serve_admin(telemetry, ADMIN_PORT)
     logger.info("Service C started, waiting for tasks...")
+    span_name = f"process {REDIS_QUEUE}"
     while True:
-        _, raw = redis_client.brpop(REDIS_QUEUE)
-        envelope = json.loads(raw)
-        otel_context_carrier = envelope.get("otel_context", {})
-        task = envelope.get("task", {})
-
-        # odtworzenie contextu z B
-        ctx = extract(otel_context_carrier)
-
-        with tracer.start_as_current_span("process-task", context=ctx):
-            logger.info("Service C processing task", extra={"payload": task.get("payload")})
-            # tu jakaś logika biznesowa...
-            time.sleep(0.5)
+        envelopes = receive()
+        received_at = time.time()
+        waits = [wait_of(envelope, received_at) for envelope in envelopes]
+        if telemetry.metering:
+            for wait in waits:
+                if wait is not None:
+                    queue_wait.record(wait, MESSAGING_ATTRS)
+
+        if not telemetry.tracing:
+            for envelope in envelopes:
+                handle(envelope)
+        elif len(envelopes) == 1:
+            # odtworzenie contextu z B: the consumer span continues the producer's trace
+            envelope = envelopes[0]
+            with telemetry.tracer.start_as_current_span(
+                span_name, context=extract(envelope.get("otel_context", {})), kind=SpanKind.CONSUMER,
+                attributes={**MESSAGING_ATTRS, "messaging.operation.type": "process",
+                            **process_attributes(envelope, waits[0])},
+            ):
+                handle(envelope)
+        else:
+            # a batch has several producers: one new trace linked to each of them
+            links = []
+            for envelope, wait in zip(envelopes, waits):
+                producer = trace.get_current_span(extract(envelope.get("otel_context", {}))).get_span_context()
+                if producer.is_valid:
+                    links.append(Link(producer, process_attributes(envelope, wait)))
+            with telemetry.tracer.start_as_current_span(
+                span_name, kind=SpanKind.CONSUMER, links=links,
+                attributes={**MESSAGING_ATTRS, "messaging.operation.type": "process",
+                            "messaging.batch.message_count": len(envelopes)},
+            ):
+                for envelope in envelopes:
+                    handle(envelope)
 
 if __name__ == "__main__":
     main_loop()
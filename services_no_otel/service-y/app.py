@@ -1,13 +1,15 @@
 import os
 import json
+import time
+import uuid
 import logging
 import sys
 from flask import Flask, request, jsonify
 import redis
 
-from opentelemetry.instrumentation.flask import FlaskInstrumentor
-from opentelemetry.propagate import inject
-from common import setup_tracing, setup_metrics
+# from opentelemetry.instrumentation.flask import FlaskInstrumentor
+# from opentelemetry.propagate import inject
+# from common import setup_tracing, setup_metrics
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "service-y")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
@@ -32,6 +34,11 @@ logger = logging.getLogger(__name__)
 
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
 
+def encode_envelope(header: dict, body: bytes) -> bytes:
+    # header line first: the consumer decodes only the header and leaves the body to the task's handler
+    # (json.dumps never emits a raw newline, so the first one ends the header)
+    return json.dumps(header).encode() + b"\n" + body
+
 @app.route("/process", methods=["POST"])
 def process():
     body = request.get_json() or {}
@@ -43,16 +50,20 @@ def process():
 
     # otel context -> carrier
     carrier = {}
-    inject(carrier)  # wstawi 'traceparent', 'tracestate'
+    # inject(carrier)  # wstawi 'traceparent', 'tracestate'
 
-    task_envelope = {
-        "task": task,
+    # id + enqueue time let the consumer report end-to-end completion (services/loadgen);
+    # the task travels as the envelope's body
+    header = {
+        "id": uuid.uuid4().hex,
+        "type": "task",
+        "enqueued_at": time.time(),
         "otel_context": carrier,
     }
 
-    redis_client.lpush(REDIS_QUEUE, json.dumps(task_envelope))
+    redis_client.lpush(REDIS_QUEUE, encode_envelope(header, json.dumps(task).encode()))
 
-    return jsonify({"queued": True}), 200
+    return jsonify({"queued": True, "id": header["id"]}), 200
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000)
@@ -1,18 +1,28 @@
 import os
 import json
+import re
 import time
 import logging
 import sys
 import redis
 
-from opentelemetry import trace
-from opentelemetry.propagate import extract
-from common import setup_tracing, setup_metrics
+# from opentelemetry import trace
+# from opentelemetry.propagate import extract
+# from common import setup_tracing, setup_metrics
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "service-z")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_QUEUE = os.getenv("REDIS_QUEUE", "tasks")
+# completions are published for the load generator; empty (default) disables, loadgen/overhead runs set it
+COMPLETIONS_CHANNEL = os.getenv("COMPLETIONS_CHANNEL", "")
+# results for service-x (request-reply): stored under RESULT_KEY_PREFIX + id for RESULT_TTL_S, then the id
+# is published on RESULTS_CHANNEL; empty (default) disables
+RESULTS_CHANNEL = os.getenv("RESULTS_CHANNEL", "")
+RESULT_KEY_PREFIX = "task-result:"
+RESULT_TTL_S = int(os.getenv("RESULT_TTL_S", "3600"))
+# simulated processing time per task (0 in services/loadgen/overhead.py)
+TASK_DURATION_S = float(os.getenv("TASK_DURATION_S", "0.5"))
 
 # tracer = setup_tracing(SERVICE_NAME)
 # enable OTEL metrics export for this service
@@ -27,21 +37,98 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
 
+def publish_completion(envelope: dict, started_at: float):
+    if COMPLETIONS_CHANNEL and envelope.get("id"):
+        redis_client.publish(COMPLETIONS_CHANNEL, json.dumps({
+            "id": envelope["id"],
+            "enqueued_at": envelope.get("enqueued_at"),
+            "started_at": started_at,
+            "finished_at": time.time(),
+        }))
+
+def publish_result(envelope: dict, result: dict):
+    if RESULTS_CHANNEL and envelope.get("id"):
+        record = {"id": envelope["id"], **result, "finished_at": time.time()}
+        # one MULTI: the key is in place before anyone is notified
+        pipe = redis_client.pipeline()
+        pipe.set(RESULT_KEY_PREFIX + envelope["id"], json.dumps(record), ex=RESULT_TTL_S)
+        pipe.publish(RESULTS_CHANNEL, envelope["id"])
+        pipe.execute()
+
+_ENVELOPE_ID = re.compile(rb'"id":\s*"([0-9a-f]{1,64})"')
+
+def decode_envelope(raw: bytes) -> dict:
+    """Header fields of a queued envelope; the body stays undecoded (a memoryview of raw) under "body".
+
+    An envelope that cannot be decoded becomes {"id": <id if found>, "error": ...}, reported as a failed task.
+    """
+    split = raw.find(b"\n")
+    try:
+        if split < 0:
+            # one JSON document, as queued before the header/body split
+            envelope = json.loads(raw)
+            body = envelope.pop("task", {}) if isinstance(envelope, dict) else None
+        else:
+            envelope = json.loads(raw[:split])
+            body = memoryview(raw)[split + 1:]
+        if not isinstance(envelope, dict):
+            raise ValueError("header is not a JSON object")
+        if not isinstance(envelope.get("id", ""), str) or not isinstance(envelope.get("otel_context", {}), dict):
+            raise ValueError("id must be a string and otel_context an object")
+    except ValueError as e:
+        found = _ENVELOPE_ID.search(raw if split < 0 else raw[:split])
+        return {"id": found[1].decode() if found else None, "error": f"malformed envelope: {e}"}
+    envelope["body"] = body
+    return envelope
+
+def load_body(body) -> dict:
+    # envelopes queued before the header/body split carry the task already decoded
+    return body if isinstance(body, dict) else json.loads(str(body, "utf-8"))
+
+def forward_task(envelope: dict):
+    """Re-enqueue the task on the header's `forward_to` queue as a "task"; the body bytes are not re-serialized."""
+    target = envelope.get("forward_to")
+    if not isinstance(target, str) or not target:
+        raise ValueError("forward envelope without a forward_to queue")
+    header = {"id": envelope.get("id"), "type": "task", "enqueued_at": time.time(), "otel_context": {}}
+    body = envelope["body"]
+    if isinstance(body, dict):
+        body = json.dumps(body).encode()
+    # one copy into the pushed value; the memoryview slice of the received envelope is joined as is
+    redis_client.lpush(target, b"".join((json.dumps(header).encode(), b"\n", body)))
+
+
 def main_loop():
     logger.info("Service Z started, waiting for tasks...")
     while True:
         _, raw = redis_client.brpop(REDIS_QUEUE)
-        envelope = json.loads(raw)
+        envelope = decode_envelope(raw)
         otel_context_carrier = envelope.get("otel_context", {})
-        task = envelope.get("task", {})
 
 
         # ctx = extract(otel_context_carrier)
 
         # with tracer.start_as_current_span("process-task", context=ctx):
-        logger.info("Service Z processing task", extra={"payload": task.get("payload")})
+        started_at = time.time()
+        try:
+            if "error" in envelope:
+                raise ValueError(envelope["error"])
+            if envelope.get("type") == "forward":
+                # the consumer of the target queue reports the result and the completion
+                forward_task(envelope)
+                continue
+            if envelope.get("type", "task") != "task":
+                raise ValueError(f"no handler for envelope type {envelope.get('type')!r}")
+            task = load_body(envelope["body"])
+            logger.info("Service Z processing task", extra={"payload": task.get("payload")})
 
-        time.sleep(0.5)
+            time.sleep(TASK_DURATION_S)
+            result = {"status": "done", "result": {"payload": task.get("payload"), "processed_by": SERVICE_NAME}}
+        except Exception as e:
+            logger.exception("Task %s failed", envelope.get("id"))
+            result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        publish_result(envelope, result)
+        publish_completion(envelope, started_at)
 
 if __name__ == "__main__":
     main_loop()